@@ -30,7 +30,10 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Module containing plugin base class."""
 
+import os
 from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from typing import Any, Callable, ContextManager, Dict, List, Tuple
 
 from pkg_resources import DistributionNotFound, get_distribution
 
@@ -41,6 +44,35 @@ except DistributionNotFound:
     pass
 
 
+PluginHook = Callable[["BasePlugin", Tuple, Dict[str, Any]], ContextManager]
+
+# Hooks entered around every plugin call, see register_plugin_hook.
+_PLUGIN_HOOKS: List[PluginHook] = []
+
+
+def register_plugin_hook(hook: PluginHook) -> None:
+    """Register a hook to be entered around every plugin call.
+
+    Args:
+        hook:
+            Callable taking the plugin instance and the positional and
+            keyword arguments it is called with, and returning a context
+            manager which is entered before and exited after the call to
+            the plugin's process method.
+    """
+    _PLUGIN_HOOKS.append(hook)
+
+
+def unregister_plugin_hook(hook: PluginHook) -> None:
+    """Remove a hook previously added by register_plugin_hook.
+
+    Args:
+        hook:
+            The registered hook.
+    """
+    _PLUGIN_HOOKS.remove(hook)
+
+
 class BasePlugin(ABC):
     """An abstract class for IMPROVER plugins.
     Subclasses must be callable. We preserve the process
@@ -57,7 +89,12 @@ class BasePlugin(ABC):
         Returns:
             Output of self.process()
         """
-        return self.process(*args, **kwargs)
+        if not _PLUGIN_HOOKS:
+            return self.process(*args, **kwargs)
+        with ExitStack() as stack:
+            for hook in list(_PLUGIN_HOOKS):
+                stack.enter_context(hook(self, args, kwargs))
+            return self.process(*args, **kwargs)
 
     @abstractmethod
     def process(self, *args, **kwargs):
@@ -100,3 +137,11 @@ class PostProcessingPlugin(BasePlugin):
         ):
             title = cube.attributes["title"]
             cube.attributes["title"] = f"Post-Processed {title}"
+
+
+# Opt in to recording all plugin calls, see
+# improver.telemetry.instrumentation_hook_enable.
+if os.environ.get("IMPROVER_PLUGIN_INSTRUMENTATION"):
+    from improver.telemetry import instrumentation_hook_enable
+
+    instrumentation_hook_enable(os.environ["IMPROVER_PLUGIN_INSTRUMENTATION"])
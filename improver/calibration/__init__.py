@@ -33,38 +33,39 @@ and coefficient inputs.
 """
 
 from collections import OrderedDict
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple, Union
 
+import numpy as np
+from cf_units import Unit
 from iris.cube import Cube, CubeList
 
+from improver.metadata.constants.time_types import TIME_COORDS
 from improver.metadata.probabilistic import (
     get_diagnostic_cube_name_from_probability_name,
 )
 from improver.utilities.cube_manipulation import MergeCubes
+from improver.utilities.metadata_index import CubeHeader, load_headers
 
 
-def split_forecasts_and_truth(
-    cubes: List[Cube], truth_attribute: str
-) -> Tuple[Cube, Cube, Optional[Cube]]:
-    """
-    A common utility for splitting the various inputs cubes required for
-    calibration CLIs. These are generally the forecast cubes, historic truths,
-    and in some instances a land-sea mask is also required.
+def _group_forecasts_and_truth(
+    cubes: List[Union[Cube, CubeHeader]], truth_attribute: str
+) -> Tuple[List, List, Optional[Union[Cube, CubeHeader]]]:
+    """Group cubes, or the headers of cubes which have not been loaded, into
+    historic forecasts, truths and a land-sea mask, as described in
+    split_forecasts_and_truth.
 
     Args:
         cubes:
-            A list of input cubes which will be split into relevant groups.
-            These include the historical forecasts, in the format supported by
-            the calibration CLIs, and the truth cubes.
+            A list of input cubes or cube headers which will be split into
+            relevant groups.
         truth_attribute:
             An attribute and its value in the format of "attribute=value",
             which must be present on truth cubes.
 
     Returns:
-        - A cube containing all the historic forecasts.
-        - A cube containing all the truth data.
-        - If found within the input cubes list a land-sea mask will be
-          returned, else None is returned.
+        - A list of the historic forecasts.
+        - A list of the truths.
+        - The land-sea mask if found, else None.
 
     Raises:
         ValueError:
@@ -114,12 +115,114 @@ def split_forecasts_and_truth(
     if missing_inputs:
         raise IOError(f"Missing {missing_inputs} input.")
 
-    truth = MergeCubes()(grouped_cubes["truth"])
-    forecast = MergeCubes()(grouped_cubes["historical forecast"])
+    return grouped_cubes["historical forecast"], grouped_cubes["truth"], land_sea_mask
+
+
+def split_forecasts_and_truth(
+    cubes: List[Cube], truth_attribute: str
+) -> Tuple[Cube, Cube, Optional[Cube]]:
+    """
+    A common utility for splitting the various inputs cubes required for
+    calibration CLIs. These are generally the forecast cubes, historic truths,
+    and in some instances a land-sea mask is also required.
+
+    Args:
+        cubes:
+            A list of input cubes which will be split into relevant groups.
+            These include the historical forecasts, in the format supported by
+            the calibration CLIs, and the truth cubes.
+        truth_attribute:
+            An attribute and its value in the format of "attribute=value",
+            which must be present on truth cubes.
+
+    Returns:
+        - A cube containing all the historic forecasts.
+        - A cube containing all the truth data.
+        - If found within the input cubes list a land-sea mask will be
+          returned, else None is returned.
+
+    Raises:
+        ValueError:
+            An unexpected number of distinct cube names were passed in.
+        IOError:
+            More than one cube was identified as a land-sea mask.
+        IOError:
+            Missing truth or historical forecast in input cubes.
+    """
+    forecasts, truths, land_sea_mask = _group_forecasts_and_truth(
+        cubes, truth_attribute
+    )
+    truth = MergeCubes()(truths)
+    forecast = MergeCubes()(forecasts)
 
     return forecast, truth, land_sea_mask
 
 
+def _validity_times(header: CubeHeader) -> Set[int]:
+    """Validity times of a cube from its header, in seconds since the epoch,
+    so that times saved with different units can be compared."""
+    time = header.coord("time")
+    points = np.atleast_1d(np.array(time["points"], dtype=np.float64))
+    calendar = time["calendar"]
+    seconds = Unit(time["units"], calendar=calendar).convert(
+        points, Unit(TIME_COORDS["time"].units, calendar=calendar)
+    )
+    return set(np.round(seconds).astype(np.int64).tolist())
+
+
+def split_forecast_and_truth_files(
+    filepaths: List[str], truth_attribute: str, match_validity_times: bool = False
+) -> Tuple[List[str], List[str], Optional[str]]:
+    """Split the input files required for calibration CLIs into historic
+    forecasts, truths and a land-sea mask, as split_forecasts_and_truth,
+    using only the metadata of the files so that no cubes are loaded.
+
+    Args:
+        filepaths:
+            Paths to netCDF files or chunked directory stores each holding
+            one cube.
+        truth_attribute:
+            An attribute and its value in the format of "attribute=value",
+            which must be present on truth cubes.
+        match_validity_times:
+            If True, historic forecast and truth files with no validity time
+            in common with any file of the other kind are dropped, as their
+            cubes would be by filter_non_matching_cubes once loaded. Where no
+            validity times match at all, no files are dropped.
+
+    Returns:
+        - The paths to the historic forecast files.
+        - The paths to the truth files.
+        - The path to the land-sea mask file if found, else None.
+
+    Raises:
+        ValueError:
+            An unexpected number of distinct cube names were passed in.
+        IOError:
+            More than one cube was identified as a land-sea mask.
+        IOError:
+            Missing truth or historical forecast in input cubes.
+    """
+    forecasts, truths, land_sea_mask = _group_forecasts_and_truth(
+        load_headers(filepaths), truth_attribute
+    )
+    if match_validity_times:
+        forecast_times = set().union(*map(_validity_times, forecasts))
+        truth_times = set().union(*map(_validity_times, truths))
+        if forecast_times & truth_times:
+            forecasts = [
+                header for header in forecasts if _validity_times(header) & truth_times
+            ]
+            truths = [
+                header for header in truths if _validity_times(header) & forecast_times
+            ]
+    return (
+        [header.filepath for header in forecasts],
+        [header.filepath for header in truths],
+        land_sea_mask.filepath if land_sea_mask else None,
+    )
+
+
 def split_forecasts_and_coeffs(
     cubes: CubeList, land_sea_mask_name: Optional[str] = None,
 ):
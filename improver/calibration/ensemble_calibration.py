@@ -37,7 +37,12 @@ Statistics (EMOS).
    ensemble_calibration.rst
 
 """
+import multiprocessing
+import os
+import tempfile
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import iris
@@ -59,6 +64,7 @@ from improver.calibration.utilities import (
     create_unified_frt_coord,
     filter_non_matching_cubes,
     flatten_ignoring_masked_data,
+    flatten_spatial_dimensions,
     forecast_coords_match,
     merge_land_and_sea,
 )
@@ -75,9 +81,56 @@ from improver.metadata.utilities import (
     create_new_diagnostic_cube,
     generate_mandatory_attributes,
 )
+from improver.utilities.chunked_store import load_array, save_array
 from improver.utilities.cube_manipulation import collapsed, enforce_coordinate_ordering
 
 
+def _minimise_saved_points(
+    minimiser: "ContinuousRankedProbabilityScoreMinimisers",
+    minimisation_function: Callable,
+    paths: List[str],
+    sqrt_pi: float,
+    indices: ndarray,
+    initial_guess: ndarray,
+) -> List[Tuple[ndarray, int, bool]]:
+    """Minimise a subset of points independently, reading the data for the
+    points from arrays saved by save_array. This is run in a worker process.
+
+    Args:
+        minimiser:
+            Plugin used to minimise each point.
+        minimisation_function:
+            Function to use when minimising.
+        paths:
+            Paths of the saved truth, variance and forecast predictor arrays,
+            in that order, each with a trailing dimension of points.
+        sqrt_pi:
+            Square root of pi for minimisation.
+        indices:
+            Positions of the points to minimise.
+        initial_guess:
+            Initial guess for each of the points to minimise.
+
+    Returns:
+        Optimised coefficients, number of iterations and whether the
+        minimisation converged for each of the points.
+    """
+    truth_data, forecast_var_data, *forecast_predictors_data = [
+        load_array(path) for path in paths
+    ]
+    return [
+        minimiser._minimise_point(
+            minimisation_function,
+            point_initial_guess,
+            [fp_data[..., index] for fp_data in forecast_predictors_data],
+            truth_data[..., index],
+            forecast_var_data[..., index],
+            sqrt_pi,
+        )
+        for index, point_initial_guess in zip(indices, initial_guess)
+    ]
+
+
 class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
     """
     Minimise the Continuous Ranked Probability Score (CRPS)
@@ -92,6 +145,9 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
     iterations to limit the computational expense.
     Note that the BFGS algorithm was initially trialled but had a bug
     in comparison to comparative results generated in R.
+    The number of points minimised and converged and the mean number of
+    iterations of the last minimisation are recorded in the
+    convergence_stats attribute.
 
     """
 
@@ -109,6 +165,8 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
         tolerance: float = 0.02,
         max_iterations: int = 1000,
         point_by_point: bool = False,
+        max_workers: int = 1,
+        use_gradient: bool = False,
     ) -> None:
         """
         Initialise class for performing minimisation of the Continuous
@@ -141,6 +199,19 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
                 If True, coefficients are calculated independently for each
                 point within the input cube by minimising each point
                 independently.
+            max_workers:
+                Maximum number of processes minimising points at once, where
+                coefficients are calculated independently for each point.
+                The default is 1, minimising one point at a time in this
+                process. This is not used if use_gradient is True.
+            use_gradient:
+                If True, minimise using the BFGS algorithm with the analytic
+                gradient of the CRPS with respect to the coefficients, rather
+                than the Nelder-Mead algorithm. Where coefficients are
+                calculated independently for each point, all of the points
+                are minimised together by a vectorised implementation of the
+                BFGS algorithm. The minimisation terminates once the largest
+                component of the gradient is within the tolerance.
 
         """
         # Dictionary containing the functions that will be minimised,
@@ -150,11 +221,20 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
             "norm": self.calculate_normal_crps,
             "truncnorm": self.calculate_truncated_normal_crps,
         }
+        # Equivalent functions that also return the gradient of the CRPS.
+        self.gradient_minimisation_dict = {
+            "norm": self.calculate_normal_crps_and_gradient,
+            "truncnorm": self.calculate_truncated_normal_crps_and_gradient,
+        }
         self.predictor = check_predictor(predictor)
         self.tolerance = tolerance
         # Maximum iterations for minimisation using Nelder-Mead.
         self.max_iterations = max_iterations
         self.point_by_point = point_by_point
+        self.max_workers = max_workers
+        self.use_gradient = use_gradient
+        # Statistics describing the convergence of the last minimisation.
+        self.convergence_stats = {}
 
     def _normal_crps_preparation(
         self,
@@ -314,6 +394,210 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
             result = self.BAD_VALUE
         return result
 
+    def _crps_and_gradient(
+        self,
+        distribution: str,
+        coefficients: ndarray,
+        forecast_predictor: ndarray,
+        truth: ndarray,
+        forecast_var: ndarray,
+        sqrt_pi: float,
+    ) -> Tuple[Union[float, ndarray], ndarray]:
+        """
+        Calculate the CRPS for a normal or truncated normal distribution,
+        as in calculate_normal_crps and calculate_truncated_normal_crps, and
+        its gradient with respect to the coefficients. Any leading dimensions
+        of the inputs are treated as separate minimisations, so that many
+        points can be minimised at once.
+
+        The gradient is calculated from the derivatives of the CRPS with
+        respect to the location parameter (mu) and the scale parameter
+        (sigma), where sigma = sqrt(gamma^2 + delta^2 * forecast_var).
+
+        Args:
+            distribution:
+                Either "norm" or "truncnorm".
+            coefficients:
+                Coefficients with the order [alpha, beta, gamma, delta],
+                with a trailing dimension of coefficients.
+            forecast_predictor:
+                Data to be used as the predictor, with a trailing dimension
+                of predictors where there is more than one predictor.
+            truth:
+                Data to be used as truth.
+            forecast_var:
+                Ensemble variance data.
+            sqrt_pi:
+                Square root of Pi
+
+        Returns:
+            - CRPS for the current set of coefficients, as a mean value
+              across all points that are not NaN.
+            - Gradient of the CRPS with respect to each coefficient.
+        """
+        if forecast_predictor.ndim == truth.ndim:
+            forecast_predictor = forecast_predictor[..., np.newaxis]
+        alpha = coefficients[..., :1]
+        beta = coefficients[..., 1:-2]
+        gamma = coefficients[..., -2:-1]
+        delta = coefficients[..., -1:]
+        if self.predictor == "realizations":
+            beta_gradient = 2 * beta
+            beta = beta * beta
+        else:
+            beta_gradient = np.ones_like(beta)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mu = alpha + np.einsum("...nk,...k->...n", forecast_predictor, beta)
+            sigma = np.sqrt(gamma * gamma + delta * delta * forecast_var)
+            xz = (truth - mu) / sigma
+            x0 = mu / sigma
+            normal_cdf = norm.cdf(xz)
+            normal_pdf = norm.pdf(xz)
+            if distribution == "norm":
+                crps = sigma * (
+                    xz * (2 * normal_cdf - 1) + 2 * normal_pdf - 1 / sqrt_pi
+                )
+                mu_gradient = 1 - 2 * normal_cdf
+                sigma_gradient = 2 * normal_pdf - 1 / sqrt_pi
+                valid = np.isfinite(np.min(x0, axis=-1))
+            else:
+                normal_cdf_0 = norm.cdf(x0)
+                normal_pdf_0 = norm.pdf(x0)
+                # CRPS divided by sigma, and its derivatives with respect to
+                # the normalised prediction error and mu / sigma.
+                scaled_crps = (
+                    xz * normal_cdf_0 * (2 * normal_cdf + normal_cdf_0 - 2)
+                    + 2 * normal_pdf * normal_cdf_0
+                    - norm.cdf(np.sqrt(2) * x0) / sqrt_pi
+                ) / (normal_cdf_0 * normal_cdf_0)
+                xz_gradient = (2 * normal_cdf + normal_cdf_0 - 2) / normal_cdf_0
+                x0_gradient = (
+                    normal_pdf_0
+                    * (xz * (2 * normal_cdf + 2 * normal_cdf_0 - 2) + 2 * normal_pdf)
+                    - np.sqrt(2) * norm.pdf(np.sqrt(2) * x0) / sqrt_pi
+                ) / (normal_cdf_0 * normal_cdf_0) - (
+                    2 * scaled_crps * normal_pdf_0 / normal_cdf_0
+                )
+                crps = sigma * scaled_crps
+                mu_gradient = x0_gradient - xz_gradient
+                sigma_gradient = scaled_crps - xz * xz_gradient - x0 * x0_gradient
+                min_x0 = np.min(x0, axis=-1)
+                valid = np.isfinite(min_x0) | (min_x0 >= -3)
+
+            mu_gradient = mu_gradient[..., np.newaxis]
+            beta_gradient = beta_gradient[..., np.newaxis, :]
+            gradient = np.concatenate(
+                [
+                    mu_gradient,
+                    mu_gradient * forecast_predictor * beta_gradient,
+                    (sigma_gradient * gamma / sigma)[..., np.newaxis],
+                    (sigma_gradient * delta * forecast_var / sigma)[..., np.newaxis],
+                ],
+                axis=-1,
+            )
+
+        # Average over the points that are not NaN.
+        missing = np.isnan(crps) | np.isnan(gradient).any(axis=-1)
+        count = np.sum(~missing, axis=-1)
+        valid &= count > 0
+        count = np.maximum(count, 1)
+        crps = np.where(missing, 0, crps).sum(axis=-1) / count
+        gradient = np.where(missing[..., np.newaxis], 0, gradient).sum(axis=-2)
+        gradient = gradient / count[..., np.newaxis]
+
+        crps = np.where(valid, crps, self.BAD_VALUE)
+        gradient = np.where(valid[..., np.newaxis], gradient, 0)
+        return crps, gradient
+
+    def calculate_normal_crps_and_gradient(
+        self,
+        initial_guess: ndarray,
+        forecast_predictor: ndarray,
+        truth: ndarray,
+        forecast_var: ndarray,
+        sqrt_pi: float,
+    ) -> Tuple[Union[float, ndarray], ndarray]:
+        """
+        Calculate the CRPS for a normal distribution and its gradient with
+        respect to the coefficients. See _crps_and_gradient.
+
+        Args:
+            initial_guess
+            forecast_predictor
+            truth
+            forecast_var
+            sqrt_pi
+
+        Returns:
+            CRPS for the current set of coefficients and its gradient.
+        """
+        return self._crps_and_gradient(
+            "norm", initial_guess, forecast_predictor, truth, forecast_var, sqrt_pi
+        )
+
+    def calculate_truncated_normal_crps_and_gradient(
+        self,
+        initial_guess: ndarray,
+        forecast_predictor: ndarray,
+        truth: ndarray,
+        forecast_var: ndarray,
+        sqrt_pi: float,
+    ) -> Tuple[Union[float, ndarray], ndarray]:
+        """
+        Calculate the CRPS for a truncated normal distribution with zero
+        as the lower bound and its gradient with respect to the coefficients.
+        See _crps_and_gradient.
+
+        Args:
+            initial_guess
+            forecast_predictor
+            truth
+            forecast_var
+            sqrt_pi
+
+        Returns:
+            CRPS for the current set of coefficients and its gradient.
+        """
+        return self._crps_and_gradient(
+            "truncnorm", initial_guess, forecast_predictor, truth, forecast_var, sqrt_pi
+        )
+
+    @staticmethod
+    def _separate_scale_coefficients(
+        initial_guess: ndarray, forecast_var: ndarray
+    ) -> ndarray:
+        """
+        Adjust an initial guess for minimisation using the gradient. The
+        scale parameter depends upon the square of gamma, so where gamma is
+        zero the gradient with respect to gamma is also zero and gamma would
+        never be adjusted. Instead, where gamma is zero, the variance given
+        by delta at the mean forecast variance is shared equally between
+        gamma and delta.
+
+        Args:
+            initial_guess:
+                Coefficients with the order [alpha, beta, gamma, delta],
+                with a trailing dimension of coefficients.
+            forecast_var:
+                Ensemble variance data, with a trailing dimension of points.
+
+        Returns:
+            The adjusted initial guess.
+        """
+        initial_guess = np.array(initial_guess, dtype=np.float64)
+        mean_var = np.nanmean(forecast_var, axis=-1)
+        zero_gamma = initial_guess[..., -2] == 0
+        initial_guess[..., -2] = np.where(
+            zero_gamma,
+            initial_guess[..., -1] * np.sqrt(mean_var / 2),
+            initial_guess[..., -2],
+        )
+        initial_guess[..., -1] = np.where(
+            zero_gamma, initial_guess[..., -1] / np.sqrt(2), initial_guess[..., -1]
+        )
+        return initial_guess
+
     def _calculate_percentage_change_in_last_iteration(
         self, allvecs: List[ndarray]
     ) -> None:
@@ -373,25 +657,30 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
             A single set of coefficients with the order [alpha, beta, gamma, delta].
 
         """
+        if self.use_gradient:
+            initial_guess = self._separate_scale_coefficients(
+                initial_guess, forecast_var_data
+            )
         optimised_coeffs = minimize(
             minimisation_function,
             initial_guess,
             args=(forecast_predictor_data, truth_data, forecast_var_data, sqrt_pi,),
-            method="Nelder-Mead",
+            method="BFGS" if self.use_gradient else "Nelder-Mead",
+            jac=True if self.use_gradient else None,
             tol=self.tolerance,
             options={"maxiter": self.max_iterations, "return_all": True},
         )
 
         return optimised_coeffs
 
-    def _prepare_forecasts(self, forecast_predictors: CubeList) -> ndarray:
+    def _prepare_forecasts(self, forecast_predictors: List[ndarray]) -> ndarray:
         """Prepare forecasts to be a consistent shape for minimisation by
-        broadcasting static predictors along the time dimension and
         flattening the spatiotemporal dimensions.
 
         Args:
             forecast_predictors:
-                The forecast predictors to be reshaped.
+                The data from the forecast predictors to be reshaped, with
+                static predictors already broadcast along the time dimension.
 
         Returns:
             Reshaped array with a first dimension representing the flattened
@@ -400,7 +689,6 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
         """
         preserve_leading_dimension = self.predictor == "realizations"
 
-        forecast_predictors = broadcast_data_to_time_coord(forecast_predictors)
         flattened_forecast_predictors = []
         for fp_data in forecast_predictors:
             flattened_forecast_predictors.append(
@@ -415,6 +703,299 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
             (forecast_predictor_data,) = flattened_forecast_predictors
         return forecast_predictor_data
 
+    def _minimise_point(
+        self,
+        minimisation_function: Callable,
+        initial_guess: ndarray,
+        forecast_predictors: List[ndarray],
+        truth: ndarray,
+        forecast_var: ndarray,
+        sqrt_pi: float,
+    ) -> Tuple[ndarray, int, bool]:
+        """Minimise a single point. Where the truth is missing at every time,
+        the initial guess is returned without minimising.
+
+        Args:
+            minimisation_function:
+                Function to use when minimising.
+            initial_guess
+            forecast_predictors:
+                The data from the forecast predictors at the point, with
+                static predictors already broadcast along the time dimension.
+            truth
+            forecast_var
+            sqrt_pi
+
+        Returns:
+            - The optimised coefficients for the point.
+            - The number of iterations, or -1 if the point was not minimised.
+            - Whether the minimisation converged.
+        """
+        if all(np.isnan(truth)):
+            return np.array(initial_guess, dtype=np.float32), -1, False
+        optimised_coeffs = self._minimise_caller(
+            minimisation_function,
+            initial_guess,
+            self._prepare_forecasts(forecast_predictors).T,
+            truth,
+            forecast_var,
+            sqrt_pi,
+        )
+        return (
+            optimised_coeffs.x.astype(np.float32),
+            optimised_coeffs.nit,
+            optimised_coeffs.success,
+        )
+
+    def _minimise_points_in_parallel(
+        self,
+        minimisation_function: Callable,
+        initial_guess: ndarray,
+        forecast_predictors: List[ndarray],
+        truth: ndarray,
+        forecast_var: ndarray,
+        sqrt_pi: float,
+    ) -> List[Tuple[ndarray, int, bool]]:
+        """Minimise each point independently within a pool of worker
+        processes. The arrays are saved to a temporary directory once and
+        memory-mapped by each worker, so that the workers share a single
+        copy of the data rather than each being sent their points. Workers
+        are started as new interpreters rather than forked, as in
+        improver.utilities.load. The points are split into contiguous
+        chunks, several per worker to balance the load, and the results
+        are returned in the order of the points regardless of which worker
+        minimised them.
+
+        Args:
+            minimisation_function:
+                Function to use when minimising.
+            initial_guess:
+                Initial guess for each point.
+            forecast_predictors:
+                The data from the forecast predictors, each with a trailing
+                dimension of points.
+            truth:
+                The truth, with a trailing dimension of points.
+            forecast_var:
+                The forecast variance, with a trailing dimension of points.
+            sqrt_pi
+
+        Returns:
+            The optimised coefficients, number of iterations and whether the
+            minimisation converged for each point, as from _minimise_point.
+        """
+        num_points = truth.shape[-1]
+        max_workers = min(self.max_workers, num_points)
+        chunks = np.array_split(np.arange(num_points), min(num_points, 4 * max_workers))
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index, array in enumerate([truth, forecast_var, *forecast_predictors]):
+                paths.append(os.path.join(directory, f"{index}.npy"))
+                save_array(paths[-1], array)
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                results = executor.map(
+                    partial(
+                        _minimise_saved_points,
+                        self,
+                        minimisation_function,
+                        paths,
+                        sqrt_pi,
+                    ),
+                    chunks,
+                    [initial_guess[chunk] for chunk in chunks],
+                )
+                return [point for result in results for point in result]
+
+    def _minimise_points_in_batch(
+        self,
+        minimisation_function: Callable,
+        initial_guess: ndarray,
+        forecast_predictors: List[ndarray],
+        truth: ndarray,
+        forecast_var: ndarray,
+        sqrt_pi: float,
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+        """Minimise each point independently, with all of the points
+        minimised at once by a vectorised implementation of the BFGS
+        algorithm using the gradient of the CRPS. Each point has its own
+        estimate of the inverse Hessian and its own backtracking line search,
+        and stops being updated once the largest component of its gradient
+        is within the tolerance, or once no step along its search direction
+        reduces the CRPS. Where the truth is missing at every time, the
+        initial guess is returned.
+
+        Args:
+            minimisation_function:
+                Function returning the CRPS and its gradient for a batch of
+                points.
+            initial_guess:
+                Initial guess for each point.
+            forecast_predictors:
+                The data from the forecast predictors, each with a trailing
+                dimension of points.
+            truth:
+                The truth, with a trailing dimension of points.
+            forecast_var:
+                The forecast variance, with a trailing dimension of points.
+            sqrt_pi
+
+        Returns:
+            - The optimised coefficients for each point.
+            - The number of iterations for each point, or -1 where the point
+              was not minimised.
+            - Whether the minimisation converged for each point.
+        """
+        num_points = truth.shape[-1]
+        # Arrange the data with a leading dimension of points, filling
+        # masked data with NaN, which is ignored when calculating the CRPS.
+        truth = np.ma.filled(truth, np.nan).reshape(-1, num_points).T
+        forecast_var = np.ma.filled(forecast_var, np.nan).reshape(-1, num_points).T
+        # Realizations are the leading dimension of a single predictor,
+        # otherwise there is one predictor for each array.
+        forecast_predictor = np.concatenate(
+            [
+                np.ma.filled(fp_data, np.nan).reshape(
+                    len(fp_data) if self.predictor == "realizations" else 1,
+                    -1,
+                    num_points,
+                )
+                for fp_data in forecast_predictors
+            ]
+        ).T
+
+        optimised_coeffs = np.array(initial_guess, dtype=np.float32)
+        solve = ~np.all(np.isnan(truth), axis=-1)
+        iterations = np.where(solve, 0, -1)
+        converged = np.zeros(num_points, dtype=bool)
+        if not solve.any():
+            return optimised_coeffs, iterations, converged
+        forecast_predictor = forecast_predictor[solve]
+        truth = truth[solve]
+        forecast_var = forecast_var[solve]
+
+        def crps_and_gradient(
+            coefficients: ndarray, points: ndarray
+        ) -> Tuple[ndarray, ndarray]:
+            """CRPS and its gradient at a subset of the points."""
+            return minimisation_function(
+                coefficients,
+                forecast_predictor[points],
+                truth[points],
+                forecast_var[points],
+                sqrt_pi,
+            )
+
+        coefficients = self._separate_scale_coefficients(
+            initial_guess[solve], forecast_var
+        )
+        num_points, num_coeffs = coefficients.shape
+        identity = np.eye(num_coeffs)
+        crps, gradient = crps_and_gradient(coefficients, np.arange(num_points))
+        inverse_hessian = np.zeros((num_points, num_coeffs, num_coeffs))
+        # Points where the next step is taken down the gradient, rather than
+        # using the estimate of the inverse Hessian.
+        restart = np.ones(num_points, dtype=bool)
+        active = np.ones(num_points, dtype=bool)
+        num_iterations = np.zeros(num_points, dtype=int)
+        for _ in range(self.max_iterations):
+            active &= np.max(np.abs(gradient), axis=-1) > self.tolerance
+            if not active.any():
+                break
+            # Only the points which are still being minimised are updated.
+            points = np.flatnonzero(active)
+            num_iterations[points] += 1
+            x = coefficients[points]
+            g = gradient[points]
+            h = inverse_hessian[points]
+            r = restart[points]
+
+            direction = -np.einsum("pij,pj->pi", h, g)
+            slope = np.sum(g * direction, axis=-1)
+            r |= slope >= 0
+            # Limit the length of steps down the gradient, which are not
+            # scaled by the curvature.
+            direction[r] = (
+                -g[r] / np.maximum(np.linalg.norm(g[r], axis=-1), 1)[:, np.newaxis]
+            )
+            slope[r] = np.sum(g[r] * direction[r], axis=-1)
+
+            # Backtracking line search for a sufficient decrease in the CRPS.
+            step = np.ones(len(points))
+            searching = np.ones(len(points), dtype=bool)
+            for _ in range(30):
+                trial = np.flatnonzero(searching)
+                trial_crps, _ = crps_and_gradient(
+                    x[trial] + step[trial, np.newaxis] * direction[trial],
+                    points[trial],
+                )
+                decrease = 1e-4 * step[trial] * slope[trial]
+                searching[trial] = ~(trial_crps <= crps[points[trial]] + decrease)
+                if not searching.any():
+                    break
+                step[searching] *= 0.5
+            step[searching] = 0
+
+            new_x = x + step[:, np.newaxis] * direction
+            new_crps, new_g = crps_and_gradient(new_x, points)
+            s = new_x - x
+            y = new_g - g
+            sy = np.sum(s * y, axis=-1)
+            # Only update the inverse Hessian where the curvature along the
+            # step is positive, as required for it to remain positive definite.
+            update = (step > 0) & (
+                sy > 1e-10 * np.linalg.norm(s, axis=-1) * np.linalg.norm(y, axis=-1)
+            )
+            # Scale the initial estimate of the inverse Hessian by the
+            # curvature along the first step.
+            scale = update & r
+            h[scale] = (sy[scale] / np.sum(y[scale] ** 2, axis=-1))[
+                :, np.newaxis, np.newaxis
+            ] * identity
+            sy = sy[update, np.newaxis, np.newaxis]
+            left = identity - s[update, :, np.newaxis] * y[update, np.newaxis, :] / sy
+            h[update] = (
+                left @ h[update] @ np.swapaxes(left, 1, 2)
+                + s[update, :, np.newaxis] * s[update, np.newaxis, :] / sy
+            )
+
+            coefficients[points] = new_x
+            crps[points] = new_crps
+            gradient[points] = new_g
+            inverse_hessian[points] = h
+            restart[points] = ~update
+            active[points] = step > 0
+
+        optimised_coeffs[solve] = coefficients
+        iterations[solve] = num_iterations
+        converged[solve] = np.max(np.abs(gradient), axis=-1) <= self.tolerance
+        return optimised_coeffs, iterations, converged
+
+    def _record_convergence(
+        self, iterations: Sequence[int], converged: Sequence[bool]
+    ) -> None:
+        """Record statistics describing the convergence of the minimisations
+        within the convergence_stats attribute.
+
+        Args:
+            iterations:
+                Number of iterations of each minimisation, or -1 where a point
+                was not minimised.
+            converged:
+                Whether each minimisation converged.
+        """
+        iterations = np.array(iterations)
+        minimised = iterations >= 0
+        self.convergence_stats = {
+            "minimised_points": int(np.sum(minimised)),
+            "converged_points": int(np.sum(np.array(converged)[minimised])),
+            "mean_iterations": (
+                float(np.mean(iterations[minimised])) if minimised.any() else 0.0
+            ),
+        }
+
     def _process_points_independently(
         self,
         minimisation_function: Callable,
@@ -447,47 +1028,47 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
             are provided.
         """
         fp_template = forecast_predictors[0]
-        sindex = [
-            fp_template.coord(axis="y"),
-            fp_template.coord(axis="x"),
-        ]
-
-        y_name = truth.coord(axis="y").name()
-        x_name = truth.coord(axis="x").name()
+        # Select the data for each point by position within arrays with a
+        # trailing dimension of points, rather than extracting each point
+        # from the cubes.
+        flattened = flatten_spatial_dimensions(
+            CubeList([truth, forecast_var, *forecast_predictors])
+        )
+        truth_data, forecast_var_data, *forecast_predictors_data = flattened
 
-        optimised_coeffs = []
-        for index, (truth_slice, fv_slice) in enumerate(
-            zip(truth.slices_over(sindex), forecast_var.slices_over(sindex))
-        ):
-            # Extract forecast predictor cubelist to match truth and variance cubes
-            constr = iris.Constraint(
-                coord_values={
-                    y_name: lambda cell: any(
-                        np.isclose(cell.point, truth_slice.coord(axis="y").points)
-                    ),
-                    x_name: lambda cell: any(
-                        np.isclose(cell.point, truth_slice.coord(axis="x").points)
-                    ),
-                }
+        if self.use_gradient:
+            optimised_coeffs, iterations, converged = self._minimise_points_in_batch(
+                minimisation_function,
+                initial_guess,
+                forecast_predictors_data,
+                truth_data,
+                forecast_var_data,
+                sqrt_pi,
             )
-            forecast_predictors_slice = forecast_predictors.extract(constr)
-            forecast_predictor_data = self._prepare_forecasts(forecast_predictors_slice)
-
-            if all(np.isnan(truth_slice.data)):
-                optimised_coeffs.append(
-                    np.array(initial_guess[index], dtype=np.float32)
+        else:
+            if self.max_workers > 1 and truth_data.shape[-1] > 1:
+                results = self._minimise_points_in_parallel(
+                    minimisation_function,
+                    initial_guess,
+                    forecast_predictors_data,
+                    truth_data,
+                    forecast_var_data,
+                    sqrt_pi,
                 )
             else:
-                optimised_coeffs.append(
-                    self._minimise_caller(
+                results = [
+                    self._minimise_point(
                         minimisation_function,
                         initial_guess[index],
-                        forecast_predictor_data.T,
-                        truth_slice.data,
-                        fv_slice.data,
+                        [fp_data[..., index] for fp_data in forecast_predictors_data],
+                        truth_data[..., index],
+                        forecast_var_data[..., index],
                         sqrt_pi,
-                    ).x.astype(np.float32)
-                )
+                    )
+                    for index in range(truth_data.shape[-1])
+                ]
+            optimised_coeffs, iterations, converged = zip(*results)
+        self._record_convergence(iterations, converged)
 
         y_coord = fp_template.coord(axis="y")
         x_coord = fp_template.coord(axis="x")
@@ -535,7 +1116,9 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
         # Flatten the data arrays and remove any missing data.
         truth_data = flatten_ignoring_masked_data(truth.data)
         forecast_var_data = flatten_ignoring_masked_data(forecast_var.data)
-        forecast_predictor_data = self._prepare_forecasts(forecast_predictors)
+        forecast_predictor_data = self._prepare_forecasts(
+            broadcast_data_to_time_coord(forecast_predictors)
+        )
 
         optimised_coeffs = self._minimise_caller(
             minimisation_function,
@@ -554,6 +1137,7 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
             )
             warnings.warn(msg)
         self._calculate_percentage_change_in_last_iteration(optimised_coeffs.allvecs)
+        self._record_convergence([optimised_coeffs.nit], [optimised_coeffs.success])
         return optimised_coeffs.x.astype(np.float32)
 
     def process(
@@ -617,6 +1201,8 @@ class ContinuousRankedProbabilityScoreMinimisers(BasePlugin):
                 "Error message is {}".format(distribution, self.minimisation_dict, err)
             )
             raise KeyError(msg)
+        if self.use_gradient:
+            minimisation_function = self.gradient_minimisation_dict[distribution]
 
         if self.predictor == "realizations":
             for forecast_predictor in forecast_predictors:
@@ -671,6 +1257,8 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
         predictor: str = "mean",
         tolerance: float = 0.02,
         max_iterations: int = 1000,
+        max_workers: int = 1,
+        use_gradient: bool = False,
     ) -> None:
         """
         Create an ensemble calibration plugin that, for Nonhomogeneous Gaussian
@@ -724,6 +1312,16 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
                 predictor_of_mean is "realizations", then the number of
                 iterations may require increasing, as there will be
                 more coefficients to solve for.
+            max_workers:
+                Maximum number of processes minimising points at once, where
+                coefficients are calculated independently for each point.
+                The default is 1, minimising one point at a time in this
+                process.
+            use_gradient:
+                If True, minimise using the BFGS algorithm with the analytic
+                gradient of the CRPS, rather than the Nelder-Mead algorithm.
+                Where coefficients are calculated independently for each
+                point, all of the points are minimised at once.
         """
         self.distribution = distribution
         self.point_by_point = point_by_point
@@ -734,11 +1332,15 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
         self.desired_units = desired_units
         self.tolerance = tolerance
         self.max_iterations = max_iterations
+        self.max_workers = max_workers
+        self.use_gradient = use_gradient
         self.minimiser = ContinuousRankedProbabilityScoreMinimisers(
             self.predictor,
             tolerance=self.tolerance,
             max_iterations=self.max_iterations,
             point_by_point=self.point_by_point,
+            max_workers=self.max_workers,
+            use_gradient=self.use_gradient,
         )
 
         # Setting default values for coeff_names.
@@ -1137,6 +1739,156 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
         else:
             cube.data = np.ma.masked_invalid(cube.data)
 
+    @staticmethod
+    def _spatial_points(cube: Cube) -> List[Tuple[float, float]]:
+        """The y and x coordinate values of each point of a cube, in the
+        order given by flatten_spatial_dimensions.
+
+        Args:
+            cube:
+                Cube with spatial dimensions.
+
+        Returns:
+            The y and x coordinate values of each point, rounded to allow for
+            differences in precision between files.
+        """
+        y_points = np.round(cube.coord(axis="y").points.astype(np.float64), 4)
+        x_points = np.round(cube.coord(axis="x").points.astype(np.float64), 4)
+        if cube.coord_dims(cube.coord(axis="y")) != cube.coord_dims(
+            cube.coord(axis="x")
+        ):
+            y_points, x_points = [
+                points.ravel()
+                for points in np.meshgrid(y_points, x_points, indexing="ij")
+            ]
+        return list(zip(y_points, x_points))
+
+    def _initial_guess_from_coefficients(
+        self,
+        previous_coefficients: CubeList,
+        historic_forecasts: Cube,
+        forecast_predictors: CubeList,
+        truths: Cube,
+        number_of_initial_guess_coeffs: int,
+    ) -> Optional[ndarray]:
+        """Create an initial guess from previously estimated coefficients.
+        The previous coefficients are only used if they were estimated for
+        the same diagnostic, distribution and predictors. Where coefficients
+        are calculated independently for each point, the previous
+        coefficients are matched to the points of the truths using the
+        spatial coordinates, so that the previous coefficients may cover
+        different sites or a different part of the grid. Coefficients which
+        were not calculated independently for each point are used at every
+        point.
+
+        Args:
+            previous_coefficients:
+                EMOS coefficients previously estimated, for example on the
+                previous day.
+            historic_forecasts:
+                Historic forecasts from the training dataset.
+            forecast_predictors:
+                The predictors are the historic forecasts processed to be
+                either in the form of the ensemble mean or the ensemble
+                realizations and any additional predictors.
+            truths:
+                Truths from the training dataset.
+            number_of_initial_guess_coeffs:
+                Number of coefficients in the initial guess.
+
+        Returns:
+            The initial guess, either for all points together, or for each
+            point, with NaN at the points which are not within the previous
+            coefficients. None if the previous coefficients cannot be used.
+        """
+        coefficients = []
+        for coeff_name in self.coeff_names:
+            cubes = previous_coefficients.extract(f"emos_coefficient_{coeff_name}")
+            if len(cubes) != 1:
+                warnings.warn(
+                    f"The previous coefficients do not contain a single "
+                    f"emos_coefficient_{coeff_name} cube, so the initial guess "
+                    "will be computed."
+                )
+                return None
+            coefficients.append(cubes[0])
+
+        beta = coefficients[1]
+        previous_predictors = (
+            list(beta.coord("predictor_name").points)
+            if beta.coords("predictor_name")
+            else []
+        )
+        mismatches = [
+            (attribute, coeff.attributes.get(attribute), expected)
+            for attribute, expected in [
+                ("diagnostic_standard_name", historic_forecasts.name()),
+                ("distribution", self.distribution),
+            ]
+            for coeff in coefficients
+            if coeff.attributes.get(attribute) != expected
+        ]
+        if previous_predictors != [fp.name() for fp in forecast_predictors]:
+            mismatches.append(
+                (
+                    "predictor_name",
+                    previous_predictors,
+                    [fp.name() for fp in forecast_predictors],
+                )
+            )
+        if mismatches:
+            attribute, found, expected = mismatches[0]
+            warnings.warn(
+                f"The previous coefficients have a {attribute} of {found} rather "
+                f"than {expected}, so the initial guess will be computed."
+            )
+            return None
+
+        if coefficients[0].coord_dims(coefficients[0].coord(axis="y")):
+            if not self.point_by_point:
+                warnings.warn(
+                    "The previous coefficients were calculated independently "
+                    "for each point, so the initial guess will be computed."
+                )
+                return None
+            # Arrange the coefficients with a leading dimension of points.
+            previous_guess = np.vstack(
+                [
+                    np.ma.filled(data.astype(np.float64), np.nan).reshape(
+                        -1, data.shape[-1]
+                    )
+                    for data in flatten_spatial_dimensions(CubeList(coefficients))
+                ]
+            ).T
+            indices = {
+                point: index
+                for index, point in enumerate(self._spatial_points(coefficients[0]))
+            }
+        else:
+            previous_guess = np.hstack(
+                [np.ravel(coeff.data).astype(np.float64) for coeff in coefficients]
+            )
+            indices = None
+
+        if previous_guess.shape[-1] != number_of_initial_guess_coeffs:
+            warnings.warn(
+                f"The previous coefficients contain {previous_guess.shape[-1]} "
+                f"coefficients rather than {number_of_initial_guess_coeffs}, so "
+                "the initial guess will be computed."
+            )
+            return None
+        if indices is None:
+            return previous_guess
+
+        truth_points = self._spatial_points(truths)
+        initial_guess = np.full(
+            (len(truth_points), number_of_initial_guess_coeffs), np.nan
+        )
+        for index, point in enumerate(truth_points):
+            if point in indices:
+                initial_guess[index] = previous_guess[indices[point]]
+        return initial_guess
+
     def guess_and_minimise(
         self,
         truths: Cube,
@@ -1144,6 +1896,7 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
         forecast_predictors: CubeList,
         forecast_var: Cube,
         number_of_realizations: Optional[int],
+        previous_coefficients: Optional[CubeList] = None,
     ) -> CubeList:
         """Function to consolidate calls to compute the initial guess, compute
         the optimised coefficients using minimisation and store the resulting
@@ -1164,44 +1917,79 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
             number_of_realizations:
                 Number of realizations within the forecast predictor. If no
                 realizations are present, this option is None.
+            previous_coefficients:
+                EMOS coefficients previously estimated, which are used as the
+                initial guess where they match the diagnostic, distribution,
+                predictors and points. The initial guess is computed where
+                they do not.
 
         Returns:
             CubeList constructed using the coefficients provided and using
             metadata from the historic_forecasts cube. Each cube within the
             cubelist is for a separate EMOS coefficient e.g. alpha, beta,
-            gamma, delta.
+            gamma, delta. If previous coefficients are provided, each cube
+            has attributes recording the number of points which were
+            initialised from the previous coefficients, the number of points
+            minimised and converged, and the mean number of iterations.
 
         """
-        if self.point_by_point and not self.use_default_initial_guess:
-            y_name = truths.coord(axis="y").name()
-            x_name = truths.coord(axis="x").name()
+        previous_guess = None
+        if previous_coefficients is not None:
+            previous_guess = self._initial_guess_from_coefficients(
+                previous_coefficients,
+                historic_forecasts,
+                forecast_predictors,
+                truths,
+                len(self.coeff_names)
+                - 1
+                + (
+                    number_of_realizations
+                    if self.predictor == "realizations"
+                    else len(forecast_predictors)
+                ),
+            )
+            if (
+                self.point_by_point
+                and previous_guess is not None
+                and previous_guess.ndim == 1
+            ):
+                # Coefficients calculated for all points together are used as
+                # the initial guess at every point.
+                previous_guess = np.broadcast_to(
+                    previous_guess,
+                    (len(self._spatial_points(truths)), len(previous_guess)),
+                )
+        # Whether the initial guess is taken from the previous coefficients,
+        # either for all points together or for each point.
+        warm_started = np.zeros(0, dtype=bool)
+        if previous_guess is not None:
+            warm_started = ~np.any(np.isnan(np.atleast_2d(previous_guess)), axis=-1)
+
+        if not self.point_by_point and warm_started.any():
+            initial_guess = previous_guess
+        elif self.point_by_point and not self.use_default_initial_guess:
+            truths_data, *forecast_predictors_data = flatten_spatial_dimensions(
+                CubeList([truths, *forecast_predictors])
+            )
 
             initial_guess = []
-            for truth_slice in truths.slices_over([y_name, x_name]):
-                constr = iris.Constraint(
-                    coord_values={
-                        y_name: lambda cell: any(
-                            np.isclose(cell.point, truth_slice.coord(y_name).points)
-                        ),
-                        x_name: lambda cell: any(
-                            np.isclose(cell.point, truth_slice.coord(x_name).points)
-                        ),
-                    }
-                )
-                forecast_predictors_slice = forecast_predictors.extract(constr)
+            for index in range(truths_data.shape[-1]):
+                if warm_started.any() and warm_started[index]:
+                    initial_guess.append(previous_guess[index])
+                    continue
                 if self.predictor == "realizations":
-                    forecast_predictors_data = forecast_predictors_slice[0].data
+                    forecast_predictors_point = forecast_predictors_data[0][..., index]
                 else:
                     # If using mean as predictor, stack to produce one array where
                     # the leading dimension represents the number of predictors.
-                    forecast_predictors_data = np.ma.stack(
-                        broadcast_data_to_time_coord(forecast_predictors_slice)
+                    forecast_predictors_point = np.ma.stack(
+                        [fp_data[..., index] for fp_data in forecast_predictors_data]
                     )
 
                 initial_guess.append(
                     self.compute_initial_guess(
-                        truth_slice.data,
-                        forecast_predictors_data,
+                        truths_data[..., index],
+                        forecast_predictors_point,
                         self.predictor,
                         number_of_realizations,
                     )
@@ -1231,6 +2019,10 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
                         len(initial_guess),
                     ),
                 )
+                if warm_started.any():
+                    initial_guess = np.where(
+                        warm_started[:, np.newaxis], previous_guess, initial_guess
+                    )
 
         # Calculate coefficients if there are no nans in the initial guess.
         optimised_coeffs = self.minimiser(
@@ -1244,6 +2036,23 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
             optimised_coeffs, historic_forecasts, forecast_predictors
         )
 
+        if previous_coefficients is not None:
+            convergence_stats = self.minimiser.convergence_stats
+            for cube in coefficients_cubelist:
+                cube.attributes.update(
+                    {
+                        "emos_warm_started_points": np.int32(np.sum(warm_started)),
+                        "emos_minimised_points": np.int32(
+                            convergence_stats["minimised_points"]
+                        ),
+                        "emos_converged_points": np.int32(
+                            convergence_stats["converged_points"]
+                        ),
+                        "emos_mean_iterations": np.float32(
+                            convergence_stats["mean_iterations"]
+                        ),
+                    }
+                )
         return coefficients_cubelist
 
     def process(
@@ -1252,6 +2061,8 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
         truths: Cube,
         additional_fields: Optional[CubeList] = None,
         landsea_mask: Optional[Cube] = None,
+        previous_coefficients: Optional[CubeList] = None,
+        forecast_variance: Optional[Cube] = None,
     ) -> CubeList:
         """
         Using Nonhomogeneous Gaussian Regression/Ensemble Model Output
@@ -1267,12 +2078,14 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
            truths have the desired units for calibration.
         4. Calculate the variance of the historic forecasts. If the chosen
            predictor is the mean, also calculate the mean of the historic
-           forecasts.
+           forecasts. These are not calculated if the forecast variance is
+           provided, as when loaded from a training store.
         5. If a land-sea mask is provided then mask out sea points in the truths
            and predictor from the historic forecasts.
         6. Calculate initial guess at coefficient values by performing a
            linear regression, if requested, otherwise default values are
-           used.
+           used. Previously estimated coefficients are used instead, where
+           provided.
         7. Perform minimisation.
 
         Args:
@@ -1287,18 +2100,34 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
                 land points are used to calculate the coefficients. Within the
                 land-sea mask cube land points should be specified as ones,
                 and sea points as zeros.
+            previous_coefficients:
+                EMOS coefficients previously estimated, for example on the
+                previous day, to use as the initial guess for the
+                minimisation. Where these do not match the diagnostic,
+                distribution, predictors or points, the initial guess is
+                computed as usual.
+            forecast_variance:
+                The variance of the historic forecasts, as held in a training
+                store (see improver.calibration.training_store). If provided,
+                the historic_forecasts are the ensemble mean of the historic
+                forecasts, rather than the realizations, and the mean must be
+                the predictor.
 
         Returns:
             CubeList constructed using the coefficients provided and using
             metadata from the historic_forecasts cube. Each cube within the
             cubelist is for a separate EMOS coefficient e.g. alpha, beta,
-            gamma, delta.
+            gamma, delta. If previous coefficients are provided, each cube
+            also has attributes describing the convergence of the
+            minimisation.
 
         Raises:
             ValueError: If either the historic_forecasts or truths cubes were not
                 passed in.
             ValueError: If the units of the historic and truth cubes do not
                 match.
+            ValueError: If the forecast variance is provided when the
+                realizations are the predictor.
         """
         if landsea_mask and self.point_by_point:
             msg = (
@@ -1310,9 +2139,18 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
         if not (historic_forecasts and truths):
             raise ValueError("historic_forecasts and truths cubes must be provided.")
 
+        if forecast_variance is not None and self.predictor == "realizations":
+            msg = (
+                "The forecast variance can only be provided with the ensemble "
+                "mean as the predictor, as the realizations are otherwise required."
+            )
+            raise ValueError(msg)
+
         historic_forecasts, truths = filter_non_matching_cubes(
             historic_forecasts, truths
         )
+        if forecast_variance is not None:
+            forecast_variance, _ = filter_non_matching_cubes(forecast_variance, truths)
         check_forecast_consistency(historic_forecasts)
         if additional_fields:
             if self.predictor.lower() == "realizations":
@@ -1339,6 +2177,14 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
 
         # Make sure inputs have the same units.
         if self.desired_units:
+            if forecast_variance is not None:
+                # The variance scales with the square of the units, and is
+                # unaffected by any offset between them.
+                scale = historic_forecasts.units.convert(
+                    1, self.desired_units
+                ) - historic_forecasts.units.convert(0, self.desired_units)
+                forecast_variance.data = forecast_variance.data * np.float32(scale ** 2)
+                forecast_variance.units = Unit(self.desired_units) ** 2
             historic_forecasts.convert_units(self.desired_units)
             truths.convert_units(self.desired_units)
 
@@ -1351,7 +2197,9 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
             raise ValueError(msg)
 
         number_of_realizations = None
-        if self.predictor == "mean":
+        if forecast_variance is not None:
+            forecast_predictors = iris.cube.CubeList([historic_forecasts])
+        elif self.predictor == "mean":
             forecast_predictors = iris.cube.CubeList(
                 [collapsed(historic_forecasts, "realization", iris.analysis.MEAN)]
             )
@@ -1363,9 +2211,12 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
         if additional_fields:
             forecast_predictors.extend(additional_fields)
 
-        forecast_var = collapsed(
-            historic_forecasts, "realization", iris.analysis.VARIANCE
-        )
+        if forecast_variance is not None:
+            forecast_var = forecast_variance
+        else:
+            forecast_var = collapsed(
+                historic_forecasts, "realization", iris.analysis.VARIANCE
+            )
 
         # If a landsea_mask is provided mask out the sea points
         if landsea_mask:
@@ -1379,6 +2230,7 @@ class EstimateCoefficientsForEnsembleCalibration(BasePlugin):
             forecast_predictors,
             forecast_var,
             number_of_realizations,
+            previous_coefficients=previous_coefficients,
         )
         return coefficients_cubelist
 
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Module for a rolling store of the statistics used to estimate EMOS
+coefficients from historic forecasts and truths.
+
+A training store is a directory holding one chunked directory store (see
+improver.utilities.chunked_store) for each validity time, named by the
+validity time, which contains the ensemble mean and variance of the historic
+forecast and the truth at that time. Days are appended to the store as their
+truths become available, and the days within a training window are loaded as
+memory-mapped arrays, so that the historic forecasts do not need to be
+loaded and collapsed over their realizations on every run.
+
+The diagnostic, forecast periods and grid of the forecasts are recorded in
+the store, so that forecasts of another kind are not mixed into it.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+
+import iris
+import numpy as np
+from iris.cube import Cube, CubeList
+
+from improver.calibration.utilities import filter_non_matching_cubes
+from improver.utilities.chunked_store import STORE_EXTENSION, load_store, save_store
+from improver.utilities.cube_manipulation import collapsed
+from improver.utilities.temporal import iris_time_to_datetime
+
+TIME_FORMAT = "%Y%m%dT%H%MZ"
+
+# Name of the file recording the forecasts held in a training store
+IDENTIFIERS_FILENAME = "training_store.json"
+
+
+def _day_stores(path: str) -> List[str]:
+    """Names of the stores held in a training store, one for each validity
+    time, in order of validity time."""
+    if not os.path.isdir(path):
+        return []
+    return sorted(name for name in os.listdir(path) if name.endswith(STORE_EXTENSION))
+
+
+def _identifiers(historic_forecasts: Cube) -> Dict[str, Any]:
+    """The diagnostic, forecast periods in seconds and a digest of the
+    spatial coordinates of historic forecasts, which identify the forecasts
+    that may be held in a training store. The spatial points are rounded to
+    allow for differences in precision between files."""
+    grid = hashlib.sha256()
+    for axis in ("y", "x"):
+        coord = historic_forecasts.coord(axis=axis)
+        grid.update(f"{coord.name()} {coord.units}".encode())
+        grid.update(np.round(coord.points.astype(np.float64), 4).tobytes())
+    forecast_periods = None
+    if historic_forecasts.coords("forecast_period"):
+        forecast_period = historic_forecasts.coord("forecast_period").copy()
+        forecast_period.convert_units("seconds")
+        forecast_periods = np.unique(forecast_period.points).astype(int).tolist()
+    return {
+        "diagnostic": historic_forecasts.name(),
+        "forecast_period": forecast_periods,
+        "grid": grid.hexdigest(),
+    }
+
+
+def _check_identifiers(path: str, historic_forecasts: Cube) -> Dict[str, Any]:
+    """Check that historic forecasts match those recorded in a training
+    store, where any are recorded.
+
+    Args:
+        path:
+            Path to the training store directory.
+        historic_forecasts:
+            Historic forecasts, or their ensemble mean.
+
+    Returns:
+        The identifiers of the historic forecasts.
+
+    Raises:
+        ValueError: If the diagnostic, forecast periods or grid of the
+            forecasts differ from those recorded in the store.
+    """
+    identifiers = _identifiers(historic_forecasts)
+    try:
+        with open(os.path.join(path, IDENTIFIERS_FILENAME)) as stream:
+            recorded = json.load(stream)
+    except FileNotFoundError:
+        return identifiers
+    for key, value in identifiers.items():
+        if recorded.get(key) != value:
+            description = key.replace("_", " ")
+            raise ValueError(
+                f"The training store {path} holds forecasts with a different "
+                f"{description} from those given: "
+                f"{recorded.get(key)} rather than {value}."
+            )
+    return identifiers
+
+
+def append_to_training_store(
+    path: str, historic_forecasts: Cube, truths: Cube, max_length: Optional[int] = None
+) -> List[str]:
+    """Add the ensemble mean and variance of historic forecasts and the
+    truths to a training store, creating the store if needed. A day is added
+    for each validity time at which there is both a forecast and a truth,
+    replacing any day already held for that time.
+
+    Args:
+        path:
+            Path to the training store directory.
+        historic_forecasts:
+            Historic forecasts with a realization coordinate, for one or more
+            validity times.
+        truths:
+            Truths for one or more validity times.
+        max_length:
+            If given, the oldest days are removed so that the store holds at
+            most this number of days.
+
+    Returns:
+        The validity times of the days added, in the format used to name
+        them.
+
+    Raises:
+        ValueError: If the diagnostic, forecast periods or grid of the
+            forecasts differ from those already held in the store.
+    """
+    identifiers = _check_identifiers(path, historic_forecasts)
+    historic_forecasts, truths = filter_non_matching_cubes(historic_forecasts, truths)
+    forecast_mean = collapsed(historic_forecasts, "realization", iris.analysis.MEAN)
+    forecast_variance = collapsed(
+        historic_forecasts, "realization", iris.analysis.VARIANCE
+    )
+
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, IDENTIFIERS_FILENAME), "w") as stream:
+        json.dump(identifiers, stream)
+    added = []
+    for mean_slice, variance_slice, truth_slice in zip(
+        forecast_mean.slices_over("time"),
+        forecast_variance.slices_over("time"),
+        truths.slices_over("time"),
+    ):
+        (validity_time,) = iris_time_to_datetime(mean_slice.coord("time"))
+        name = validity_time.strftime(TIME_FORMAT)
+        save_store(
+            CubeList([mean_slice, variance_slice, truth_slice]),
+            os.path.join(path, name + STORE_EXTENSION),
+        )
+        added.append(name)
+
+    if max_length is not None:
+        for name in _day_stores(path)[:-max_length]:
+            shutil.rmtree(os.path.join(path, name))
+    return added
+
+
+def load_training_store(
+    path: str,
+    training_length: Optional[int] = None,
+    end_time: Optional[str] = None,
+    historic_forecasts: Optional[Cube] = None,
+) -> Tuple[Cube, Cube, Cube]:
+    """Load the days within a training window from a training store. The
+    data are memory-mapped and only read when needed.
+
+    Args:
+        path:
+            Path to the training store directory.
+        training_length:
+            Number of days to load, being the latest days at or before the
+            end time. If not given, all of the days are loaded.
+        end_time:
+            Latest validity time to load, in the format YYYYMMDDTHHMMZ. If
+            not given, the window ends at the latest day in the store.
+        historic_forecasts:
+            If given, the store must hold forecasts of the same diagnostic,
+            forecast periods and grid as these forecasts.
+
+    Returns:
+        - The ensemble mean of the historic forecasts.
+        - The ensemble variance of the historic forecasts.
+        - The truths.
+
+    Raises:
+        ValueError: If the store holds forecasts which differ from the
+            historic forecasts given.
+        ValueError: If there are no days within the training window.
+    """
+    if historic_forecasts is not None:
+        _check_identifiers(path, historic_forecasts)
+    names = _day_stores(path)
+    if end_time is not None:
+        names = [name for name in names if name[: -len(STORE_EXTENSION)] <= end_time]
+    if training_length is not None:
+        names = names[-training_length:] if training_length > 0 else []
+    if not names:
+        raise ValueError(
+            f"The training store {path} holds no days within the training window."
+        )
+
+    days = [load_store(os.path.join(path, name)) for name in names]
+    forecast_mean, forecast_variance, truths = [
+        CubeList(day[index] for day in days).merge_cube() for index in range(3)
+    ]
+    return forecast_mean, forecast_variance, truths
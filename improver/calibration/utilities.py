@@ -410,3 +410,61 @@ def broadcast_data_to_time_coord(cubelist: CubeList) -> List[ndarray]:
 
         broadcasted_data.append(data)
     return broadcasted_data
+
+
+def flatten_spatial_dimensions(cubelist: CubeList) -> List[ndarray]:
+    """Extract the data from all cubes within a cubelist with the spatial
+    dimensions moved to the end and flattened into a single dimension of
+    points, so that the data for each point can be selected by position
+    rather than by extracting each point from the cubes using its
+    coordinate values. The points are ordered by y and then by x, with
+    sites (where the y and x coordinates share a dimension) kept in their
+    original order. Data from cubes without a time coordinate is broadcast
+    along the time dimension, as in broadcast_data_to_time_coord.
+
+    Args:
+        cubelist:
+            The cubelist from which the data will be extracted. All cubes
+            must have the same spatial coordinates.
+
+    Returns:
+        The data taken from each cube within the cubelist, with a trailing
+        dimension of points.
+
+    Raises:
+        ValueError: If the spatial coordinates of the cubes do not match.
+    """
+    template = cubelist[0]
+    for cube in cubelist[1:]:
+        for axis in "yx":
+            points = cube.coord(axis=axis).points
+            template_points = template.coord(axis=axis).points
+            if points.shape != template_points.shape or not np.allclose(
+                points, template_points
+            ):
+                msg = (
+                    f"The {axis} coordinate of the {cube.name()} cube does not "
+                    f"match the {axis} coordinate of the {template.name()} cube."
+                )
+                raise ValueError(msg)
+
+    num_times = [
+        len(cube.coord("time").points)
+        for cube in cubelist
+        if cube.coords("time", dim_coords=True)
+    ]
+    flattened_data = []
+    for cube in cubelist:
+        spatial_dims = []
+        for axis in "yx":
+            for dim in cube.coord_dims(cube.coord(axis=axis)):
+                if dim not in spatial_dims:
+                    spatial_dims.append(dim)
+        leading_ndim = cube.ndim - len(spatial_dims)
+        data = np.moveaxis(cube.data, spatial_dims, range(leading_ndim, cube.ndim))
+        data = data.reshape(data.shape[:leading_ndim] + (-1,))
+        if not cube.coords("time") and num_times:
+            # Broadcast data from cube along a time dimension.
+            data = np.broadcast_to(data, (num_times[0],) + data.shape)
+        flattened_data.append(data)
+    return flattened_data
@@ -54,6 +54,10 @@ UNDOCUMENTED = clize.Parameter.UNDOCUMENTED
 
 # help helpers
 
+# Converted docstrings keyed by the original, populated from the command
+# registry so that showing help does not usually need to import sphinx.
+DOCSTRING_CACHE = {}
+
 
 def docutilize(obj):
     """Convert Numpy or Google style docstring into reStructuredText format.
@@ -69,18 +73,23 @@ def docutilize(obj):
     """
     from inspect import cleandoc, getdoc
 
-    from sphinx.ext.napoleon.docstring import GoogleDocstring, NumpyDocstring
-
     if isinstance(obj, str):
         doc = cleandoc(obj)
     else:
         doc = getdoc(obj)
-    doc = str(NumpyDocstring(doc))
-    doc = str(GoogleDocstring(doc))
-    doc = doc.replace(":exc:", "")
-    doc = doc.replace(":data:", "")
-    doc = doc.replace(":keyword", ":param")
-    doc = doc.replace(":kwtype", ":type")
+    if doc in DOCSTRING_CACHE:
+        doc = DOCSTRING_CACHE[doc]
+    else:
+        from sphinx.ext.napoleon.docstring import GoogleDocstring, NumpyDocstring
+
+        original = doc
+        doc = str(NumpyDocstring(doc))
+        doc = str(GoogleDocstring(doc))
+        doc = doc.replace(":exc:", "")
+        doc = doc.replace(":data:", "")
+        doc = doc.replace(":keyword", ":param")
+        doc = doc.replace(":kwtype", ":type")
+        DOCSTRING_CACHE[original] = doc
 
     if isinstance(obj, str):
         return doc
@@ -139,10 +148,44 @@ class ObjectAsStr(str):
         return "<%s.%s@%i>" % (cls.__module__, cls.__name__, obj_id)
 
 
+# Converted inputs keyed by file name, then by converter and its arguments,
+# for files shared between commands run in the same process.
+SHARED_INPUTS = {}
+
+
+def share_inputs(paths):
+    """Convert the given input files only once in this process.
+
+    Cubes converted from a shared input are realised, and each later use
+    receives a copy of the object converted the first time, so that
+    commands which modify their inputs do not affect one another.
+
+    Args:
+        paths (iterable of str):
+            File names to share.
+    """
+    for path in paths:
+        SHARED_INPUTS.setdefault(str(path), {})
+
+
 def maybe_coerce_with(converter, obj, **kwargs):
     """Apply converter if str, pass through otherwise."""
     obj = getattr(obj, "original_object", obj)
-    return converter(obj, **kwargs) if isinstance(obj, str) else obj
+    if not isinstance(obj, str):
+        return obj
+    if obj in SHARED_INPUTS:
+        from copy import deepcopy
+
+        converted = SHARED_INPUTS[obj]
+        key = (converter, tuple(sorted(kwargs.items())))
+        if key not in converted:
+            result = converter(obj, **kwargs)
+            for cube in result if isinstance(result, list) else [result]:
+                if getattr(cube, "has_lazy_data", False):
+                    cube.data
+            converted[key] = result
+        return deepcopy(converted[key])
+    return converter(obj, **kwargs)
 
 
 @value_converter
@@ -162,6 +205,54 @@ def inputcube(to_convert):
     return maybe_coerce_with(load_cube, to_convert)
 
 
+@value_converter(name="INPUTCUBE")
+def inputcube_deferred(to_convert):
+    """Returns the file name or passed object, leaving the cube to be loaded
+    by load_inputcubes together with the other inputs.
+
+    Args:
+        to_convert (string or iris.cube.Cube):
+            File name or Cube object.
+
+    Returns:
+        File name or passed object.
+    """
+    return getattr(to_convert, "original_object", to_convert)
+
+
+def load_inputcubes(inputs):
+    """Loads cubes from the file names given by inputcube_deferred arguments.
+
+    Files are loaded by as many processes as given by the
+    IMPROVER_LOAD_WORKERS environment variable, by default one, which
+    speeds up commands taking hundreds of input files.
+
+    Args:
+        inputs (iterable of string or iris.cube.Cube):
+            File names or Cube objects.
+
+    Returns:
+        list of iris.cube.Cube:
+            Loaded cubes or passed objects, in the order given.
+    """
+    import os
+
+    from improver.utilities.load import load_cube, load_cubes
+
+    inputs = list(inputs)
+    deferred = [isinstance(obj, str) and obj not in SHARED_INPUTS for obj in inputs]
+    loaded = iter(
+        load_cubes(
+            [obj for obj, defer in zip(inputs, deferred) if defer],
+            max_workers=int(os.environ.get("IMPROVER_LOAD_WORKERS", 1)),
+        )
+    )
+    return [
+        next(loaded) if defer else maybe_coerce_with(load_cube, obj)
+        for obj, defer in zip(inputs, deferred)
+    ]
+
+
 @value_converter
 def inputcube_nolazy(to_convert):
     """Loads cube from file or returns passed object.
@@ -195,6 +286,45 @@ def inputcubelist(to_convert):
     return maybe_coerce_with(load_cubelist, to_convert)
 
 
+@value_converter
+def inputancillary(to_convert):
+    """Loads a static ancillary cube from file or returns passed object.
+
+    The realised cube is kept in the ancillary cache of this process, so
+    later loads of the same unchanged file return a copy of it.
+
+    Args:
+        to_convert (string or iris.cube.Cube):
+            File name or Cube object.
+
+    Returns:
+        Loaded cube or passed object.
+    """
+    from improver.utilities.ancillary_cache import load_ancillary
+
+    return maybe_coerce_with(load_ancillary, to_convert)
+
+
+@value_converter
+def inputancillarylist(to_convert):
+    """Loads a static ancillary cubelist from file or returns passed object.
+
+    The realised cubes are kept in the ancillary cache of this process, so
+    later loads of the same unchanged file return a copy of them.
+
+    Args:
+        to_convert (string or iris.cube.CubeList):
+            File name or CubeList object.
+
+    Returns:
+        Loaded cubelist or passed object.
+    """
+    from improver.utilities.ancillary_cache import load_ancillary
+    from improver.utilities.load import load_cubelist
+
+    return maybe_coerce_with(load_ancillary, to_convert, loader=load_cubelist)
+
+
 @value_converter
 def inputjson(to_convert):
     """Loads json from file or returns passed object.
@@ -315,6 +445,24 @@ def create_constrained_inputcubelist_converter(*constraints):
 
         from improver.utilities.load import load_cubelist
 
+        to_convert = getattr(to_convert, "original_object", to_convert)
+        names = [constr for constr in constraints if isinstance(constr, str)]
+        if names and isinstance(to_convert, str) and to_convert not in SHARED_INPUTS:
+            # Check the cube names in the file header, so that a missing or
+            # repeated input is reported before any cubes are loaded
+            from iris.exceptions import ConstraintMismatchError
+
+            from improver.utilities.metadata_index import load_headers
+
+            header_names = [header.name() for header in load_headers([to_convert])]
+            for name in names:
+                count = header_names.count(name)
+                if count != 1:
+                    raise ConstraintMismatchError(
+                        f"Got {count} cubes for constraint {Constraint(name)!r}, "
+                        "expecting 1."
+                    )
+
         cubelist = maybe_coerce_with(load_cubelist, to_convert)
 
         return CubeList(
@@ -336,13 +484,15 @@ def with_output(
     *args,
     output=None,
     pass_through_output=False,
-    compression_level=1,
+    compression_level: int = None,
     least_significant_digit: int = None,
+    save_profile: str = None,
     **kwargs,
 ):
     """Add `output` keyword only argument.
     Add `compression_level` option.
     Add `least_significant_digit` option.
+    Add `save_profile` option.
 
     This is used to add extra `output`, `compression_level` and `least_significant_digit` CLI
     options. If `output` is provided, it saves the result of calling `wrapped` to file and returns
@@ -362,6 +512,7 @@ def with_output(
             Used in pipelines of commands if intermediate output needs to be saved.
         compression_level (int):
             Will set the compression level (1 to 9), or disable compression (0).
+            By default this is given by the save profile.
         least_significant_digit (int):
             If specified will truncate the data to a precision given by
             10**(-least_significant_digit), e.g. if least_significant_digit=2, then the data will
@@ -369,6 +520,13 @@ def with_output(
             http://www.esrl.noaa.gov/psd/data/gridded/conventions/cdc_netcdf_standard.shtml
             for details. When used with `compression level`, this will result in lossy
             compression.
+        save_profile (str):
+            Name of the profile giving the chunking, compression and shuffle
+            used to save the output: "default", "scratch" (uncompressed, for
+            intermediate files), "spot" (small spatial tiles), "column"
+            (spatial tiles spanning all leading dimensions) or "archive".
+            By default this is taken from the IMPROVER_SAVE_PROFILE
+            environment variable, or is "default".
     Returns:
         Result of calling `wrapped` or None if `output` is given.
     """
@@ -377,7 +535,13 @@ def with_output(
     result = wrapped(*args, **kwargs)
 
     if output and result:
-        save_netcdf(result, output, compression_level, least_significant_digit)
+        save_netcdf(
+            result,
+            output,
+            compression_level,
+            least_significant_digit,
+            profile=save_profile,
+        )
         if pass_through_output:
             return ObjectAsStr(result, output)
         return
@@ -424,34 +588,6 @@ def command_executor(*argv, verbose=False, dry_run=False):
     )
 
 
-def _cli_items():
-    """Dynamically discover CLIs."""
-    import importlib
-    import pkgutil
-
-    from improver.cli import __path__ as improver_cli_pkg_path
-
-    yield ("help", improver_help)
-    for minfo in pkgutil.iter_modules(improver_cli_pkg_path):
-        mod_name = minfo.name
-        if mod_name != "__main__":
-            mcli = importlib.import_module("improver.cli." + mod_name)
-            yield (mod_name, clizefy(mcli.process))
-
-
-SUBCOMMANDS_TABLE = OrderedDict(sorted(_cli_items()))
-
-
-# main CLI object with subcommands
-
-
-SUBCOMMANDS_DISPATCHER = clizefy(
-    SUBCOMMANDS_TABLE,
-    description="""IMPROVER NWP post-processing toolbox""",
-    footnotes="""See also improver --help for more information.""",
-)
-
-
 # IMPROVER top level main
 
 
@@ -544,6 +680,7 @@ def main(
     *args,
     profile: value_converter(lambda _: _, name="FILENAME") = None,  # noqa: F821
     memprofile: value_converter(lambda _: _, name="FILENAME") = None,  # noqa: F821
+    telemetry: value_converter(lambda _: _, name="FILENAME") = None,  # noqa: F821
     verbose=False,
     dry_run=False,
 ):
@@ -572,6 +709,11 @@ def main(
             of your program (suffixed with _SNAPSHOT)
             and a track of the maximum memory used by your program
             over time (suffixed with _MAX_TRACKER).
+        telemetry (str):
+            If given, will append a line of JSON to the file given recording
+            the command, its arguments digest, wall clock and CPU time, peak
+            RSS, input and output file sizes and the duration of each plugin
+            called. To write to stderr, use a hyphen (-)
         verbose (bool):
             Print executed commands
         dry_run (bool):
@@ -590,6 +732,12 @@ def main(
         from improver.memprofile import memory_profile_decorator
 
         exec_cmd = memory_profile_decorator(exec_cmd, memprofile)
+    if telemetry is not None:
+        from improver.telemetry import telemetry_decorator
+
+        exec_cmd = telemetry_decorator(
+            exec_cmd, None if telemetry == "-" else telemetry
+        )
     result = exec_cmd(
         SUBCOMMANDS_DISPATCHER,
         prog_name,
@@ -620,3 +768,178 @@ def run_main(argv=None):
         argv = sys.argv[:]
         argv[0] = "improver"
     run(main, args=argv)
+
+
+# command registry
+
+
+class LazyCommand:
+    """CLI object for a command whose module is only imported when the
+    command is run or its help is shown.
+
+    The description and usages shown in the list of commands are taken from
+    the command registry rather than from the command itself.
+    """
+
+    def __init__(self, name, description="", usages=()):
+        self.name = name
+        self.description = description
+        self._usages = list(usages)
+        self._cli = None
+
+    @property
+    def cli(self):
+        """Returns the object itself, to be used in place of a Clize CLI."""
+        return self
+
+    @property
+    def helper(self):
+        """Returns the object itself, providing the description and usages
+        for the list of commands."""
+        return self
+
+    def usages(self):
+        """Usages of the command, without the command name."""
+        return iter(self._usages)
+
+    def load(self):
+        """Import the command module and return its CLI object."""
+        if self._cli is None:
+            import importlib
+
+            module = importlib.import_module("improver.cli." + self.name)
+            self._cli = clizefy(module.process).cli
+        return self._cli
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+def _cli_module_names():
+    """Names of the CLI modules, found without importing them."""
+    import pkgutil
+
+    from improver.cli import __path__ as improver_cli_pkg_path
+
+    return sorted(
+        minfo.name
+        for minfo in pkgutil.iter_modules(improver_cli_pkg_path)
+        if minfo.name != "__main__"
+    )
+
+
+def _registry_path():
+    """Path of the command registry file.
+
+    This is given by the IMPROVER_CLI_REGISTRY environment variable if set,
+    and is in the user cache directory otherwise.
+    """
+    import os
+
+    path = os.environ.get("IMPROVER_CLI_REGISTRY")
+    if path:
+        return path
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_dir, "improver", "cli_registry.json")
+
+
+def _registry_key():
+    """Modification times of the source files of the CLI package, used to
+    identify when the command registry is out of date."""
+    import os
+
+    from improver.cli import __path__ as improver_cli_pkg_path
+
+    return {
+        entry.name: entry.stat().st_mtime_ns
+        for path in improver_cli_pkg_path
+        for entry in os.scandir(path)
+        if entry.name.endswith(".py")
+    }
+
+
+def build_registry():
+    """Build the command registry by importing every CLI module.
+
+    Returns:
+        dict:
+            Dictionary containing the registry "key", the "description" and
+            "usages" of each command in "commands" and the converted
+            "docstrings" used in the help of the commands.
+    """
+    commands = {}
+    for name in _cli_module_names():
+        command_cli = LazyCommand(name).load()
+        commands[name] = {
+            "description": command_cli.helper.description,
+            "usages": list(command_cli.helper.usages()),
+        }
+    for command_cli in (main.cli, improver_help.cli):
+        command_cli.helper.get_help()
+    return {
+        "key": _registry_key(),
+        "commands": commands,
+        "docstrings": dict(DOCSTRING_CACHE),
+    }
+
+
+def load_registry():
+    """Load the command registry, building and saving it if it is missing or
+    out of date.
+
+    The registry records each command's description and usages and the
+    converted docstrings used in help, so that dispatching a command only
+    imports that command's module and listing the commands does not import
+    any of them. If the registry cannot be saved, it is rebuilt each time.
+
+    Returns:
+        dict:
+            Dictionary containing the "description" and "usages" of each
+            command, keyed by command module name.
+    """
+    import json
+    import os
+
+    path = _registry_path()
+    key = _registry_key()
+    try:
+        with open(path) as fin:
+            registry = json.load(fin)
+    except (OSError, ValueError):
+        registry = None
+    if registry is None or registry.get("key") != key:
+        registry = build_registry()
+        # save atomically by writing to a temporary file and then renaming
+        ftmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(ftmp, "w") as fout:
+                json.dump(registry, fout)
+            os.replace(ftmp, path)
+        except OSError:
+            pass
+    else:
+        DOCSTRING_CACHE.update(registry["docstrings"])
+    return registry["commands"]
+
+
+def _cli_items():
+    """Discover CLIs from the command registry."""
+    yield ("help", improver_help)
+    for name, entry in load_registry().items():
+        yield (name, LazyCommand(name, **entry))
+
+
+SUBCOMMANDS_TABLE = OrderedDict(sorted(_cli_items()))
+
+
+# main CLI object with subcommands
+
+
+SUBCOMMANDS_DISPATCHER = clizefy(
+    SUBCOMMANDS_TABLE,
+    description="""IMPROVER NWP post-processing toolbox""",
+    footnotes="""See also improver --help for more information.""",
+)
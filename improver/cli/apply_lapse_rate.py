@@ -39,8 +39,8 @@ from improver import cli
 def process(
     temperature: cli.inputcube,
     lapse_rate: cli.inputcube,
-    source_orography: cli.inputcube,
-    target_orography: cli.inputcube,
+    source_orography: cli.inputancillary,
+    target_orography: cli.inputancillary,
 ):
     """Apply downscaling temperature adjustment using calculated lapse rate.
 
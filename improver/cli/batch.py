@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Script to run one IMPROVER command over many sets of files in parallel."""
+
+import json
+import multiprocessing
+import os
+import re
+import shlex
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from improver import cli
+
+PLACEHOLDER = re.compile(r"\{(\d+|output)\}")
+
+# Interval in seconds between checks of the resident memory of a worker
+MEMORY_POLL_INTERVAL = 0.1
+
+# Index and start time of the job running in a worker process
+_RUNNING_JOB = None
+
+
+def load_manifest(path: Path) -> List[Tuple[List[str], str]]:
+    """Read the input and output paths of each job from a manifest file.
+
+    Each non-empty line not starting with "#" gives the input paths of one
+    job followed by its output path, separated by whitespace and quoted
+    following shell rules where necessary.
+
+    Args:
+        path:
+            Path to the manifest file.
+
+    Returns:
+        List of the input paths and output path of each job.
+
+    Raises:
+        ValueError: If a job does not specify an output path.
+    """
+    jobs = []
+    with open(path) as stream:
+        for index, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            paths = shlex.split(line)
+            if len(paths) < 2:
+                raise ValueError(
+                    f"Line {index} of the manifest must give at least one input "
+                    "path and an output path"
+                )
+            jobs.append((paths[:-1], paths[-1]))
+    return jobs
+
+
+def job_arguments(
+    command: str, args: Iterable[str], inputs: List[str], output: str
+) -> List[str]:
+    """Build the arguments of a single job.
+
+    Placeholders of the form {0}, {1}, ... in the arguments are replaced
+    by the corresponding input path and {output} by the output path. Where
+    there are no input placeholders, the input paths are given before the
+    other arguments, and where there is no output placeholder the output
+    path is given with the --output option.
+
+    Args:
+        command:
+            Name of the command to run.
+        args:
+            Arguments of the command common to all jobs.
+        inputs:
+            Input paths of the job.
+        output:
+            Output path of the job.
+
+    Returns:
+        Command name and arguments of the job.
+    """
+    values = {str(index): path for index, path in enumerate(inputs)}
+    values["output"] = output
+    fields = {field for arg in args for field in PLACEHOLDER.findall(arg)}
+    job_args = [
+        PLACEHOLDER.sub(lambda match: values[match.group(1)], arg) for arg in args
+    ]
+    if not fields - {"output"}:
+        job_args = [*inputs, *job_args]
+    if "output" not in fields:
+        job_args.extend(["--output", output])
+    return [command, *job_args]
+
+
+def shared_paths(args: Iterable[str]) -> List[str]:
+    """Files given in the arguments common to all jobs, such as ancillaries.
+
+    Args:
+        args:
+            Arguments of the command common to all jobs.
+
+    Returns:
+        Arguments, or values of options given as --option=value, which are
+        paths to existing files.
+    """
+    paths = []
+    for arg in args:
+        if PLACEHOLDER.search(arg):
+            continue
+        if arg.startswith("--") and "=" in arg:
+            arg = arg.split("=", 1)[1]
+        if os.path.isfile(arg):
+            paths.append(arg)
+    return paths
+
+
+def _resident_memory() -> int:
+    """Resident memory of the current process in bytes."""
+    with open("/proc/self/statm") as stream:
+        return int(stream.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _watch_memory(limit: int, directory: str) -> None:
+    """End the worker process once its resident memory exceeds the limit in
+    bytes while a job is running, first recording the job as failed by
+    writing a file named by its index to the directory."""
+    while True:
+        time.sleep(MEMORY_POLL_INTERVAL)
+        job = _RUNNING_JOB
+        if job is not None and _resident_memory() > limit:
+            index, start = job
+            with open(os.path.join(directory, f"{index}.json"), "w") as stream:
+                json.dump({"elapsed": time.perf_counter() - start}, stream)
+            # Memory is not returned by failing the job within the worker,
+            # so the worker is ended and the pool replaced.
+            os._exit(1)
+
+
+def _init_worker(
+    paths: List[str], memory_limit: Optional[float], directory: Optional[str]
+) -> None:
+    """Share the common input files between jobs run in a worker process and
+    watch its resident memory."""
+    if memory_limit:
+        threading.Thread(
+            target=_watch_memory,
+            args=(int(memory_limit * 1024 * 1024), directory),
+            daemon=True,
+        ).start()
+    cli.share_inputs(paths)
+
+
+def _run_job(index: int, argv: List[str]) -> Dict:
+    """Run a job in a worker process, recording which job is running so
+    that it can be reported as failed if the memory limit is exceeded.
+
+    Args:
+        index:
+            Index of the job.
+        argv:
+            Command arguments, starting with the command name.
+
+    Returns:
+        Result of the job, as returned by improver.cli.serve.run_job.
+    """
+    global _RUNNING_JOB
+    from improver.cli.serve import run_job
+
+    _RUNNING_JOB = (index, time.perf_counter())
+    try:
+        return run_job(argv)
+    finally:
+        _RUNNING_JOB = None
+
+
+def _memory_failures(directory: str, memory_limit: float) -> Dict[int, Dict]:
+    """Results of the jobs recorded by _watch_memory as exceeding the memory
+    limit, keyed by job index."""
+    failures = {}
+    for filename in os.listdir(directory):
+        with open(os.path.join(directory, filename)) as stream:
+            record = json.load(stream)
+        failures[int(os.path.splitext(filename)[0])] = {
+            "exit_status": 1,
+            "stdout": "",
+            "stderr": (
+                "MemoryError: The resident memory of the job exceeded the "
+                f"limit of {memory_limit} MiB\n"
+            ),
+            "elapsed": record["elapsed"],
+        }
+    return failures
+
+
+def run_batch(
+    jobs: List[Tuple[List[str], str]],
+    command: str,
+    args: List[str],
+    workers: int = 1,
+    memory_limit: Optional[float] = None,
+) -> List[Dict]:
+    """Run a command for each job in a pool of worker processes.
+
+    Input files common to all jobs are loaded at most once in each worker.
+    Workers are started as new interpreters rather than forked, as the
+    thread pools used by dask and the state of the netCDF libraries in this
+    process cannot safely be inherited.
+
+    Args:
+        jobs:
+            Input paths and output path of each job.
+        command:
+            Name of the command to run.
+        args:
+            Arguments of the command common to all jobs.
+        workers:
+            Number of worker processes.
+        memory_limit:
+            Maximum resident memory of each worker process in MiB. The
+            resident memory is checked every MEMORY_POLL_INTERVAL seconds
+            while a job runs. A worker found to exceed the limit is ended
+            and its job reported as failed with a MemoryError. The other
+            unfinished jobs are then run again in a new pool of workers.
+            Memory which is only reserved or memory-mapped, and not yet
+            read, does not count towards the limit. Only available where
+            /proc is mounted, as on Linux.
+
+    Returns:
+        Result of each job in the order given, as returned by
+        improver.cli.serve.run_job, with the job output path.
+
+    Raises:
+        ValueError: If a memory limit is given where the resident memory of
+            processes cannot be read.
+        BrokenProcessPool: If a worker process ends other than by exceeding
+            the memory limit.
+    """
+    if memory_limit and not os.path.exists("/proc/self/statm"):
+        raise ValueError(
+            "The memory limit requires /proc to read the resident memory of "
+            "the worker processes"
+        )
+
+    argvs = [job_arguments(command, args, inputs, output) for inputs, output in jobs]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        pending = list(range(len(argvs)))
+        while pending:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(shared_paths(args), memory_limit, directory),
+            ) as executor:
+                futures = {
+                    index: executor.submit(_run_job, index, argvs[index])
+                    for index in pending
+                }
+                for index, future in futures.items():
+                    try:
+                        results[index] = future.result()
+                    except BrokenProcessPool:
+                        pass
+            failures = {
+                index: failure
+                for index, failure in _memory_failures(directory, memory_limit).items()
+                if index not in results
+            }
+            results.update(failures)
+            remaining = [index for index in pending if index not in results]
+            if remaining and not failures:
+                raise BrokenProcessPool("A worker process ended unexpectedly")
+            pending = remaining
+    return [
+        {"output": output, **results[index]} for index, (_, output) in enumerate(jobs)
+    ]
+
+
+@cli.clizefy
+def process(
+    manifest: cli.inputpath,
+    command: cli.LAST_OPTION,
+    *args,
+    workers: int = 1,
+    memory_limit: float = None,
+):
+    """Run one command for many sets of input files in parallel.
+
+    The manifest file lists one job per line, giving the input paths of the
+    job followed by its output path. The command is run with its arguments
+    for each job, in a pool of worker processes. Placeholders of the form
+    {0}, {1}, ... in the arguments are replaced by the input paths of the
+    job and {output} by its output path. Without input placeholders the
+    input paths are given before the other arguments, and without an output
+    placeholder the output path is given using --output. For example::
+
+        improver batch --workers 4 manifest.txt nbhood {0} mask.nc \\
+            --neighbourhood-output probabilities --radii 20000 \\
+            --output {output}
+
+    Input files which are common to all jobs, such as masks and neighbour
+    cubes, are loaded at most once in each worker.
+
+    A line of JSON is written to stdout for each job, in the order of the
+    manifest, giving the job "output", the "exit_status" of the command, the
+    "stdout" and "stderr" it produced and the "elapsed" time in seconds.
+
+    Args:
+        manifest (pathlib.Path):
+            File listing the input and output paths of each job.
+        command (str):
+            Command to run.
+        args (tuple):
+            Command arguments common to all jobs.
+        workers (int):
+            Number of worker processes.
+        memory_limit (float):
+            Maximum resident memory of each worker process in MiB, checked
+            while each job runs. A worker exceeding the limit is ended, its
+            job fails with a MemoryError and the other unfinished jobs are
+            run again in new workers. Only available on Linux.
+
+    Raises:
+        RuntimeError: If any of the jobs fail.
+    """
+    results = run_batch(
+        load_manifest(manifest),
+        command,
+        list(args),
+        workers=workers,
+        memory_limit=memory_limit,
+    )
+    for result in results:
+        print(json.dumps(result), flush=True)
+    failed = [result for result in results if result["exit_status"]]
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(results)} jobs failed")
@@ -39,7 +39,7 @@ from improver import cli
 @cli.clizefy
 @cli.with_output
 def process(
-    *cubes: cli.inputcube, cycletime: str = None,
+    *cubes: cli.inputcube_deferred, cycletime: str = None,
 ):
     """Runs equal-weighted blending for a specific scenario.
 
@@ -65,7 +65,7 @@ def process(
     from improver.utilities.cube_manipulation import collapse_realizations
 
     cubelist = CubeList()
-    for cube in cubes:
+    for cube in cli.load_inputcubes(cubes):
         cubelist.append(collapse_realizations(cube))
 
     plugin = WeightAndBlend("forecast_reference_time", "linear", y0val=0.5, ynval=0.5,)
@@ -37,7 +37,7 @@ from improver import cli
 @cli.clizefy
 @cli.with_output
 def process(
-    *cubes: cli.inputcube,
+    *cubes: cli.inputcube_deferred,
     truth_attribute,
     n_probability_bins: int = 5,
     single_value_lower_limit: bool = False,
@@ -82,6 +82,7 @@ def process(
         ConstructReliabilityCalibrationTables,
     )
 
+    cubes = cli.load_inputcubes(cubes)
     forecast, truth, _ = split_forecasts_and_truth(cubes, truth_attribute)
 
     return ConstructReliabilityCalibrationTables(
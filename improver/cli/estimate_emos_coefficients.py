@@ -39,7 +39,7 @@ from improver import cli
 @cli.clizefy
 @cli.with_output
 def process(
-    *cubes: cli.inputcube,
+    *cubes: cli.inputcube_deferred,
     distribution,
     truth_attribute,
     point_by_point=False,
@@ -48,6 +48,12 @@ def process(
     predictor="mean",
     tolerance: float = 0.02,
     max_iterations: int = 1000,
+    max_workers: int = 1,
+    use_gradient=False,
+    previous_coefficients: cli.inputcubelist = None,
+    training_store: str = None,
+    training_length: int = None,
+    max_store_length: int = None,
 ):
     """Estimate coefficients for Ensemble Model Output Statistics.
 
@@ -57,6 +63,11 @@ def process(
     forecasts and historical truth data (to use in calibration).
     The estimated coefficients are output as a cube.
 
+    Where a training store is given, the historical forecasts and truths
+    provided, typically those for the latest day only, are added to the
+    store, and the coefficients are estimated from the days held in the
+    store, so that earlier days are not reloaded.
+
     Args:
         cubes (list of iris.cube.Cube):
             A list of cubes containing the historical forecasts and
@@ -107,20 +118,97 @@ def process(
             is raised. If the predictor is "realizations", then the number of
             iterations may require increasing, as there will be more
             coefficients to solve.
+        max_workers (int):
+            Maximum number of processes minimising points at once, where the
+            coefficients are calculated independently for each point. The
+            points are shared between the processes and the coefficients are
+            returned in the same order regardless.
+        use_gradient (bool):
+            If True, minimise using the BFGS algorithm with the analytic
+            gradient of the CRPS, rather than the Nelder-Mead algorithm. The
+            minimisation terminates once each component of the gradient is
+            within the tolerance. Where coefficients are calculated for each
+            point, all of the points are minimised at once.
+        previous_coefficients (iris.cube.CubeList):
+            EMOS coefficients previously estimated, for example on the
+            previous day, to use as the initial guess for the minimisation
+            where they match the diagnostic, distribution, predictors and
+            points. Where coefficients are calculated for each point, points
+            missing from the previous coefficients use the usual initial
+            guess. The output coefficients then record the number of points
+            initialised from the previous coefficients, the number of points
+            minimised and converged, and the mean number of iterations, as
+            attributes.
+        training_store (str):
+            Path to a directory holding the ensemble mean and variance of the
+            historical forecasts and the truths for each day (see
+            improver.calibration.training_store), which is created if it does
+            not exist. The predictor must be "mean", and the store must
+            hold forecasts of the same diagnostic, forecast period and grid
+            as those given.
+        training_length (int):
+            Number of the latest days in the training store to estimate the
+            coefficients from. By default all of the days held are used.
+        max_store_length (int):
+            Maximum number of days held in the training store. Once the new
+            days have been added, the oldest days are removed. By default
+            this is the training length, so that days which will not be
+            used again are removed, or if no training length is given the
+            store is not pruned.
 
     Returns:
         iris.cube.CubeList:
             CubeList containing the coefficients estimated using EMOS. Each
             coefficient is stored in a separate cube.
+
+    Raises:
+        ValueError: If a training store is given with a predictor other than
+            "mean".
     """
 
-    from improver.calibration import split_forecasts_and_truth
+    if training_store and predictor != "mean":
+        # Checked before any days are added to or removed from the store.
+        raise ValueError(
+            "A training store can only be used with the ensemble mean as the "
+            f"predictor, not {predictor}."
+        )
+
+    from improver.calibration import (
+        split_forecast_and_truth_files,
+        split_forecasts_and_truth,
+    )
     from improver.calibration.ensemble_calibration import (
         EstimateCoefficientsForEnsembleCalibration,
     )
 
+    if all(isinstance(cube, str) and cube not in cli.SHARED_INPUTS for cube in cubes):
+        # Split the files using their headers, so that historic forecasts and
+        # truths with no validity time in common are not loaded
+        forecast_files, truth_files, mask_file = split_forecast_and_truth_files(
+            cubes, truth_attribute, match_validity_times=True
+        )
+        cubes = forecast_files + truth_files
+        if mask_file:
+            cubes.append(mask_file)
+    cubes = cli.load_inputcubes(cubes)
     forecast, truth, land_sea_mask = split_forecasts_and_truth(cubes, truth_attribute)
 
+    forecast_variance = None
+    if training_store:
+        from improver.calibration.training_store import (
+            append_to_training_store,
+            load_training_store,
+        )
+
+        if max_store_length is None:
+            max_store_length = training_length
+        append_to_training_store(
+            training_store, forecast, truth, max_length=max_store_length
+        )
+        forecast, forecast_variance, truth = load_training_store(
+            training_store, training_length=training_length, historic_forecasts=forecast
+        )
+
     plugin = EstimateCoefficientsForEnsembleCalibration(
         distribution,
         point_by_point=point_by_point,
@@ -129,5 +217,13 @@ def process(
         predictor=predictor,
         tolerance=tolerance,
         max_iterations=max_iterations,
+        max_workers=max_workers,
+        use_gradient=use_gradient,
+    )
+    return plugin(
+        forecast,
+        truth,
+        landsea_mask=land_sea_mask,
+        previous_coefficients=previous_coefficients,
+        forecast_variance=forecast_variance,
     )
-    return plugin(forecast, truth, landsea_mask=land_sea_mask)
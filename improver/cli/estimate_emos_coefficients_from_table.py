@@ -54,6 +54,9 @@ def process(
     predictor="mean",
     tolerance: float = 0.02,
     max_iterations: int = 1000,
+    max_workers: int = 1,
+    use_gradient=False,
+    previous_coefficients: cli.inputcubelist = None,
     percentiles: cli.comma_separated_list = None,
     experiment: str = None,
 ):
@@ -129,6 +132,27 @@ def process(
             is raised. If the predictor is "realizations", then the number of
             iterations may require increasing, as there will be more
             coefficients to solve.
+        max_workers (int):
+            Maximum number of processes minimising points at once, where the
+            coefficients are calculated independently for each point. The
+            points are shared between the processes and the coefficients are
+            returned in the same order regardless.
+        use_gradient (bool):
+            If True, minimise using the BFGS algorithm with the analytic
+            gradient of the CRPS, rather than the Nelder-Mead algorithm. The
+            minimisation terminates once each component of the gradient is
+            within the tolerance. Where coefficients are calculated for each
+            point, all of the points are minimised at once.
+        previous_coefficients (iris.cube.CubeList):
+            EMOS coefficients previously estimated, for example on the
+            previous day, to use as the initial guess for the minimisation
+            where they match the diagnostic, distribution, predictors and
+            points. Where coefficients are calculated for each point, points
+            missing from the previous coefficients use the usual initial
+            guess. The output coefficients then record the number of points
+            initialised from the previous coefficients, the number of points
+            minimised and converged, and the mean number of iterations, as
+            attributes.
         percentiles (List[float]):
             The set of percentiles to be used for estimating EMOS coefficients.
             These should be a set of equally spaced quantiles.
@@ -205,5 +229,12 @@ def process(
         predictor=predictor,
         tolerance=tolerance,
         max_iterations=max_iterations,
+        max_workers=max_workers,
+        use_gradient=use_gradient,
+    )
+    return plugin(
+        forecast_cube,
+        truth_cube,
+        additional_fields=additional_predictors,
+        previous_coefficients=previous_coefficients,
     )
-    return plugin(forecast_cube, truth_cube, additional_fields=additional_predictors)
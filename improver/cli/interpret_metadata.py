@@ -62,11 +62,12 @@ def process(*file_paths: cli.inputpath, verbose=False, failures_only=False):
         display_interpretation,
     )
 
-    cubelists = {file_path: load(file_path.as_posix()) for file_path in file_paths}
-
     any_failures = False
-    for file, cubelist in cubelists.items():
-        for cube in cubelist:
+    for file in file_paths:
+        # Each file is loaded only when it is interpreted, as the
+        # interpreter needs the full cube metadata, such as cell methods and
+        # coordinate bounds, which the file headers do not describe
+        for cube in load(file.as_posix()):
             interpreter = MOMetadataInterpreter()
             try:
                 interpreter.run(cube)
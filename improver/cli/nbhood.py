@@ -39,7 +39,7 @@ from improver.constants import DEFAULT_PERCENTILES
 @cli.with_output
 def process(
     cube: cli.inputcube,
-    mask: cli.inputcube = None,
+    mask: cli.inputancillary = None,
     *,
     neighbourhood_output,
     neighbourhood_shape="square",
@@ -50,6 +50,8 @@ def process(
     area_sum=False,
     percentiles: cli.comma_separated_list = DEFAULT_PERCENTILES,
     halo_radius: float = None,
+    multiple_radii=False,
+    single_precision=False,
 ):
     """Runs neighbourhood processing.
 
@@ -106,6 +108,16 @@ def process(
             where a larger grid was defined than the standard grid and we want
             to clip the grid back to the standard grid. Otherwise no clipping
             is applied.
+        multiple_radii (bool):
+            Include this option to apply the neighbourhood at each of the
+            radii in a single pass, returning a cube with a leading
+            radius_of_neighbourhood dimension. Lead times must not be given.
+            Only applicable for calculating "probabilities" output.
+        single_precision (bool):
+            Include this option to accumulate the neighbourhood totals in
+            32-bit types with compensated summation, which uses less memory.
+            Only applicable for calculating "probabilities" output, as
+            percentiles are not calculated from accumulated totals.
 
     Returns:
         iris.cube.Cube:
@@ -119,10 +131,17 @@ def process(
             neighbourhood_output='percentiles'.
         RuntimeError:
             If degree_as_complex is used with neighbourhood_shape='circular'.
+        RuntimeError:
+            If multiple_radii is used with lead_times or with
+            neighbourhood_output='percentiles'.
+        RuntimeError:
+            If single_precision is used with
+            neighbourhood_output='percentiles'.
     """
     from improver.nbhood import radius_by_lead_time
     from improver.nbhood.nbhood import (
         GeneratePercentilesFromANeighbourhood,
+        MultiRadiusNeighbourhoodProcessing,
         NeighbourhoodProcessing,
     )
     from improver.utilities.pad_spatial import remove_cube_halo
@@ -135,6 +154,11 @@ def process(
             )
         if degrees_as_complex:
             raise RuntimeError("Cannot generate percentiles from complex " "numbers")
+        if single_precision:
+            raise RuntimeError(
+                "single_precision cannot be used with "
+                'neighbourhood_output="percentiles"'
+            )
 
     if neighbourhood_shape == "circular":
         if degrees_as_complex:
@@ -142,13 +166,30 @@ def process(
                 "Cannot process complex numbers with circular neighbourhoods"
             )
 
+    if multiple_radii:
+        if lead_times is not None:
+            raise RuntimeError("multiple_radii cannot be used with lead_times")
+        if neighbourhood_output == "percentiles":
+            raise RuntimeError(
+                "multiple_radii cannot be used with "
+                'neighbourhood_output="percentiles"'
+            )
+
     if degrees_as_complex:
         # convert cube data into complex numbers
         cube.data = WindDirection.deg_to_complex(cube.data)
 
-    radius_or_radii, lead_times = radius_by_lead_time(radii, lead_times)
-
-    if neighbourhood_output == "probabilities":
+    if multiple_radii:
+        result = MultiRadiusNeighbourhoodProcessing(
+            neighbourhood_shape,
+            [float(radius) for radius in radii],
+            weighted_mode=weighted_mode,
+            sum_only=area_sum,
+            re_mask=True,
+            single_precision=single_precision,
+        )(cube, mask_cube=mask)
+    elif neighbourhood_output == "probabilities":
+        radius_or_radii, lead_times = radius_by_lead_time(radii, lead_times)
         result = NeighbourhoodProcessing(
             neighbourhood_shape,
             radius_or_radii,
@@ -156,8 +197,10 @@ def process(
             weighted_mode=weighted_mode,
             sum_only=area_sum,
             re_mask=True,
+            single_precision=single_precision,
         )(cube, mask_cube=mask)
     elif neighbourhood_output == "percentiles":
+        radius_or_radii, lead_times = radius_by_lead_time(radii, lead_times)
         result = GeneratePercentilesFromANeighbourhood(
             radius_or_radii, lead_times=lead_times, percentiles=percentiles,
         )(cube)
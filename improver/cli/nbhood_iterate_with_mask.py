@@ -39,8 +39,8 @@ from improver import cli
 @cli.with_output
 def process(
     cube: cli.inputcube,
-    mask: cli.inputcube,
-    weights: cli.inputcube = None,
+    mask: cli.inputancillary,
+    weights: cli.inputancillary = None,
     *,
     coord_for_masking,
     neighbourhood_shape="square",
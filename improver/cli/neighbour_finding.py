@@ -37,8 +37,8 @@ from improver import cli
 @cli.clizefy
 @cli.with_output
 def process(
-    orography: cli.inputcube,
-    land_sea_mask: cli.inputcube,
+    orography: cli.inputancillary,
+    land_sea_mask: cli.inputancillary,
     site_list: cli.inputjson,
     *,
     all_methods=False,
@@ -76,7 +76,7 @@ def process(
     pressure: cli.inputcube,
     wind_speed: cli.inputcube,
     wind_direction: cli.inputcube,
-    orography: cli.inputcube,
+    orography: cli.inputancillary,
     *,
     boundary_height: float = 1000.0,
     boundary_height_units="m",
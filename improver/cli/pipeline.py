@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Script to run a graph of IMPROVER commands, passing results in memory."""
+
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from improver import cli
+
+
+def load_pipeline(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Load the steps of a pipeline from a JSON or YAML file.
+
+    YAML files, identified by a .yaml or .yml extension, require the
+    optional PyYAML package.
+
+    Args:
+        path:
+            Path to the pipeline definition.
+
+    Returns:
+        Dictionary of step definitions, keyed by step name.
+    """
+    path = Path(path)
+    with open(path) as stream:
+        if path.suffix in (".yaml", ".yml"):
+            import yaml
+
+            definition = yaml.safe_load(stream)
+        else:
+            definition = json.load(stream)
+    return definition["steps"]
+
+
+def _step_references(step: Dict[str, Any]) -> List[str]:
+    """Names of the steps whose results are used as arguments to a step,
+    one entry per use."""
+    references = []
+    for arg in step.get("args", []):
+        if isinstance(arg, dict):
+            if set(arg) != {"step"}:
+                raise ValueError(
+                    f"Argument {arg} must be a reference of the form "
+                    '{"step": "name"}'
+                )
+            references.append(arg["step"])
+    return references
+
+
+def check_pipeline(steps: Dict[str, Dict[str, Any]]) -> Dict[str, Set[str]]:
+    """Check that a pipeline is a valid directed acyclic graph of steps.
+
+    Args:
+        steps:
+            Dictionary of step definitions, keyed by step name.
+
+    Returns:
+        Dictionary of the names of the steps that each step depends on.
+
+    Raises:
+        ValueError: If a step has no command.
+        ValueError: If a step refers to a step that does not exist.
+        ValueError: If there are cyclic dependencies between steps.
+    """
+    dependencies = {}
+    for name, step in steps.items():
+        if "command" not in step:
+            raise ValueError(f"Step {name} does not specify a command")
+        references = set(_step_references(step))
+        unknown = references - set(steps)
+        if unknown:
+            raise ValueError(f"Step {name} refers to unknown steps {sorted(unknown)}")
+        dependencies[name] = references
+
+    resolved = set()
+    remaining = dict(dependencies)
+    while remaining:
+        ready = [name for name, deps in remaining.items() if deps <= resolved]
+        if not ready:
+            raise ValueError(f"Cyclic dependencies between steps {sorted(remaining)}")
+        resolved.update(ready)
+        for name in ready:
+            del remaining[name]
+    return dependencies
+
+
+def _run_step(step: Dict[str, Any], args: List[Any], verbose: bool) -> Any:
+    """Run a single step, saving its result if it declares an output."""
+    argv = [step["command"], *args]
+    if step.get("output"):
+        argv.extend(["--output", str(step["output"]), "--pass-through-output"])
+    result = cli.execute_command(
+        cli.SUBCOMMANDS_DISPATCHER, "improver", *argv, verbose=verbose
+    )
+    return getattr(result, "original_object", result)
+
+
+def run_pipeline(
+    steps: Dict[str, Dict[str, Any]], max_workers: int = 1, verbose: bool = False
+) -> None:
+    """Run a pipeline of commands, passing results between steps in memory.
+
+    Each step is run as soon as all the steps it refers to have completed,
+    with up to max_workers steps running concurrently in threads. Where a
+    result is used by more than one step, all but the last step to be
+    started receive a copy, so that a command modifying its input in place
+    cannot affect another. Results are released once the last step using
+    them has started, and are only written to file for steps that declare
+    an output.
+
+    Args:
+        steps:
+            Dictionary of step definitions, keyed by step name. Each step
+            has a "command" name, a list of "args" in which previous
+            results are referred to by {"step": "name"}, and optionally an
+            "output" file path.
+        max_workers:
+            Maximum number of steps to run concurrently.
+        verbose:
+            Print each command as it is executed.
+    """
+    dependencies = check_pipeline(steps)
+    uses = {name: 0 for name in steps}
+    for step in steps.values():
+        for reference in _step_references(step):
+            uses[reference] += 1
+
+    pending = dict(dependencies)
+    completed = set()
+    results = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [name for name, deps in pending.items() if deps <= completed]
+            for name in ready:
+                del pending[name]
+                args = []
+                for arg in steps[name].get("args", []):
+                    if isinstance(arg, dict):
+                        reference = arg["step"]
+                        uses[reference] -= 1
+                        if uses[reference]:
+                            arg = deepcopy(results[reference])
+                        else:
+                            arg = results.pop(reference)
+                    elif not isinstance(arg, str):
+                        arg = str(arg)
+                    args.append(arg)
+                future = executor.submit(_run_step, steps[name], args, verbose)
+                running[future] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                completed.add(name)
+                if uses[name]:
+                    results[name] = result
+
+
+@cli.clizefy
+def process(pipeline: cli.inputpath, *, max_workers: int = 1, verbose=False):
+    """Run a graph of IMPROVER commands without writing intermediate files.
+
+    The pipeline is defined in a JSON (or YAML) file containing a "steps"
+    dictionary, keyed by step name. Each step gives the "command" to run
+    and a list of its "args" as they would be given on the command line.
+    The result of another step is used as an argument by giving
+    {"step": "name"} in place of a file name. Results are only saved for
+    steps which specify an "output" file. For example::
+
+        {"steps": {
+            "flow": {"command": "nowcast-optical-flow",
+                     "args": ["radar_0.nc", "radar_1.nc", "radar_2.nc"]},
+            "extrapolate": {"command": "nowcast-extrapolate",
+                            "args": ["radar_2.nc", {"step": "flow"}],
+                            "output": "extrapolated.nc"}}}
+
+    Steps which do not depend on one another can be run concurrently.
+
+    Args:
+        pipeline (pathlib.Path):
+            File containing the pipeline definition.
+        max_workers (int):
+            Maximum number of steps to run concurrently.
+        verbose (bool):
+            Print each command as it is executed.
+    """
+    run_pipeline(load_pipeline(pipeline), max_workers=max_workers, verbose=verbose)
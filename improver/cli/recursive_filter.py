@@ -38,7 +38,7 @@ from improver import cli
 @cli.with_output
 def process(
     cube: cli.inputcube,
-    smoothing_coefficients: cli.inputcubelist,
+    smoothing_coefficients: cli.inputancillarylist,
     *,
     iterations: int = 1,
 ):
@@ -38,8 +38,8 @@ from improver import cli
 @cli.with_output
 def process(
     cube: cli.inputcube,
-    target_grid: cli.inputcube,
-    land_sea_mask: cli.inputcube = None,
+    target_grid: cli.inputancillary,
+    land_sea_mask: cli.inputancillary = None,
     *,
     regrid_mode="bilinear",
     extrapolation_mode="nanmask",
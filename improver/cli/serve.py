@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Script to run IMPROVER commands back to back in a persistent worker."""
+
+import json
+import shlex
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from typing import Any, Dict, List, Tuple
+
+from improver import cli
+
+
+def parse_job(line: str, default_id: Any) -> Tuple[Any, List[str]]:
+    """Interpret a single line of input as a job specification.
+
+    A job may be given as a JSON object with an "args" list of command
+    arguments and an optional "id", as a JSON list of command arguments, or
+    as a plain command line which is split following shell quoting rules.
+    The "improver" program name is not included in the arguments.
+
+    Args:
+        line:
+            A single non-empty line of input.
+        default_id:
+            Identifier for the job if none is provided in the specification.
+
+    Returns:
+        - Identifier for the job.
+        - List of command arguments, starting with the command name.
+
+    Raises:
+        ValueError: If the line cannot be interpreted as a job.
+    """
+    job_id = default_id
+    if line.startswith("{"):
+        spec = json.loads(line)
+        job_id = spec.get("id", default_id)
+        argv = spec.get("args")
+    elif line.startswith("["):
+        argv = json.loads(line)
+    else:
+        argv = shlex.split(line)
+    if not isinstance(argv, list) or not argv:
+        raise ValueError(f"Job {job_id} does not specify a list of arguments")
+    argv = [str(arg) for arg in argv]
+    if argv[0] == "serve":
+        raise ValueError(f"Job {job_id} cannot start a nested worker")
+    return job_id, argv
+
+
+def run_job(argv: List[str]) -> Dict[str, Any]:
+    """Run a single IMPROVER command within the current process.
+
+    The command is run through the same entry point as the improver
+    executable, so top level options such as --verbose and --profile are
+    available. Anything the command writes to stdout or stderr is captured,
+    and exceptions are reported in the captured stderr in place of being
+    raised, so that a failing job does not stop the worker.
+
+    Args:
+        argv:
+            Command arguments, starting with the command name.
+
+    Returns:
+        Dictionary containing the exit status of the command, the captured
+        stdout and stderr and the elapsed time in seconds.
+    """
+    from clize.errors import ArgumentError, UserError
+
+    stdout = StringIO()
+    stderr = StringIO()
+    with cli.TimeIt() as timeit, redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            result = cli.main.cli("improver", *argv)
+            if result is not None:
+                print(result)
+            exit_status = 0
+        except ArgumentError as err:
+            print(err, file=sys.stderr)
+            exit_status = 2
+        except UserError as err:
+            print(err, file=sys.stderr)
+            exit_status = 1
+        except SystemExit as err:
+            exit_status = err.code if isinstance(err.code, int) else int(bool(err.code))
+        except Exception:
+            traceback.print_exc()
+            exit_status = 1
+    return {
+        "exit_status": exit_status,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "elapsed": timeit.elapsed,
+    }
+
+
+@cli.clizefy
+def process(jobs: cli.inputpath = None):
+    """Run IMPROVER commands back to back in a single persistent process.
+
+    Keeping one interpreter alive across many short commands avoids paying
+    for the start up and module imports of each command separately.
+
+    Jobs are read one per line, either from the given file or from stdin
+    until it is closed. Each line is either a JSON object of the form
+    {"id": "my-job", "args": ["threshold", "in.nc", "--output", "out.nc", ...]},
+    a JSON list of arguments, or a plain command line without the leading
+    "improver". Blank lines and lines starting with "#" are ignored.
+
+    The result of each job is written to stdout as a single line of JSON
+    containing the job "id", the "exit_status" of the command, the
+    "stdout" and "stderr" it produced and the "elapsed" time in seconds.
+    Jobs are identified by their line number if no id is provided.
+
+    Args:
+        jobs (pathlib.Path):
+            File of job specifications. If not provided, jobs are read from
+            stdin.
+    """
+    stream = open(jobs) if jobs else sys.stdin
+    out = sys.stdout
+    try:
+        for index, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job_id, argv = parse_job(line, index)
+            except ValueError as err:
+                record = {
+                    "id": index,
+                    "exit_status": 2,
+                    "stdout": "",
+                    "stderr": f"{err}\n",
+                    "elapsed": 0.0,
+                }
+            else:
+                record = {"id": job_id, **run_job(argv)}
+            print(json.dumps(record), file=out, flush=True)
+    finally:
+        if jobs:
+            stream.close()
@@ -40,8 +40,8 @@ from improver.constants import DALR, U_DALR
 @cli.with_output
 def process(
     temperature: cli.inputcube,
-    orography: cli.inputcube = None,
-    land_sea_mask: cli.inputcube = None,
+    orography: cli.inputancillary = None,
+    land_sea_mask: cli.inputancillary = None,
     *,
     max_height_diff: float = 35,
     nbhood_radius: int = 7,
@@ -38,7 +38,7 @@ from improver import cli
 @cli.with_output
 def process(
     cube: cli.inputcube,
-    land_sea_mask: cli.inputcube = None,
+    land_sea_mask: cli.inputancillary = None,
     *,
     threshold_values: cli.comma_separated_list = None,
     threshold_config: cli.inputjson = None,
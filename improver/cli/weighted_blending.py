@@ -38,7 +38,7 @@ from improver import cli
 @cli.clizefy
 @cli.with_output
 def process(
-    *cubes: cli.inputcube,
+    *cubes: cli.inputcube_deferred,
     coordinate,
     weighting_method="linear",
     weighting_coord="forecast_period",
@@ -137,6 +137,8 @@ def process(
     """
     from improver.blending.calculate_weights_and_blend import WeightAndBlend
 
+    cubes = cli.load_inputcubes(cubes)
+
     # make the data nonlazy
     if spatial_weights_from_mask:
         for _ in map(lambda cube: getattr(cube, "data"), cubes):
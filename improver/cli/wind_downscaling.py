@@ -39,8 +39,8 @@ from improver import cli
 def process(
     wind_speed: cli.inputcube,
     sigma: cli.inputcube,
-    target_orography: cli.inputcube,
-    standard_orography: cli.inputcube,
+    target_orography: cli.inputancillary,
+    standard_orography: cli.inputancillary,
     silhouette_roughness: cli.inputcube,
     vegetative_roughness: cli.inputcube = None,
     *,
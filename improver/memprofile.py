@@ -40,6 +40,22 @@ from threading import Thread
 from typing import Callable, Tuple
 
 
+def b2mb(max_rss: int) -> float:
+    """Convert a max_rss value from getrusage to MiB.
+
+    Args:
+        max_rss:
+            Maximum resident set size as reported by getrusage.
+
+    Returns:
+        Maximum resident set size in MiB.
+    """
+    if sys.platform == "linux":
+        # linux outputs max_rss in KB not B
+        return max_rss / 1024
+    return max_rss / 1048576
+
+
 def memory_profile_start(outfile_prefix: str) -> Tuple[Thread, Queue]:
     """Starts the memory tracking profiler.
 
@@ -92,10 +108,6 @@ def memory_monitor(queue: Queue, outfile_prefix: str) -> None:
     wait_time = 0.1
 
     fout = open("{}_MAX_TRACKER".format(outfile_prefix), "w")
-    b2mb = 1 / 1048576
-    if sys.platform == "linux":
-        # linux outputs max_rss in KB not B
-        b2mb = 1 / 1024
 
     while True:
         if queue.empty():
@@ -103,7 +115,7 @@ def memory_monitor(queue: Queue, outfile_prefix: str) -> None:
             max_rss = getrusage(RUSAGE_SELF).ru_maxrss
             if max_rss > old_max:
                 snapshot = tracemalloc.take_snapshot()
-                line = "{} max RSS {:.2f} MiB".format(datetime.now(), max_rss * b2mb)
+                line = "{} max RSS {:.2f} MiB".format(datetime.now(), b2mb(max_rss))
                 print(line, file=fout)
                 old_max = max_rss
         else:
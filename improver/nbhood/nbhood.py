@@ -30,13 +30,13 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Module containing neighbourhood processing utilities."""
 
+import warnings
 from typing import List, Optional, Union
 
 import iris
 import numpy as np
 from iris.cube import Cube, CubeList
 from numpy import ndarray
-from scipy.ndimage.filters import correlate
 
 from improver import PostProcessingPlugin
 from improver.constants import DEFAULT_PERCENTILES
@@ -45,11 +45,12 @@ from improver.utilities.cube_checker import (
     check_cube_coordinates,
     find_dimension_coordinate_mismatch,
 )
-from improver.utilities.neighbourhood_tools import boxsum, pad_and_roll
+from improver.utilities.neighbourhood_tools import boxsums, circular_sums, pad_and_roll
 from improver.utilities.spatial import (
     check_if_grid_is_equal_area,
     distance_to_number_of_grid_cells,
 )
+from improver.utilities.streaming import stream_xy_slices, streaming_enabled
 
 
 def check_radius_against_distance(cube: Cube, radius: float) -> None:
@@ -185,7 +186,8 @@ class BaseNeighbourhoodProcessing(PostProcessingPlugin):
                 The unaltered input cube.
         """
 
-        if np.isnan(cube.data).any():
+        # Use the core data so that lazy data is checked one chunk at a time
+        if np.isnan(cube.core_data()).any():
             raise ValueError("Error: NaN detected in input cube data")
 
         if self.lead_times:
@@ -208,6 +210,7 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
         weighted_mode: bool = False,
         sum_only: bool = False,
         re_mask: bool = True,
+        single_precision: bool = False,
     ) -> None:
         """
         Initialise class.
@@ -238,6 +241,11 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            single_precision:
+                If True, accumulate the neighbourhood totals in 32-bit types
+                using compensated summation, rather than in 64-bit types.
+                This halves the size of the working arrays. Weighted
+                circular neighbourhoods are still summed in 64-bit types.
 
         Raises:
             ValueError: If the neighbourhood_method is not either
@@ -261,6 +269,24 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
         self.weighted_mode = weighted_mode
         self.sum_only = sum_only
         self.re_mask = re_mask
+        self.single_precision = single_precision
+
+    def _set_neighbourhood_size(self, cube: Cube) -> None:
+        """
+        Set the size of the square neighbourhood, or the circular kernel,
+        in grid cells of the cube for the radius.
+
+        Args:
+            cube:
+                Cube on an equal area grid to which the neighbourhood
+                processing will be applied.
+        """
+        check_radius_against_distance(cube, self.radius)
+        grid_cells = distance_to_number_of_grid_cells(cube, self.radius)
+        if self.neighbourhood_method == "circular":
+            self.kernel = circular_kernel(grid_cells, self.weighted_mode)
+        elif self.neighbourhood_method == "square":
+            self.nb_size = 2 * grid_cells + 1
 
     def _calculate_neighbourhood(
         self, data: ndarray, mask: ndarray = None
@@ -271,9 +297,14 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
         is masked in the input data array or that corresponds to zeros in the
         input mask.
 
+        The data may have any number of leading dimensions, with each x-y
+        slice in the last two dimensions processed at once. Where every
+        slice has the same mask, the neighbourhood total of valid points is
+        calculated once and reused for all slices.
+
         Args:
             data:
-                Input data array.
+                Input data array, with y and x as its last two dimensions.
             mask:
                 Mask of valid input data elements.
 
@@ -281,9 +312,56 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
             Array containing the smoothed field after the
             neighbourhood method has been applied.
         """
+        if self.neighbourhood_method == "square":
+            size = self.nb_size
+        else:
+            size = self.kernel
+        return self._calculate_neighbourhoods(data, [size], mask)[0]
+
+    def _neighbourhood_sums(
+        self, data: ndarray, sizes: List[Union[int, ndarray]]
+    ) -> List[ndarray]:
+        """Neighbourhood totals for each of a list of square neighbourhood
+        sizes or circular kernels, sharing the cumulative sums of the data."""
+        if self.neighbourhood_method == "square":
+            return boxsums(
+                data, sizes, compensated=self.single_precision, mode="constant"
+            )
+        return circular_sums(
+            data, sizes, compensated=self.single_precision, mode="edge"
+        )
+
+    def _calculate_neighbourhoods(
+        self,
+        data: ndarray,
+        sizes: List[Union[int, ndarray]],
+        mask: Optional[ndarray] = None,
+    ) -> List[Union[ndarray, np.ma.MaskedArray]]:
+        """
+        Apply neighbourhood processing with each of several neighbourhood
+        sizes, as described in _calculate_neighbourhood, in a single pass
+        over the data.
+
+        Args:
+            data:
+                Input data array, with y and x as its last two dimensions.
+            sizes:
+                Sizes of the square neighbourhoods in grid cells, or kernels
+                of the circular neighbourhoods.
+            mask:
+                Mask of valid input data elements.
+
+        Returns:
+            Arrays containing the smoothed field for each neighbourhood size.
+        """
         if not self.sum_only:
-            min_val = np.nanmin(data)
-            max_val = np.nanmax(data)
+            # Range of each x-y slice, used to clip the result.
+            min_val = np.ma.filled(
+                np.nanmin(data, axis=(-2, -1), keepdims=True), np.nan
+            )
+            max_val = np.ma.filled(
+                np.nanmax(data, axis=(-2, -1), keepdims=True), np.nan
+            )
 
         # Data mask to be eventually used for re-masking.
         # (This is OK even if mask is None, it gives a scalar False mask then.)
@@ -293,9 +371,24 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
             # Include data mask if masked array.
             data_mask = data_mask | data.mask
             data = data.data
+        data_mask = np.broadcast_to(data_mask, data.shape)
+        # Leading dimensions over which the mask is only broadcast, such as
+        # where one mask is given for each of several bands of the data.
+        distinct_mask = data_mask[
+            tuple(
+                slice(0, 1) if stride == 0 else slice(None)
+                for stride in data_mask.strides[:-2]
+            )
+        ]
 
         # Working type.
-        if issubclass(data.dtype.type, np.complexfloating):
+        if self.single_precision:
+            # Accumulations use compensated summation for enough precision.
+            if issubclass(data.dtype.type, np.complexfloating):
+                data_dtype = np.complex64
+            else:
+                data_dtype = np.float32
+        elif issubclass(data.dtype.type, np.complexfloating):
             data_dtype = np.complex128
         else:
             # Use 64-bit types for enough precision in accumulations.
@@ -304,42 +397,111 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
 
         # Replace invalid elements with zeros so they don't count towards
         # neighbourhood sum
-        valid_data_mask = np.ones(data.shape, dtype=np.int64)
-        valid_data_mask[data_mask] = 0
         data[data_mask] = 0
         # Calculate neighbourhood totals for input data.
-        if self.neighbourhood_method == "square":
-            data = boxsum(data, self.nb_size, mode="constant")
-        elif self.neighbourhood_method == "circular":
-            data = correlate(data, self.kernel, mode="nearest")
+        totals = self._neighbourhood_sums(data, sizes)
         if not self.sum_only:
-            # Calculate neighbourhood totals for valid mask.
-            if self.neighbourhood_method == "square":
-                area_sum = boxsum(valid_data_mask, self.nb_size, mode="constant")
-            elif self.neighbourhood_method == "circular":
-                area_sum = correlate(
-                    valid_data_mask.astype(np.float32), self.kernel, mode="nearest"
-                )
-
-            with np.errstate(divide="ignore", invalid="ignore"):
-                # Calculate neighbourhood mean.
-                data = data / area_sum
-            # For points where all data in the neighbourhood is masked,
-            # set result to nan
-            data[area_sum == 0] = np.nan
-            data = data.clip(min_val, max_val)
+            # Calculate neighbourhood totals for valid mask, once only where
+            # the mask of every x-y slice is the same, or for each distinct
+            # mask otherwise.
+            slice_mask = data_mask[(0,) * (data.ndim - 2)]
+            if (distinct_mask == slice_mask).all():
+                valid_data_mask = ~slice_mask
+            else:
+                valid_data_mask = ~distinct_mask
+            area_sums = self._neighbourhood_sums(valid_data_mask, sizes)
 
         # Output type.
         if issubclass(data.dtype.type, np.complexfloating):
             data_dtype = np.complex64
         else:
             data_dtype = np.float32
-        data = data.astype(data_dtype)
 
-        if self.re_mask:
-            data = np.ma.masked_array(data, data_mask, copy=False)
+        results = []
+        for index, data in enumerate(totals):
+            if not self.sum_only:
+                area_sum = area_sums[index]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    # Calculate neighbourhood mean.
+                    data = data / area_sum
+                # For points where all data in the neighbourhood is masked,
+                # set result to nan
+                data[np.broadcast_to(area_sum == 0, data.shape)] = np.nan
+                data = data.clip(min_val, max_val)
+
+            data = data.astype(data_dtype)
 
-        return data
+            if self.re_mask:
+                data = np.ma.masked_array(data, data_mask.copy(), copy=False)
+            results.append(data)
+
+        return results
+
+    def process_with_masks(
+        self, cube: Cube, masks: ndarray, weights: Optional[ndarray] = None
+    ) -> Union[ndarray, np.ma.MaskedArray]:
+        """
+        Apply neighbourhood processing to each x-y slice of a cube with each
+        of several masks, optionally taking the weighted mean of the results
+        over the masks.
+
+        The masks are applied to each x-y slice together, so that the
+        neighbourhood totals for every mask are calculated at once, while
+        the slices are processed one at a time, so that the working arrays
+        are only the size of one slice for every mask.
+
+        Args:
+            cube:
+                Cube containing the array to which the neighbourhood
+                processing will be applied, with y and x as its last two
+                dimensions and a single forecast period.
+            masks:
+                Array of masks, with dimensions mask, y and x. Zero values
+                are taken as points to be masked.
+            weights:
+                Weights with the same shape as the masks. If given, the
+                weighted mean of the results over the masks is returned,
+                with the weights renormalised over the masks with a valid
+                result at each point.
+
+        Returns:
+            Array containing the smoothed field for each mask, with
+            dimensions those of the cube with the mask dimension before y
+            and x, or the weighted mean over the masks with the dimensions
+            of the cube where weights are given.
+        """
+        super().process(cube)
+        check_if_grid_is_equal_area(cube)
+        self._set_neighbourhood_size(cube)
+
+        result = None
+        for index in np.ndindex(*cube.shape[:-2]):
+            data = cube.data[index][np.newaxis]
+            if np.ma.isMaskedArray(data):
+                data = np.ma.MaskedArray(
+                    np.broadcast_to(data.data, masks.shape),
+                    mask=np.broadcast_to(np.ma.getmaskarray(data), masks.shape),
+                )
+            else:
+                data = np.broadcast_to(data, masks.shape)
+            slice_result = self._calculate_neighbourhood(data, masks)
+            if weights is not None:
+                # Mask out any NaNs so that their weights are renormalised
+                # over the other masks.
+                slice_result = np.ma.average(
+                    np.ma.masked_invalid(slice_result, copy=False),
+                    axis=0,
+                    weights=weights,
+                ).astype(np.float32)
+                if np.ma.is_masked(slice_result):
+                    slice_result.data[slice_result.mask] = np.nan
+            if result is None:
+                empty = np.ma.empty if np.ma.isMaskedArray(slice_result) else np.empty
+                result = empty(
+                    cube.shape[:-2] + slice_result.shape, dtype=slice_result.dtype
+                )
+            result[index] = slice_result
+        return result
 
     def process(self, cube: Cube, mask_cube: Optional[Cube] = None) -> Cube:
         """
@@ -373,28 +535,142 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
 
         # If the data is masked, the mask will be processed as well as the
         # original_data * mask array.
-        check_radius_against_distance(cube, self.radius)
-
-        grid_cells = distance_to_number_of_grid_cells(cube, self.radius)
-        if self.neighbourhood_method == "circular":
-            self.kernel = circular_kernel(grid_cells, self.weighted_mode)
-        elif self.neighbourhood_method == "square":
-            self.nb_size = 2 * grid_cells + 1
+        self._set_neighbourhood_size(cube)
 
         try:
             mask_cube_data = mask_cube.data
         except AttributeError:
             mask_cube_data = None
 
-        result_slices = CubeList()
-        for cube_slice in cube.slices([cube.coord(axis="y"), cube.coord(axis="x")]):
-            cube_slice.data = self._calculate_neighbourhood(
-                cube_slice.data, mask_cube_data
+        y_dim = cube.coord_dims(cube.coord(axis="y"))
+        x_dim = cube.coord_dims(cube.coord(axis="x"))
+        if streaming_enabled():
+            result = stream_xy_slices(
+                cube,
+                lambda cube_slice: self._calculate_neighbourhood(
+                    cube_slice.data, mask_cube_data
+                ),
+            )
+        elif y_dim + x_dim == (cube.ndim - 2, cube.ndim - 1):
+            # Process all x-y slices at once
+            result = cube.copy(
+                data=self._calculate_neighbourhood(cube.data, mask_cube_data)
             )
-            result_slices.append(cube_slice)
-        neighbourhood_averaged_cube = result_slices.merge_cube()
+        else:
+            result_slices = CubeList()
+            for cube_slice in cube.slices([cube.coord(axis="y"), cube.coord(axis="x")]):
+                cube_slice.data = self._calculate_neighbourhood(
+                    cube_slice.data, mask_cube_data
+                )
+                result_slices.append(cube_slice)
+            return result_slices.merge_cube()
+
+        # As when merging x-y slices, leading dimensions of length one are
+        # returned as scalar coordinates.
+        index = tuple(
+            0 if length == 1 and dim not in y_dim + x_dim else slice(None)
+            for dim, length in enumerate(result.shape)
+        )
+        return result[index] if 0 in index else result
 
-        return neighbourhood_averaged_cube
+
+class MultiRadiusNeighbourhoodProcessing(NeighbourhoodProcessing):
+    """Class for applying neighbourhood processing with each of several radii
+    in a single pass, sharing the cumulative sums of the data between the
+    radii. The results are returned in a single cube with a leading
+    radius_of_neighbourhood dimension."""
+
+    def __init__(
+        self,
+        neighbourhood_method: str,
+        radii: List[float],
+        weighted_mode: bool = False,
+        sum_only: bool = False,
+        re_mask: bool = True,
+        single_precision: bool = False,
+    ) -> None:
+        """
+        Initialise class.
+
+        Args:
+            neighbourhood_method:
+                Name of the neighbourhood method to use. Options: 'circular',
+                'square'.
+            radii:
+                The radii in metres of the neighbourhoods to apply.
+            weighted_mode:
+                If True, use a circle for neighbourhood kernel with
+                weighting decreasing with radius.
+                If False, use a circle with constant weighting.
+            sum_only:
+                If true, return neighbourhood sum instead of mean.
+            re_mask:
+                If re_mask is True, the original un-neighbourhood processed
+                mask is applied to mask out the neighbourhood processed cube.
+            single_precision:
+                If True, accumulate the neighbourhood totals in 32-bit types
+                using compensated summation.
+        """
+        super().__init__(
+            neighbourhood_method,
+            [float(radius) for radius in radii],
+            weighted_mode=weighted_mode,
+            sum_only=sum_only,
+            re_mask=re_mask,
+            single_precision=single_precision,
+        )
+
+    def process(self, cube: Cube, mask_cube: Optional[Cube] = None) -> Cube:
+        """
+        Apply neighbourhood processing with each radius to a cube.
+
+        Args:
+            cube:
+                Cube containing the array to which the neighbourhood processing
+                will be applied.
+            mask_cube:
+                Cube containing the array to be used as a mask. Zero values in
+                this array are taken as points to be masked.
+
+        Returns:
+            Cube containing the smoothed field for each radius, with the
+            radius as its leading dimension.
+        """
+        BaseNeighbourhoodProcessing.process(self, cube)
+        check_if_grid_is_equal_area(cube)
+
+        sizes = []
+        for radius in self.radii:
+            check_radius_against_distance(cube, radius)
+            grid_cells = distance_to_number_of_grid_cells(cube, radius)
+            if self.neighbourhood_method == "circular":
+                sizes.append(circular_kernel(grid_cells, self.weighted_mode))
+            else:
+                sizes.append(2 * grid_cells + 1)
+
+        try:
+            mask_cube_data = mask_cube.data
+        except AttributeError:
+            mask_cube_data = None
+
+        xy_dims = [cube.coord_dims(cube.coord(axis=axis))[0] for axis in ["y", "x"]]
+        data = np.moveaxis(cube.data, xy_dims, [-2, -1])
+        results = self._calculate_neighbourhoods(data, sizes, mask_cube_data)
+
+        radius_cubes = CubeList()
+        for radius, data in zip(self.radii, results):
+            radius_cube = cube.copy(data=np.moveaxis(data, [-2, -1], xy_dims))
+            radius_cube.add_aux_coord(
+                iris.coords.DimCoord(
+                    np.float32(radius), long_name="radius_of_neighbourhood", units="m"
+                )
+            )
+            radius_cubes.append(radius_cube)
+        result = radius_cubes.merge_cube()
+        # Promote the radius coordinate where there is a single radius.
+        if result.coord_dims("radius_of_neighbourhood") == ():
+            result = iris.util.new_axis(result, scalar_coord="radius_of_neighbourhood")
+        return result
 
 
 class GeneratePercentilesFromANeighbourhood(BaseNeighbourhoodProcessing):
@@ -546,14 +822,45 @@ class GeneratePercentilesFromANeighbourhood(BaseNeighbourhoodProcessing):
                      [ 0.5,  0.5,  0.5]]]
         """
         kernel_mask = kernel > 0
-        nb_slices = pad_and_roll(
-            slice_2d.data, kernel.shape, mode="mean", stat_length=max(kernel.shape) // 2
-        )
         percentiles = np.array(self.percentiles, dtype=np.float32)
 
         # Create cube for output percentile data.
         pctcube = self.make_percentile_cube(slice_2d)
 
+        # The fast method requires each row of the kernel to be contiguous,
+        # as it is for a circular kernel.
+        contiguous_rows = all(
+            np.all(np.diff(np.flatnonzero(row)) == 1) for row in kernel_mask
+        )
+        try:
+            import numba
+
+            from improver.nbhood.numba_utilities import fast_neighbourhood_percentiles
+        except ImportError:
+            warnings.warn(
+                "Module numba unavailable. "
+                "GeneratePercentilesFromANeighbourhood will be slower."
+            )
+        else:
+            if contiguous_rows:
+                padded = np.pad(
+                    slice_2d.data,
+                    [(d // 2, d // 2) for d in kernel.shape],
+                    mode="mean",
+                    stat_length=max(kernel.shape) // 2,
+                )
+                pctcube.data[:] = fast_neighbourhood_percentiles(
+                    padded,
+                    kernel_mask,
+                    percentiles.astype(np.float64),
+                    numba.get_num_threads(),
+                ).reshape(pctcube.shape)
+                return iris.util.squeeze(pctcube)
+
+        nb_slices = pad_and_roll(
+            slice_2d.data, kernel.shape, mode="mean", stat_length=max(kernel.shape) // 2
+        )
+
         # Collapse neighbourhood windows into percentiles.
         # (Loop over outer dimension to reduce memory footprint.)
         for nb_chunk, perc_chunk in zip(nb_slices, pctcube.data.swapaxes(0, 1)):
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""
+This module defines the optional numba utilities for neighbourhood
+processing plugins.
+"""
+
+import os
+
+import numpy as np
+from numba import config, njit, prange, set_num_threads
+
+config.THREADING_LAYER = "omp"
+if "OMP_NUM_THREADS" in os.environ:
+    set_num_threads(int(os.environ["OMP_NUM_THREADS"]))
+
+
+@njit
+def _tree_add(tree: np.ndarray, index: int, value: int) -> None:
+    """Add a value to the count at an index (from zero) of a binary indexed
+    tree."""
+    index += 1
+    while index < len(tree):
+        tree[index] += value
+        index += index & -index
+
+
+@njit
+def _tree_kth(tree: np.ndarray, k: int, top_bit: int) -> int:
+    """Index (from zero) of the k-th (from one) counted item in a binary
+    indexed tree."""
+    index = 0
+    bit = top_bit
+    while bit:
+        if index + bit < len(tree) and tree[index + bit] < k:
+            index += bit
+            k -= tree[index]
+        bit >>= 1
+    return index
+
+
+@njit(parallel=True)
+def fast_neighbourhood_percentiles(
+    padded: np.ndarray, kernel_mask: np.ndarray, percentiles: np.ndarray, n_blocks: int
+) -> np.ndarray:
+    """Calculate percentiles of the values in a neighbourhood about each
+    point, equivalent to np.percentile over each window of pad_and_roll.
+
+    Each row of the neighbourhood must be a contiguous run of points, as for
+    a circular kernel. The values of the padded array are ranked once, and
+    the ranks within the neighbourhood are counted in a binary indexed
+    tree. As the neighbourhood slides along a row of the output, only the
+    points at the ends of each of its rows are removed and added, and each
+    percentile is found from the order statistics given by the tree. The
+    cost for each point is therefore proportional to the radius of the
+    neighbourhood, rather than its area, times the logarithm of the size of
+    the array. Rows of the output are processed in parallel in blocks.
+
+    Args:
+        padded:
+            2-D array padded by half the size of the neighbourhood on each
+            side.
+        kernel_mask:
+            2-D boolean array with odd dimensions, True for the points in
+            the neighbourhood.
+        percentiles:
+            Percentiles to calculate, between 0 and 100.
+        n_blocks:
+            Number of blocks of rows to process in parallel. Each block
+            holds a tree of the size of the padded array.
+
+    Returns:
+        Array of shape (len(percentiles), ny, nx), where ny and nx are the
+        dimensions of the unpadded array.
+    """
+    n_y_kernel, n_x_kernel = kernel_mask.shape
+    # First and last point of each row of the neighbourhood, with -1 for
+    # empty rows
+    left = np.full(n_y_kernel, -1, dtype=np.int64)
+    right = np.full(n_y_kernel, -1, dtype=np.int64)
+    n_points = 0
+    for dy in range(n_y_kernel):
+        for dx in range(n_x_kernel):
+            if kernel_mask[dy, dx]:
+                if left[dy] < 0:
+                    left[dy] = dx
+                right[dy] = dx
+                n_points += 1
+    width = padded.shape[1]
+    ny = padded.shape[0] - n_y_kernel + 1
+    nx = width - n_x_kernel + 1
+
+    values = padded.ravel()
+    order = np.argsort(values, kind="mergesort")
+    sorted_values = values[order]
+    ranks = np.empty(len(values), dtype=np.int64)
+    for index in range(len(values)):
+        ranks[order[index]] = index
+    top_bit = 1
+    while top_bit * 2 <= len(values):
+        top_bit *= 2
+
+    result = np.empty((len(percentiles), ny, nx), dtype=np.float32)
+    n_blocks = max(1, min(n_blocks, ny))
+    for block in prange(n_blocks):
+        tree = np.zeros(len(values) + 1, dtype=np.int32)
+        for i in range(block * ny // n_blocks, (block + 1) * ny // n_blocks):
+            for dy in range(n_y_kernel):
+                if left[dy] >= 0:
+                    for dx in range(left[dy], right[dy] + 1):
+                        _tree_add(tree, ranks[(i + dy) * width + dx], 1)
+            for j in range(nx):
+                if j > 0:
+                    for dy in range(n_y_kernel):
+                        if left[dy] >= 0:
+                            row = (i + dy) * width + j
+                            _tree_add(tree, ranks[row + left[dy] - 1], -1)
+                            _tree_add(tree, ranks[row + right[dy]], 1)
+                for p in range(len(percentiles)):
+                    position = percentiles[p] / 100.0 * (n_points - 1)
+                    lower = int(np.floor(position))
+                    fraction = position - lower
+                    value = sorted_values[_tree_kth(tree, lower + 1, top_bit)]
+                    if fraction > 0 and lower + 1 < n_points:
+                        upper = sorted_values[_tree_kth(tree, lower + 2, top_bit)]
+                        value = value + fraction * (upper - value)
+                    result[p, i, j] = value
+            for dy in range(n_y_kernel):
+                if left[dy] >= 0:
+                    for dx in range(left[dy], right[dy] + 1):
+                        _tree_add(tree, ranks[(i + dy) * width + nx - 1 + dx], -1)
+    return result
+
+
+@njit(parallel=True)
+def fast_recursive_filter(
+    grid: np.ndarray,
+    smoothing_coefficients_x: np.ndarray,
+    smoothing_coefficients_y: np.ndarray,
+    iterations: int,
+) -> np.ndarray:
+    """Apply the recursive filter in place, as RecursiveFilter._run_recursion.
+
+    Each iteration runs forwards and backwards along x and then along y.
+    Rows are filtered along x in parallel. Along y, the columns are
+    filtered in parallel in blocks, so that each step reads a contiguous
+    part of a row.
+
+    Args:
+        grid:
+            2-D array with dimensions y and x, to which the filter is applied.
+        smoothing_coefficients_x:
+            Array of smoothing coefficients along x, with one less column
+            than the grid.
+        smoothing_coefficients_y:
+            Array of smoothing coefficients along y, with one less row than
+            the grid.
+        iterations:
+            The number of iterations of the recursive filter.
+
+    Returns:
+        The filtered grid.
+    """
+    ny, nx = grid.shape
+    block_size = 64
+    n_blocks = (nx + block_size - 1) // block_size
+    for _ in range(iterations):
+        for row in prange(ny):
+            for i in range(1, nx):
+                coeff = smoothing_coefficients_x[row, i - 1]
+                grid[row, i] = (1.0 - coeff) * grid[row, i] + coeff * grid[row, i - 1]
+            for i in range(nx - 2, -1, -1):
+                coeff = smoothing_coefficients_x[row, i]
+                grid[row, i] = (1.0 - coeff) * grid[row, i] + coeff * grid[row, i + 1]
+        for block in prange(n_blocks):
+            start = block * block_size
+            stop = min(start + block_size, nx)
+            for i in range(1, ny):
+                for col in range(start, stop):
+                    coeff = smoothing_coefficients_y[i - 1, col]
+                    grid[i, col] = (1.0 - coeff) * grid[i, col] + coeff * grid[
+                        i - 1, col
+                    ]
+            for i in range(ny - 2, -1, -1):
+                for col in range(start, stop):
+                    coeff = smoothing_coefficients_y[i, col]
+                    grid[i, col] = (1.0 - coeff) * grid[i, col] + coeff * grid[
+                        i + 1, col
+                    ]
+    return grid
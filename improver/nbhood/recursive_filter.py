@@ -44,6 +44,7 @@ from improver.generate_ancillaries.generate_orographic_smoothing_coefficients im
 from improver.metadata.constants.time_types import TIME_COORDS
 from improver.utilities.cube_checker import check_cube_coordinates
 from improver.utilities.pad_spatial import pad_cube_with_halo, remove_halo_from_cube
+from improver.utilities.streaming import is_masked, stream_xy_slices, streaming_enabled
 
 
 class RecursiveFilter(PostProcessingPlugin):
@@ -105,30 +106,31 @@ class RecursiveFilter(PostProcessingPlugin):
 
         Args:
             grid:
-                2D array containing the input data to which the recursive
-                filter will be applied.
+                Array containing the input data to which the recursive
+                filter will be applied, with two spatial dimensions last
+                and any number of leading dimensions.
             smoothing_coefficients:
-                Matching 2D array of smoothing_coefficient values that will be
-                used when applying the recursive filter along the specified
-                axis.
+                2D array of smoothing_coefficient values matching the
+                spatial dimensions of the grid, that will be used when
+                applying the recursive filter along the specified axis.
             axis:
                 Index of the spatial axis (0 or 1) over which to recurse.
 
         Returns:
-            2D array containing the smoothed field after the recursive
+            Array containing the smoothed field after the recursive
             filter method has been applied to the input array in the
             forward direction along the specified axis.
         """
-        lim = grid.shape[axis]
+        lim = grid.shape[axis - 2]
         for i in range(1, lim):
             if axis == 0:
-                grid[i, :] = (1.0 - smoothing_coefficients[i - 1, :]) * grid[
-                    i, :
-                ] + smoothing_coefficients[i - 1, :] * grid[i - 1, :]
+                grid[..., i, :] = (1.0 - smoothing_coefficients[i - 1, :]) * grid[
+                    ..., i, :
+                ] + smoothing_coefficients[i - 1, :] * grid[..., i - 1, :]
             if axis == 1:
-                grid[:, i] = (1.0 - smoothing_coefficients[:, i - 1]) * grid[
-                    :, i
-                ] + smoothing_coefficients[:, i - 1] * grid[:, i - 1]
+                grid[..., i] = (1.0 - smoothing_coefficients[:, i - 1]) * grid[
+                    ..., i
+                ] + smoothing_coefficients[:, i - 1] * grid[..., i - 1]
         return grid
 
     @staticmethod
@@ -154,30 +156,85 @@ class RecursiveFilter(PostProcessingPlugin):
 
         Args:
             grid:
-                2D array containing the input data to which the recursive
-                filter will be applied.
+                Array containing the input data to which the recursive
+                filter will be applied, with two spatial dimensions last
+                and any number of leading dimensions.
             smoothing_coefficients:
-                Matching 2D array of smoothing_coefficient values that will be
-                used when applying the recursive filter along the specified
-                axis.
+                2D array of smoothing_coefficient values matching the
+                spatial dimensions of the grid, that will be used when
+                applying the recursive filter along the specified axis.
             axis:
                 Index of the spatial axis (0 or 1) over which to recurse.
 
         Returns:
-            2D array containing the smoothed field after the recursive
+            Array containing the smoothed field after the recursive
             filter method has been applied to the input array in the
             backwards direction along the specified axis.
         """
-        lim = grid.shape[axis]
+        lim = grid.shape[axis - 2]
         for i in range(lim - 2, -1, -1):
             if axis == 0:
-                grid[i, :] = (1.0 - smoothing_coefficients[i, :]) * grid[
-                    i, :
-                ] + smoothing_coefficients[i, :] * grid[i + 1, :]
+                grid[..., i, :] = (1.0 - smoothing_coefficients[i, :]) * grid[
+                    ..., i, :
+                ] + smoothing_coefficients[i, :] * grid[..., i + 1, :]
             if axis == 1:
-                grid[:, i] = (1.0 - smoothing_coefficients[:, i]) * grid[
-                    :, i
-                ] + smoothing_coefficients[:, i] * grid[:, i + 1]
+                grid[..., i] = (1.0 - smoothing_coefficients[:, i]) * grid[
+                    ..., i
+                ] + smoothing_coefficients[:, i] * grid[..., i + 1]
+        return grid
+
+    @staticmethod
+    def _recurse_array(
+        grid: ndarray,
+        smoothing_coefficients_x: ndarray,
+        smoothing_coefficients_y: ndarray,
+        iterations: int,
+    ) -> ndarray:
+        """
+        Method to run the recursive filter on an array in place, using a
+        compiled implementation where numba is available.
+
+        Args:
+            grid:
+                Array containing the input data to which the recursive
+                filter will be applied, with y and x as its last two
+                dimensions. Each x-y slice is filtered with the same
+                smoothing coefficients.
+            smoothing_coefficients_x:
+                2D array of smoothing_coefficient values, with dimensions y
+                and x, that will be used when applying the recursive filter
+                along the x-axis.
+            smoothing_coefficients_y:
+                2D array of smoothing_coefficient values, with dimensions y
+                and x, that will be used when applying the recursive filter
+                along the y-axis.
+            iterations:
+                The number of iterations of the recursive filter
+
+        Returns:
+            The grid, containing the smoothed field.
+        """
+        try:
+            import numba  # noqa: F401
+
+            from improver.nbhood.numba_utilities import fast_recursive_filter
+        except ImportError:
+            warnings.warn("Module numba unavailable. RecursiveFilter will be slower.")
+        else:
+            for index in np.ndindex(grid.shape[:-2]):
+                fast_recursive_filter(
+                    grid[index],
+                    smoothing_coefficients_x,
+                    smoothing_coefficients_y,
+                    iterations,
+                )
+            return grid
+
+        for _ in range(iterations):
+            grid = RecursiveFilter._recurse_forward(grid, smoothing_coefficients_x, 1)
+            grid = RecursiveFilter._recurse_backward(grid, smoothing_coefficients_x, 1)
+            grid = RecursiveFilter._recurse_forward(grid, smoothing_coefficients_y, 0)
+            grid = RecursiveFilter._recurse_backward(grid, smoothing_coefficients_y, 0)
         return grid
 
     @staticmethod
@@ -209,24 +266,17 @@ class RecursiveFilter(PostProcessingPlugin):
             Cube containing the smoothed field after the recursive filter
             method has been applied to the input cube.
         """
-        (x_index,) = cube.coord_dims(cube.coord(axis="x").name())
         (y_index,) = cube.coord_dims(cube.coord(axis="y").name())
-        output = cube.data
-
-        for _ in range(iterations):
-            output = RecursiveFilter._recurse_forward(
-                output, smoothing_coefficients_x.data, x_index
-            )
-            output = RecursiveFilter._recurse_backward(
-                output, smoothing_coefficients_x.data, x_index
-            )
-            output = RecursiveFilter._recurse_forward(
-                output, smoothing_coefficients_y.data, y_index
-            )
-            output = RecursiveFilter._recurse_backward(
-                output, smoothing_coefficients_y.data, y_index
-            )
-            cube.data = output
+        arrays = [
+            np.ma.getdata(cube.data),
+            smoothing_coefficients_x.data,
+            smoothing_coefficients_y.data,
+        ]
+        if y_index != 0:
+            # Filter views of the arrays with y as the first dimension.
+            arrays = [array.T for array in arrays]
+        # The data are filtered in place.
+        RecursiveFilter._recurse_array(*arrays, iterations)
         return cube
 
     def _validate_coefficients(
@@ -363,6 +413,10 @@ class RecursiveFilter(PostProcessingPlugin):
         7. Return the 'new cube' which now contains the recursively filtered
            values for the original input cube.
 
+        Where y and x are the last dimensions of the input cube, all of the
+        x-y slices are instead padded and filtered at once as a single array,
+        without constructing a cube for each slice.
+
         The smoothing_coefficient determines how much "value" of a cell
         undergoing filtering is comprised of the current value at that cell and
         how much comes from the adjacent cell preceding it in the direction in
@@ -393,7 +447,7 @@ class RecursiveFilter(PostProcessingPlugin):
         )
 
         mask_cube = None
-        if np.ma.is_masked(cube.data):
+        if is_masked(cube):
             # Assumes mask is the same for each x-y slice.  This may not be
             # true if there are several time slices in the cube - so throw
             # an error if this is so.
@@ -412,9 +466,8 @@ class RecursiveFilter(PostProcessingPlugin):
             coeffs_x, coeffs_y
         )
 
-        recursed_cube = iris.cube.CubeList()
-        for output in cube.slices([cube.coord(axis="y"), cube.coord(axis="x")]):
-
+        def _filter_slice(output: Cube) -> Cube:
+            """Apply the recursive filter to one x-y slice."""
             padded_cube = pad_cube_with_halo(
                 output, 2 * self.edge_width, 2 * self.edge_width, pad_method="symmetric"
             )
@@ -431,8 +484,31 @@ class RecursiveFilter(PostProcessingPlugin):
 
             if mask_cube is not None:
                 new_cube.data = np.ma.MaskedArray(new_cube.data, mask=mask_cube.data)
+            return new_cube
+
+        if streaming_enabled():
+            return stream_xy_slices(cube, lambda output: _filter_slice(output).data)
+
+        y_dim, x_dim = [cube.coord_dims(cube.coord(axis=axis))[0] for axis in "yx"]
+        if (y_dim, x_dim) == (cube.ndim - 2, cube.ndim - 1):
+            # Filter all x-y slices at once, sharing the padded coefficients.
+            coefficients = []
+            for coeffs in [padded_coefficients_x, padded_coefficients_y]:
+                (y_index,) = coeffs.coord_dims(coeffs.coord(axis="y"))
+                coefficients.append(coeffs.data if y_index == 0 else coeffs.data.T)
+            width = 2 * self.edge_width
+            padding = [(0, 0)] * (cube.ndim - 2) + [(width, width)] * 2
+            data = np.pad(np.ma.getdata(cube.data), padding, mode="symmetric")
+            data = self._recurse_array(data, *coefficients, self.iterations)
+            data = data[..., width:-width, width:-width] if width else data
+            if mask_cube is not None:
+                mask = np.broadcast_to(mask_cube.data, data.shape).copy()
+                data = np.ma.MaskedArray(data, mask=mask)
+            return cube.copy(data=data)
 
-            recursed_cube.append(new_cube)
+        recursed_cube = iris.cube.CubeList()
+        for output in cube.slices([cube.coord(axis="y"), cube.coord(axis="x")]):
+            recursed_cube.append(_filter_slice(output))
 
         new_cube = recursed_cube.merge_cube()
         new_cube = check_cube_coordinates(cube, new_cube)
@@ -38,6 +38,7 @@ import numpy.ma as ma
 from iris.cube import Cube
 
 from improver import PostProcessingPlugin
+from improver.metadata.forecast_times import forecast_period_coord
 from improver.nbhood.nbhood import NeighbourhoodProcessing
 from improver.utilities.cube_checker import (
     check_cube_coordinates,
@@ -218,6 +219,53 @@ class ApplyNeighbourhoodProcessingWithAMask(PostProcessingPlugin):
         result.remove_coord(self.coord_for_masking)
         return result
 
+    def _process_all_bands(
+        self, plugin: NeighbourhoodProcessing, cube: Cube, mask_cube: Cube
+    ) -> Cube:
+        """
+        Apply neighbourhood processing with each mask of the mask_cube to
+        all of the x-y slices of the input cube, using
+        NeighbourhoodProcessing.process_with_masks, collapsing the
+        coord_for_masking if collapse_weights have been provided. The
+        weighted mean over the masks is calculated in the same way as by
+        collapse_mask_coord.
+
+        Args:
+            plugin:
+                Neighbourhood processing plugin to apply.
+            cube:
+                Cube containing the array to which the neighbourhood
+                processing will be applied, with y and x as its last two
+                dimensions and a single forecast period.
+            mask_cube:
+                Cube containing the array to be used as a mask, with
+                dimensions coord_for_masking, y and x.
+
+        Returns:
+            Cube containing the smoothed field, as returned by process.
+        """
+        mask_slices = list(
+            mask_cube.slices([mask_cube.coord(axis="y"), mask_cube.coord(axis="x")])
+        )
+        masks = np.stack([mask_slice.data for mask_slice in mask_slices])
+
+        if self.collapse_weights is not None:
+            result = plugin.process_with_masks(
+                cube, masks, weights=self.collapse_weights.data
+            )
+            return cube.copy(data=result)
+
+        result = plugin.process_with_masks(cube, masks)
+        band_cubes = iris.cube.CubeList()
+        for index, mask_slice in enumerate(mask_slices):
+            band_cube = cube.copy(data=result[..., index, :, :])
+            band_cube.add_aux_coord(mask_slice.coord(self.coord_for_masking).copy())
+            band_cubes.append(iris.util.new_axis(band_cube, self.coord_for_masking))
+        result = band_cubes.concatenate_cube()
+        # Move the coord_for_masking dimension to before y and x.
+        result.transpose(list(range(1, cube.ndim - 1)) + [0, cube.ndim - 1, cube.ndim])
+        return result
+
     def process(self, cube: Cube, mask_cube: Cube) -> Cube:
         """
         Apply neighbourhood processing with a mask to the input cube,
@@ -239,6 +287,11 @@ class ApplyNeighbourhoodProcessingWithAMask(PostProcessingPlugin):
             for each point along the coord_for_masking coordinate.
             The resulting cube is concatenated so that the dimension
             coordinates match the input cube.
+
+        Where y and x are the last dimensions of the input cube, and the
+        same radius applies to every x-y slice, all of the masks and slices
+        are processed by _process_all_bands. Otherwise each
+        slice is processed with each mask in turn.
         """
         plugin = NeighbourhoodProcessing(
             self.neighbourhood_method,
@@ -250,6 +303,17 @@ class ApplyNeighbourhoodProcessingWithAMask(PostProcessingPlugin):
         )
         yname = cube.coord(axis="y").name()
         xname = cube.coord(axis="x").name()
+        xy_last = cube.coord_dims(yname) + cube.coord_dims(xname) == (
+            cube.ndim - 2,
+            cube.ndim - 1,
+        )
+        single_radius = (
+            self.lead_times is None or len(forecast_period_coord(cube).points) == 1
+        )
+        if xy_last and single_radius:
+            # Process every mask with each x-y slice at once.
+            return self._process_all_bands(plugin, cube, mask_cube)
+
         result_slices = iris.cube.CubeList([])
         # Take 2D slices of the input cube for memory issues.
         prev_x_y_slice = None
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Module containing telemetry utilities for recording command statistics
+and instrumenting plugin calls."""
+
+import atexit
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from resource import RUSAGE_SELF, getrusage
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from improver import BasePlugin, register_plugin_hook, unregister_plugin_hook
+from improver.memprofile import b2mb
+
+
+def _flatten(args: Tuple) -> Iterator[Any]:
+    """Flatten nested lists of arguments, as used for bracketed commands."""
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            yield from _flatten(arg)
+        else:
+            yield arg
+
+
+def _output_paths(args: List[Any]) -> List[str]:
+    """Paths given to the --output option of a command and any nested
+    commands."""
+    paths = []
+    for index, arg in enumerate(args):
+        if not isinstance(arg, str):
+            continue
+        if arg.startswith("--output="):
+            paths.append(arg.split("=", 1)[1])
+        elif arg == "--output" and index + 1 < len(args):
+            paths.append(str(args[index + 1]))
+    return paths
+
+
+def _file_bytes(paths: List[Any]) -> int:
+    """Total size in bytes of those of the given paths that are files."""
+    total = 0
+    for path in paths:
+        if isinstance(path, (str, os.PathLike)) and os.path.isfile(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def peak_rss_mib() -> float:
+    """Peak resident set size of the current process in MiB."""
+    return b2mb(getrusage(RUSAGE_SELF).ru_maxrss)
+
+
+class Telemetry:
+    """Accumulates the number and total duration of calls to each plugin
+    class while registered as a plugin hook.
+
+    Durations are inclusive, so time spent in plugins called from within
+    another plugin also counts towards the calling plugin.
+    """
+
+    def __init__(self) -> None:
+        """Initialise with no recorded plugin calls."""
+        self.plugins: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def plugin_hook(
+        self, plugin: BasePlugin, args: Tuple, kwargs: Dict[str, Any]
+    ) -> Iterator[None]:
+        """Plugin hook recording the duration of a single plugin call."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.plugins.setdefault(
+                    type(plugin).__name__, {"calls": 0, "time": 0.0}
+                )
+                entry["calls"] += 1
+                entry["time"] += elapsed
+
+    def __enter__(self) -> "Telemetry":
+        register_plugin_hook(self.plugin_hook)
+        return self
+
+    def __exit__(self, *args) -> None:
+        unregister_plugin_hook(self.plugin_hook)
+
+
+def describe_inputs(args: Tuple, kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Describe the array-like inputs to a plugin call without realising them.
+
+    Cubes and arrays are described directly, and those within lists or
+    tuples (such as a CubeList) are described individually.
+
+    Args:
+        args:
+            Positional arguments of the call.
+        kwargs:
+            Keyword arguments of the call.
+
+    Returns:
+        List of dictionaries giving the argument, the name where the input
+        is a cube, the shape, the dtype and whether the data is lazy.
+    """
+    descriptions = []
+    items = [(str(index), arg) for index, arg in enumerate(args)]
+    items.extend(kwargs.items())
+    for argument, value in items:
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for item in values:
+            if not (hasattr(item, "shape") and hasattr(item, "dtype")):
+                continue
+            description = {
+                "argument": argument,
+                "shape": list(item.shape),
+                "dtype": str(item.dtype),
+                "lazy": bool(getattr(item, "has_lazy_data", lambda: False)()),
+            }
+            if callable(getattr(item, "name", None)):
+                description["name"] = item.name()
+            descriptions.append(description)
+    return descriptions
+
+
+class PluginInstrumentation:
+    """Records every plugin call, including calls nested within other
+    plugins, while registered as a plugin hook.
+
+    Each call is recorded with the stack of plugins it was called from, its
+    inclusive duration, its self duration excluding nested plugin calls and
+    a description of its cube and array inputs. Calls are tracked
+    separately in each thread.
+    """
+
+    def __init__(self) -> None:
+        """Initialise with no recorded plugin calls."""
+        self.calls: List[Dict[str, Any]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def plugin_hook(
+        self, plugin: BasePlugin, args: Tuple, kwargs: Dict[str, Any]
+    ) -> Iterator[None]:
+        """Plugin hook recording a single, possibly nested, plugin call."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        frame = {"plugin": type(plugin).__name__, "nested_time": 0.0}
+        inputs = describe_inputs(args, kwargs)
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            call = {
+                "stack": [parent["plugin"] for parent in stack],
+                "time": elapsed,
+                "self_time": elapsed - frame["nested_time"],
+                "inputs": inputs,
+            }
+            stack.pop()
+            if stack:
+                stack[-1]["nested_time"] += elapsed
+            with self._lock:
+                self.calls.append(call)
+
+    def collapsed_stacks(self) -> Dict[str, int]:
+        """Total self time of each distinct stack of plugin calls.
+
+        Returns:
+            Dictionary of self time in microseconds keyed by the stack of
+            plugin names joined by semicolons, as used by flame graph tools.
+        """
+        stacks = defaultdict(float)
+        for call in self.calls:
+            stacks[";".join(call["stack"])] += call["self_time"]
+        return {stack: int(round(total * 1e6)) for stack, total in stacks.items()}
+
+    def write_collapsed_stacks(self, filename: str) -> None:
+        """Write the collapsed stacks in the format read by flame graph tools,
+        one stack per line followed by its self time in microseconds.
+
+        Args:
+            filename:
+                File to write to.
+        """
+        with open(filename, "w") as fout:
+            for stack, total in sorted(self.collapsed_stacks().items()):
+                print(f"{stack} {total}", file=fout)
+
+    def write_calls(self, filename: str) -> None:
+        """Write each recorded plugin call as a line of JSON.
+
+        Args:
+            filename:
+                File to write to.
+        """
+        with open(filename, "w") as fout:
+            for call in self.calls:
+                print(json.dumps(call), file=fout)
+
+    def __enter__(self) -> "PluginInstrumentation":
+        register_plugin_hook(self.plugin_hook)
+        return self
+
+    def __exit__(self, *args) -> None:
+        unregister_plugin_hook(self.plugin_hook)
+
+
+def instrumentation_hook_enable(outfile_prefix: str) -> PluginInstrumentation:
+    """Start recording all plugin calls and register a hook to write them out
+    at exit.
+
+    Args:
+        outfile_prefix:
+            Prefix for the generated output. 2 files will be generated:
+            \\*_STACKS, containing collapsed stacks for flame graph tools,
+            and \\*_CALLS, containing a line of JSON for each plugin call.
+
+    Returns:
+        The active instrumentation.
+    """
+    instrumentation = PluginInstrumentation().__enter__()
+    atexit.register(instrumentation_stop, instrumentation, outfile_prefix)
+    return instrumentation
+
+
+def instrumentation_stop(
+    instrumentation: PluginInstrumentation, outfile_prefix: str
+) -> None:
+    """Stop recording plugin calls and write out those recorded.
+
+    Args:
+        instrumentation:
+            Active instrumentation instance.
+        outfile_prefix:
+            Prefix for the generated output, as for instrumentation_hook_enable.
+    """
+    instrumentation.__exit__()
+    instrumentation.write_collapsed_stacks(f"{outfile_prefix}_STACKS")
+    instrumentation.write_calls(f"{outfile_prefix}_CALLS")
+
+
+def write_record(record: Dict[str, Any], filename: Optional[str] = None) -> None:
+    """Append a record as a single line of JSON.
+
+    Args:
+        record:
+            Dictionary of JSON serialisable values.
+        filename:
+            File to append the record to. If None, the record is written to
+            stderr.
+    """
+    line = json.dumps(record) + "\n"
+    if filename is None:
+        sys.stderr.write(line)
+    else:
+        with open(filename, "a") as fout:
+            fout.write(line)
+
+
+def telemetry_decorator(func: Callable, filename: Optional[str] = None) -> Callable:
+    """A decorator writing a telemetry record for each call of a command
+    execution function, such as improver.cli.execute_command.
+
+    Each record is a single line of JSON containing the command name, a
+    digest of its arguments, its status ("ok" or the name of the exception
+    raised), wall clock and CPU times in seconds, the peak RSS of the
+    process in MiB, the total bytes of input and output files and, for
+    each plugin class, the number of calls and their total duration in
+    seconds.
+
+    Args:
+        func:
+            Function called with a dispatcher, the program name, the command
+            name and the command arguments.
+        filename:
+            File to append the JSON records to. If None, records are written
+            to stderr.
+
+    Returns:
+        The wrapper
+    """
+
+    def wrapper(dispatcher, prog_name, *args, **kwargs):
+        flat_args = list(_flatten(args))
+        output_paths = _output_paths(flat_args)
+        record = {
+            "command": str(args[0]) if args else None,
+            "args_digest": hashlib.sha256(
+                json.dumps([str(arg) for arg in flat_args]).encode()
+            ).hexdigest(),
+            "status": "ok",
+            "input_bytes": _file_bytes(
+                [arg for arg in flat_args if arg not in output_paths]
+            ),
+        }
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        with Telemetry() as telemetry:
+            try:
+                return func(dispatcher, prog_name, *args, **kwargs)
+            except BaseException as err:
+                record["status"] = type(err).__name__
+                raise
+            finally:
+                record["wall_time"] = time.perf_counter() - wall_start
+                record["cpu_time"] = time.process_time() - cpu_start
+                record["peak_rss_mib"] = peak_rss_mib()
+                record["output_bytes"] = _file_bytes(output_paths)
+                record["plugins"] = telemetry.plugins
+                write_record(record, filename)
+
+    return wrapper
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Module for caching static ancillary cubes between loads."""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+from iris import Constraint
+from iris.cube import Cube, CubeList
+
+from improver.utilities.chunked_store import (
+    decode_cube,
+    encode_cube,
+    load_array,
+    save_array,
+)
+from improver.utilities.load import load_cube
+
+# Default maximum size of the cubes held in memory, in MiB
+DEFAULT_CACHE_SIZE = 1024
+
+# Name of the file holding the metadata of a saved entry
+METADATA_FILENAME = "metadata.json"
+
+
+def _cubes(result: Union[Cube, CubeList]) -> List[Cube]:
+    """Cubes held in a loaded cube or cubelist."""
+    return [result] if isinstance(result, Cube) else list(result)
+
+
+def _held_nbytes(array: np.ndarray) -> int:
+    """Size of an array in bytes, or zero if it is memory-mapped from a
+    file rather than held in memory."""
+    if np.ma.isMaskedArray(array):
+        return _held_nbytes(array.data) + _held_nbytes(np.ma.getmask(array))
+    base = array
+    while isinstance(base, np.ndarray):
+        base = base.base
+    return 0 if isinstance(base, mmap.mmap) else array.nbytes
+
+
+def _nbytes(result: Union[Cube, CubeList]) -> int:
+    """Size of the data of a loaded cube or cubelist held in memory in
+    bytes."""
+    return sum(_held_nbytes(cube.core_data()) for cube in _cubes(result))
+
+
+def _copy(result: Union[Cube, CubeList]) -> Union[Cube, CubeList]:
+    """Copy of a loaded cube or cubelist which can be modified freely."""
+    if isinstance(result, Cube):
+        return result.copy()
+    return CubeList(cube.copy() for cube in result)
+
+
+class AncillaryCache:
+    """Cache of realised cubes loaded from static files, such as land-sea
+    masks, orography and neighbour cubes, which are used repeatedly by a
+    long-running process.
+
+    Entries are keyed by the loader, the file path and its modification time
+    and size, and the constraints applied, so that a file which is replaced
+    is loaded afresh. The least recently used entries are discarded once the
+    total size of the cached data held in memory exceeds the limit. Each load returns a copy
+    of the cached cube, which can be modified without affecting later loads.
+
+    Where a directory is given, the data loaded from each file is also saved
+    there as uncompressed numpy arrays, which are memory-mapped when the file
+    is next loaded by any process, with the metadata of the cubes saved as
+    JSON. Memory-mapped data does not count towards the size limit. Only
+    loads with no constraints or with a
+    name constraint are saved to disk, as other constraints cannot be
+    identified between processes.
+    """
+
+    def __init__(
+        self, max_size: float = DEFAULT_CACHE_SIZE, directory: Optional[str] = None
+    ) -> None:
+        """
+        Args:
+            max_size:
+                Maximum total size of the data held in memory in MiB.
+            directory:
+                Directory in which to save memory-mapped copies of the data.
+                If None, cubes are only cached in memory.
+        """
+        self.max_bytes = int(max_size * 1024 * 1024)
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        """Represent the configured cache as a string."""
+        return "<AncillaryCache: max_size: {} MiB; directory: {}>".format(
+            self.max_bytes / 1024 / 1024, self.directory
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the data held in memory in bytes."""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        """Number of entries held in memory."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Discard all entries held in memory."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _disk_path(self, key: tuple) -> Optional[str]:
+        """Directory holding the saved copy of an entry, if it can be saved."""
+        constraints = key[-1]
+        if self.directory is None or not (
+            constraints is None or isinstance(constraints, str)
+        ):
+            return None
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    @staticmethod
+    def _read(path: str) -> Union[Cube, CubeList]:
+        """Read an entry saved by _write, memory-mapping its data."""
+        with open(os.path.join(path, METADATA_FILENAME)) as stream:
+            metadata = json.load(stream)
+        cubes = [
+            decode_cube(encoded, load_array(os.path.join(path, f"{index}.npy")))
+            for index, encoded in enumerate(metadata["cubes"])
+        ]
+        return CubeList(cubes) if metadata["cubelist"] else cubes[0]
+
+    @staticmethod
+    def _write(result: Union[Cube, CubeList], path: str) -> None:
+        """Save an entry, with the data of each cube in a file holding an
+        uncompressed array.
+
+        Entries with metadata which cannot be represented as JSON are only
+        held in memory.
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=directory)
+        try:
+            metadata = {
+                "cubelist": not isinstance(result, Cube),
+                "cubes": [encode_cube(cube) for cube in _cubes(result)],
+            }
+            for index, cube in enumerate(_cubes(result)):
+                save_array(os.path.join(tmp_path, f"{index}.npy"), cube.data)
+            with open(os.path.join(tmp_path, METADATA_FILENAME), "w") as stream:
+                json.dump(metadata, stream)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError):
+            # Another process saved the same entry first, the directory is
+            # not writable or the metadata are not supported; in each case
+            # the entry is still held in memory.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _store(self, key: tuple, result: Union[Cube, CubeList]) -> None:
+        """Hold an entry in memory, discarding other versions of the same file
+        and the least recently used entries to keep within the size limit."""
+        nbytes = _nbytes(result)
+        with self._lock:
+            for other in [k for k in self._entries if k[:2] == key[:2]]:
+                if other[2:4] != key[2:4]:
+                    self._nbytes -= self._entries.pop(other)[1]
+            if key in self._entries or nbytes > self.max_bytes:
+                return
+            self._entries[key] = (result, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+
+    def load(
+        self,
+        filepath: str,
+        constraints: Optional[Union[Constraint, str]] = None,
+        loader: Callable = load_cube,
+    ) -> Union[Cube, CubeList]:
+        """Load a file, returning a copy of the cached cube where the same
+        file has already been loaded with the same constraints.
+
+        Args:
+            filepath:
+                Path to the file to load.
+            constraints:
+                Constraint to be applied when loading from the file.
+            loader:
+                Function used to load the file, such as load_cube or
+                load_cubelist, called with the file path and constraints.
+
+        Returns:
+            Copy of the cube or cubelist loaded from the file, with its data
+            realised.
+        """
+        path = os.path.realpath(filepath)
+        stat = os.stat(path)
+        key = (
+            f"{loader.__module__}.{loader.__qualname__}",
+            path,
+            stat.st_mtime_ns,
+            stat.st_size,
+            constraints,
+        )
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return _copy(entry[0])
+
+        disk_path = self._disk_path(key)
+        if disk_path is not None and os.path.exists(
+            os.path.join(disk_path, METADATA_FILENAME)
+        ):
+            result = self._read(disk_path)
+        else:
+            result = loader(filepath, constraints=constraints)
+            for cube in _cubes(result):
+                cube.data
+            if disk_path is not None:
+                self._write(result, disk_path)
+        self._store(key, result)
+        return _copy(result)
+
+
+_ANCILLARY_CACHE = None
+
+
+def ancillary_cache() -> AncillaryCache:
+    """Cache shared by all ancillary loads in this process.
+
+    The cache is created on first use, with its size limit in MiB given by
+    the IMPROVER_ANCILLARY_CACHE_SIZE environment variable and its directory
+    given by IMPROVER_ANCILLARY_CACHE_DIR, if set.
+
+    Returns:
+        The shared cache.
+    """
+    global _ANCILLARY_CACHE
+    if _ANCILLARY_CACHE is None:
+        _ANCILLARY_CACHE = AncillaryCache(
+            max_size=float(
+                os.environ.get("IMPROVER_ANCILLARY_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+            ),
+            directory=os.environ.get("IMPROVER_ANCILLARY_CACHE_DIR") or None,
+        )
+    return _ANCILLARY_CACHE
+
+
+def load_ancillary(
+    filepath: str,
+    constraints: Optional[Union[Constraint, str]] = None,
+    loader: Callable = load_cube,
+) -> Union[Cube, CubeList]:
+    """Load a static ancillary file through the shared ancillary cache.
+
+    Args:
+        filepath:
+            Path to the file to load.
+        constraints:
+            Constraint to be applied when loading from the file.
+        loader:
+            Function used to load the file, such as load_cube or
+            load_cubelist.
+
+    Returns:
+        Cube or cubelist loaded from the file, with its data realised.
+    """
+    return ancillary_cache().load(filepath, constraints=constraints, loader=loader)
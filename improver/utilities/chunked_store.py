@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Module for saving cubes to, and loading cubes from, chunked directory
+stores.
+
+A store is a directory, named with the STORE_EXTENSION, holding the
+metadata of each cube and its data as uncompressed numpy arrays, one file
+per chunk. Each chunk holds one index of the leading dimension of the cube,
+for example one realization, so reading part of a cube reads only the
+chunks needed, and chunks can be written by separate processes.
+
+The metadata are saved as JSON, describing the names, units, attributes,
+cell methods and coordinates of each cube. Cell measures, ancillary
+variables and auxiliary factories are not supported.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, Optional, Union
+
+import dask.array as da
+import iris.coord_systems
+import numpy as np
+from cf_units import Unit
+from iris import Constraint
+from iris.coords import AuxCoord, CellMethod, Coord, DimCoord
+from iris.cube import Cube, CubeList
+
+STORE_EXTENSION = ".npystore"
+
+METADATA_FILENAME = "metadata.json"
+
+
+def is_store(filepath: str) -> bool:
+    """Whether a path names a chunked directory store."""
+    return str(filepath).rstrip(os.sep).endswith(STORE_EXTENSION)
+
+
+def _n_chunks(shape: tuple) -> int:
+    """Number of chunks holding the data of a cube of the given shape: one
+    per index of the leading dimension where the cube has more than two
+    dimensions."""
+    return shape[0] if len(shape) > 2 else 1
+
+
+def _chunk_path(path: str, cube_index: int, chunk_index: int) -> str:
+    """Path to the file holding a chunk of the data of a cube."""
+    return os.path.join(path, str(cube_index), f"{chunk_index}.npy")
+
+
+def _mask_path(filepath: str) -> str:
+    """Path to the file holding the mask of an array saved at a path."""
+    return os.path.splitext(filepath)[0] + ".mask.npy"
+
+
+def _encode_array(values: Any) -> Dict[str, Any]:
+    """Represent an array or scalar as JSON, preserving its type."""
+    values = np.asarray(values)
+    return {"dtype": values.dtype.str, "values": values.tolist()}
+
+
+def _decode_array(encoded: Dict[str, Any]) -> Any:
+    """Restore an array or scalar represented by _encode_array."""
+    values = np.array(encoded["values"], dtype=encoded["dtype"])
+    return values[()] if values.ndim == 0 else values
+
+
+def _encode_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """Represent attributes as JSON, keeping strings as they are."""
+    return {
+        key: value if isinstance(value, str) else _encode_array(value)
+        for key, value in attributes.items()
+    }
+
+
+def _decode_attributes(encoded: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore attributes represented by _encode_attributes."""
+    return {
+        key: value if isinstance(value, str) else _decode_array(value)
+        for key, value in encoded.items()
+    }
+
+
+def _encode_units(units: Unit) -> Dict[str, Optional[str]]:
+    """Represent units as JSON."""
+    return {"units": str(units), "calendar": units.calendar}
+
+
+def _encode_coord_system(
+    coord_system: Optional[iris.coord_systems.CoordSystem],
+) -> Optional[Dict[str, Any]]:
+    """Represent a coordinate system as JSON, by its class and parameters."""
+    if coord_system is None:
+        return None
+    parameters = {
+        key: _encode_coord_system(value)
+        if isinstance(value, iris.coord_systems.CoordSystem)
+        else value
+        for key, value in vars(coord_system).items()
+    }
+    return {"class": type(coord_system).__name__, "parameters": parameters}
+
+
+def _decode_coord_system(
+    encoded: Optional[Dict[str, Any]]
+) -> Optional[iris.coord_systems.CoordSystem]:
+    """Restore a coordinate system represented by _encode_coord_system.
+
+    Raises:
+        ValueError: If the class is not an iris coordinate system.
+    """
+    if encoded is None:
+        return None
+    cls = getattr(iris.coord_systems, encoded["class"], None)
+    if not (isinstance(cls, type) and issubclass(cls, iris.coord_systems.CoordSystem)):
+        raise ValueError(f"Unknown coordinate system {encoded['class']}")
+    coord_system = cls.__new__(cls)
+    for key, value in encoded["parameters"].items():
+        if isinstance(value, dict):
+            value = _decode_coord_system(value)
+        setattr(coord_system, key, value)
+    return coord_system
+
+
+def _encode_coord(coord: Coord, dims: tuple, dimension: bool) -> Dict[str, Any]:
+    """Represent a coordinate and the cube dimensions it spans as JSON.
+
+    Args:
+        coord:
+            The coordinate.
+        dims:
+            The cube dimensions spanned by the coordinate.
+        dimension:
+            Whether the coordinate describes a dimension of the cube, rather
+            than being an auxiliary or scalar coordinate, which may still be
+            a DimCoord.
+    """
+    return {
+        "dim_coord": isinstance(coord, DimCoord),
+        "dimension": dimension,
+        "dims": list(dims),
+        "points": _encode_array(coord.points),
+        "bounds": _encode_array(coord.bounds) if coord.has_bounds() else None,
+        "standard_name": coord.standard_name,
+        "long_name": coord.long_name,
+        "var_name": coord.var_name,
+        **_encode_units(coord.units),
+        "attributes": _encode_attributes(coord.attributes),
+        "coord_system": _encode_coord_system(coord.coord_system),
+        "circular": getattr(coord, "circular", False),
+        "climatological": coord.climatological,
+    }
+
+
+def _decode_coord(encoded: Dict[str, Any]) -> Coord:
+    """Restore a coordinate represented by _encode_coord."""
+    kwargs = dict(
+        standard_name=encoded["standard_name"],
+        long_name=encoded["long_name"],
+        var_name=encoded["var_name"],
+        units=Unit(encoded["units"], calendar=encoded["calendar"]),
+        bounds=_decode_array(encoded["bounds"]) if encoded["bounds"] else None,
+        attributes=_decode_attributes(encoded["attributes"]),
+        coord_system=_decode_coord_system(encoded["coord_system"]),
+        climatological=encoded["climatological"],
+    )
+    points = _decode_array(encoded["points"])
+    if encoded["dim_coord"]:
+        return DimCoord(points, circular=encoded["circular"], **kwargs)
+    return AuxCoord(points, **kwargs)
+
+
+def encode_cube(cube: Cube) -> Dict[str, Any]:
+    """Represent the metadata of a cube as JSON.
+
+    Args:
+        cube:
+            Cube whose metadata are to be represented.
+
+    Returns:
+        Dictionary of the metadata which can be serialised as JSON.
+
+    Raises:
+        ValueError: If the cube has cell measures, ancillary variables or
+            auxiliary factories, which are not supported.
+    """
+    if cube.cell_measures() or cube.ancillary_variables() or cube.aux_factories:
+        raise ValueError(
+            "Cubes with cell measures, ancillary variables or auxiliary "
+            "factories cannot be saved to a store."
+        )
+    return {
+        "shape": list(cube.shape),
+        "standard_name": cube.standard_name,
+        "long_name": cube.long_name,
+        "var_name": cube.var_name,
+        **_encode_units(cube.units),
+        "attributes": _encode_attributes(cube.attributes),
+        "cell_methods": [
+            {
+                "method": cell_method.method,
+                "coords": list(cell_method.coord_names),
+                "intervals": list(cell_method.intervals),
+                "comments": list(cell_method.comments),
+            }
+            for cell_method in cube.cell_methods
+        ],
+        "coords": [
+            _encode_coord(coord, cube.coord_dims(coord), dimension)
+            for coords, dimension in ((cube.dim_coords, True), (cube.aux_coords, False))
+            for coord in coords
+        ],
+    }
+
+
+def decode_cube(encoded: Dict[str, Any], data: Union[np.ndarray, da.Array]) -> Cube:
+    """Create a cube with the metadata represented by encode_cube.
+
+    Args:
+        encoded:
+            Metadata returned by encode_cube.
+        data:
+            Data of the cube.
+
+    Returns:
+        The cube.
+    """
+    coords = [
+        (_decode_coord(coord), coord["dims"], coord["dimension"])
+        for coord in encoded["coords"]
+    ]
+    return Cube(
+        data,
+        standard_name=encoded["standard_name"],
+        long_name=encoded["long_name"],
+        var_name=encoded["var_name"],
+        units=Unit(encoded["units"], calendar=encoded["calendar"]),
+        attributes=_decode_attributes(encoded["attributes"]),
+        cell_methods=[
+            CellMethod(**cell_method) for cell_method in encoded["cell_methods"]
+        ],
+        dim_coords_and_dims=[
+            (coord, dims[0]) for coord, dims, dimension in coords if dimension
+        ],
+        aux_coords_and_dims=[
+            (coord, tuple(dims)) for coord, dims, dimension in coords if not dimension
+        ],
+    )
+
+
+def _chunks(cube: Cube) -> Iterator[np.ndarray]:
+    """Data of each chunk of a cube, realising one chunk at a time."""
+    if cube.ndim > 2:
+        for index in range(cube.shape[0]):
+            yield cube[index].data
+    else:
+        yield cube.data
+
+
+def _save_npy(filepath: str, data: np.ndarray) -> None:
+    """Save an array atomically, so that it can be read while other chunks
+    are being written."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix=".npy")
+    with os.fdopen(fd, "wb") as stream:
+        np.save(stream, data)
+    os.replace(tmp_path, filepath)
+
+
+def save_array(filepath: str, data: np.ndarray) -> None:
+    """Save an array as an uncompressed numpy file which can be
+    memory-mapped, with its mask in a separate file if it has masked points.
+    Each file is written atomically.
+
+    Args:
+        filepath:
+            Path to the file, with the extension ".npy".
+        data:
+            Array to save.
+    """
+    _save_npy(filepath, np.ma.getdata(data))
+    mask_path = _mask_path(filepath)
+    if np.ma.is_masked(data):
+        _save_npy(mask_path, np.ma.getmaskarray(data))
+    elif os.path.exists(mask_path):
+        os.remove(mask_path)
+
+
+def load_array(filepath: str) -> np.ndarray:
+    """Memory-map an array saved by save_array, with its mask if saved.
+
+    Args:
+        filepath:
+            Path to the file.
+
+    Returns:
+        The memory-mapped array, which is read-only.
+    """
+    data = np.load(filepath, mmap_mode="r")
+    mask_path = _mask_path(filepath)
+    if os.path.exists(mask_path):
+        return np.ma.masked_array(data, np.load(mask_path, mmap_mode="r"))
+    return data
+
+
+def initialise_store(cubes: Union[Cube, CubeList], path: str) -> None:
+    """Create a store holding the metadata of cubes, into which their data
+    can then be written chunk by chunk using write_chunk, for example by a
+    pool of processes each writing different chunks.
+
+    Args:
+        cubes:
+            Cubes whose metadata are to be stored.
+        path:
+            Path to the store.
+    """
+    if isinstance(cubes, Cube):
+        cubes = CubeList([cubes])
+    metadata = [encode_cube(cube) for cube in cubes]
+    os.makedirs(path, exist_ok=True)
+    for index in range(len(cubes)):
+        os.makedirs(os.path.join(path, str(index)), exist_ok=True)
+    with open(os.path.join(path, METADATA_FILENAME), "w") as stream:
+        json.dump(metadata, stream)
+
+
+def write_chunk(
+    path: str, data: np.ndarray, cube_index: int = 0, chunk_index: int = 0
+) -> None:
+    """Write one chunk of the data of a cube to a store created by
+    initialise_store.
+
+    Args:
+        path:
+            Path to the store.
+        data:
+            Data of the chunk: the data of the cube at one index of its
+            leading dimension, or all of its data if it has two dimensions.
+        cube_index:
+            Index of the cube in the store.
+        chunk_index:
+            Index of the chunk along the leading dimension of the cube.
+    """
+    save_array(_chunk_path(path, cube_index, chunk_index), data)
+
+
+def save_store(cubes: Union[Cube, CubeList], path: str) -> None:
+    """Save cubes to a store, replacing any existing store at the path.
+
+    The store is written to a temporary directory which is then renamed, so
+    that a store is never read part-written.
+
+    Args:
+        cubes:
+            Cubes to save.
+        path:
+            Path to the store.
+    """
+    if isinstance(cubes, Cube):
+        cubes = CubeList([cubes])
+    path = str(path).rstrip(os.sep)
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = tempfile.mkdtemp(dir=directory, suffix=STORE_EXTENSION)
+    try:
+        initialise_store(cubes, tmp_path)
+        for cube_index, cube in enumerate(cubes):
+            for chunk_index, data in enumerate(_chunks(cube)):
+                write_chunk(tmp_path, data, cube_index, chunk_index)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def _load_chunk(filepath: str) -> da.Array:
+    """Lazily load one chunk, memory-mapping its data and mask."""
+    data = load_array(filepath)
+    if np.ma.isMaskedArray(data):
+        return da.ma.masked_array(
+            da.from_array(data.data, chunks=data.shape),
+            da.from_array(data.mask, chunks=data.shape),
+        )
+    return da.from_array(data, chunks=data.shape)
+
+
+def load_store(
+    path: str, constraints: Optional[Union[Constraint, str]] = None
+) -> CubeList:
+    """Load the cubes in a store, with lazy data read from the chunks as
+    needed.
+
+    Args:
+        path:
+            Path to the store.
+        constraints:
+            Constraint to be applied to the cubes in the store.
+
+    Returns:
+        The cubes matching the constraints.
+    """
+    path = str(path).rstrip(os.sep)
+    with open(os.path.join(path, METADATA_FILENAME)) as stream:
+        metadata = json.load(stream)
+    cubes = CubeList()
+    for cube_index, encoded in enumerate(metadata):
+        chunks = [
+            _load_chunk(_chunk_path(path, cube_index, chunk_index))
+            for chunk_index in range(_n_chunks(encoded["shape"]))
+        ]
+        data = da.stack(chunks) if len(encoded["shape"]) > 2 else chunks[0]
+        cubes.append(decode_cube(encoded, data))
+    if constraints is not None:
+        cubes = cubes.extract(constraints)
+    return cubes
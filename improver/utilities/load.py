@@ -30,12 +30,17 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Module for loading cubes."""
 
-from typing import List, Optional, Union
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from math import ceil
+from typing import Callable, List, Optional, Union
 
 import iris
 from iris import Constraint
 from iris.cube import Cube, CubeList
 
+from improver.utilities.chunked_store import is_store, load_store
 from improver.utilities.cube_manipulation import (
     MergeCubes,
     enforce_coordinate_ordering,
@@ -43,10 +48,59 @@ from improver.utilities.cube_manipulation import (
 )
 
 
+def _is_not_prefix_cube(cube: Cube) -> bool:
+    """Whether a cube is other than the legacy metadata prefix cube."""
+    return cube.long_name != "prefixes"
+
+
+def _load_file(
+    filepath: str, constraints: Optional[Union[Constraint, str]] = None
+) -> CubeList:
+    """Load the cubes in a netCDF file, or in a chunked directory store where
+    the path has the store extension."""
+    if is_store(filepath):
+        return load_store(filepath, constraints=constraints)
+    return iris.load(filepath, constraints=constraints)
+
+
+def _map_files(function: Callable, filepaths: List[str], max_workers: int = 1) -> list:
+    """Apply a function to each of a list of files, in a pool of worker
+    processes where more than one worker is allowed.
+
+    Reading the headers of netCDF files and building cubes from them is
+    limited by the global interpreter lock, so threads do not load files
+    any faster than a single thread. Workers are started as new
+    interpreters rather than forked, as the thread pools used by dask and
+    the state of the netCDF libraries in this process cannot safely be
+    inherited.
+
+    Args:
+        function:
+            Function to apply, which must be picklable, as must its
+            arguments and results.
+        filepaths:
+            Files to apply the function to.
+        max_workers:
+            Maximum number of worker processes.
+
+    Returns:
+        Results of the function for each file, in the order given.
+    """
+    max_workers = min(max_workers, len(filepaths))
+    if max_workers <= 1:
+        return [function(item) for item in filepaths]
+    chunksize = ceil(len(filepaths) / (4 * max_workers))
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return list(executor.map(function, filepaths, chunksize=chunksize))
+
+
 def load_cubelist(
     filepath: Union[str, List[str]],
     constraints: Optional[Union[Constraint, str]] = None,
     no_lazy_load: bool = False,
+    max_workers: int = 1,
 ) -> CubeList:
     """Load cubes from filepath(s) into a cubelist. Strips off all
     var names except for "threshold"-type coordinates, where this is different
@@ -64,25 +118,30 @@ def load_cubelist(
             If True, bypass cube deferred (lazy) loading and load the whole
             cube into memory. This can increase performance at the cost of
             memory. If False (default) then lazy load.
+        max_workers:
+            Maximum number of processes loading files at once, where a list
+            of files is given. The cubes are returned in the order of the
+            files regardless. The default is 1, loading one file at a time
+            in this process. Where more than one worker is used, any
+            constraints given must be picklable.
 
     Returns:
         CubeList that has been created from the input filepath given the
         constraints provided.
     """
     # Remove legacy metadata prefix cube if present
-    constraints = (
-        iris.Constraint(cube_func=lambda cube: cube.long_name != "prefixes")
-        & constraints
-    )
+    constraints = iris.Constraint(cube_func=_is_not_prefix_cube) & constraints
 
     # Load each file individually to avoid partial merging (not used
     # iris.load_raw() due to issues with time representation)
     if isinstance(filepath, str):
-        cubes = iris.load(filepath, constraints=constraints)
+        cubes = _load_file(filepath, constraints=constraints)
     else:
         cubes = iris.cube.CubeList([])
-        for item in filepath:
-            cubes.extend(iris.load(item, constraints=constraints))
+        for item_cubes in _map_files(
+            partial(_load_file, constraints=constraints), filepath, max_workers
+        ):
+            cubes.extend(item_cubes)
 
     if not cubes:
         message = "No cubes found using constraints {}".format(constraints)
@@ -145,3 +204,35 @@ def load_cube(
     else:
         cube = MergeCubes()(cubes)
     return cube
+
+
+def load_cubes(
+    filepaths: List[str],
+    constraints: Optional[Union[Constraint, str]] = None,
+    no_lazy_load: bool = False,
+    max_workers: int = 1,
+) -> List[Cube]:
+    """Load each of a list of files into a cube, as load_cube, loading
+    several files at once where more than one worker is allowed.
+
+    Args:
+        filepaths:
+            Filepaths to load, each of which is loaded into a single cube.
+        constraints:
+            Constraint to be applied when loading from each filepath. Where
+            more than one worker is used, this must be picklable.
+        no_lazy_load:
+            If True, bypass cube deferred (lazy) loading and load the whole
+            of each cube into memory.
+        max_workers:
+            Maximum number of processes loading files at once. The default
+            is 1, loading one file at a time in this process.
+
+    Returns:
+        Cube loaded from each filepath, in the order given.
+    """
+    return _map_files(
+        partial(load_cube, constraints=constraints, no_lazy_load=no_lazy_load),
+        filepaths,
+        max_workers,
+    )
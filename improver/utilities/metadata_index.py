@@ -0,0 +1,603 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Module for reading the metadata of netCDF files without loading cubes,
+and for indexing the metadata of the files in a directory."""
+
+import json
+import os
+import tempfile
+from glob import glob
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import netCDF4
+import numpy as np
+
+from improver.utilities.chunked_store import METADATA_FILENAME, is_store
+
+# Variable attributes describing the structure of a file, which iris
+# interprets rather than adding to the attributes of a cube.
+CF_ATTRIBUTES = {
+    "_FillValue",
+    "add_offset",
+    "ancillary_variables",
+    "axis",
+    "bounds",
+    "calendar",
+    "cell_measures",
+    "cell_methods",
+    "climatology",
+    "coordinates",
+    "formula_terms",
+    "grid_mapping",
+    "least_significant_digit",
+    "long_name",
+    "missing_value",
+    "positive",
+    "scale_factor",
+    "standard_name",
+    "units",
+    "valid_max",
+    "valid_min",
+    "valid_range",
+}
+
+# Variable attributes naming other variables
+REFERENCE_ATTRIBUTES = (
+    "ancillary_variables",
+    "bounds",
+    "climatology",
+    "coordinates",
+    "grid_mapping",
+)
+
+INDEX_FILENAME = ".improver_metadata_index.json"
+
+
+def _to_python(value: Any) -> Any:
+    """Convert a netCDF attribute or variable value to plain python types
+    which can be compared and saved as JSON."""
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "S":
+            value = netCDF4.chartostring(value)
+        return np.ma.filled(value).tolist()
+    if isinstance(value, (list, tuple)):
+        return [_to_python(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def _name(variable: Dict) -> str:
+    """Name of a variable as given by iris, from its standard name, long name
+    or variable name."""
+    return (
+        variable.get("standard_name")
+        or variable.get("long_name")
+        or variable.get("var_name")
+        or "unknown"
+    )
+
+
+class CubeHeader:
+    """Metadata of a cube which would be loaded from a netCDF file.
+
+    The header has a name method and attributes dictionary as for a cube, so
+    it can be used in place of a cube where only these are needed to decide
+    which cubes to use.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        var_name: str,
+        standard_name: Optional[str] = None,
+        long_name: Optional[str] = None,
+        units: Optional[str] = None,
+        dims: Tuple[str, ...] = (),
+        shape: Tuple[int, ...] = (),
+        attributes: Optional[Dict[str, Any]] = None,
+        coords: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Args:
+            filepath:
+                Path to the file holding the variable.
+            var_name:
+                Name of the data variable in the file.
+            standard_name:
+                CF standard name of the variable.
+            long_name:
+                Long name of the variable.
+            units:
+                Units of the variable.
+            dims:
+                Names of the dimensions of the variable.
+            shape:
+                Shape of the variable.
+            attributes:
+                Global and variable attributes, as the cube attributes.
+            coords:
+                Metadata of each dimension and auxiliary coordinate, keyed
+                by coordinate name, giving the "var_name", "units",
+                "calendar", "dims" and "points" of each.
+        """
+        self.filepath = filepath
+        self.var_name = var_name
+        self.standard_name = standard_name
+        self.long_name = long_name
+        self.units = units
+        self.dims = tuple(dims)
+        self.shape = tuple(shape)
+        self.attributes = attributes or {}
+        self.coords = coords or {}
+
+    def __repr__(self) -> str:
+        """Represent the header as a string."""
+        return "<CubeHeader: {} ({}) from {}>".format(
+            self.name(), ", ".join(self.dims), self.filepath
+        )
+
+    def name(self) -> str:
+        """Name of the cube, as returned by iris.cube.Cube.name."""
+        return _name(vars(self))
+
+    def coord(self, name: str) -> Dict[str, Any]:
+        """Metadata of the named coordinate.
+
+        Args:
+            name:
+                Name of the coordinate.
+
+        Returns:
+            Metadata of the coordinate.
+
+        Raises:
+            KeyError: If the cube has no such coordinate.
+        """
+        return self.coords[name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Represent the header as a dictionary which can be saved as JSON."""
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, header: Dict[str, Any]) -> "CubeHeader":
+        """Create a header from a dictionary returned by to_dict."""
+        return cls(**header)
+
+
+def read_netcdf_header(filepath: str) -> List[CubeHeader]:
+    """Read the metadata of the cubes in a netCDF file, without reading any
+    data other than the values of coordinates.
+
+    Args:
+        filepath:
+            Path to the netCDF file.
+
+    Returns:
+        Metadata of each data variable in the file, in the order of the
+        file, excluding the legacy metadata prefix variable.
+    """
+    with netCDF4.Dataset(filepath, mode="r") as dataset:
+        dataset.set_auto_mask(False)
+        global_attributes = {
+            key: _to_python(dataset.getncattr(key)) for key in dataset.ncattrs()
+        }
+        variables = {}
+        for var_name, variable in dataset.variables.items():
+            variables[var_name] = {
+                "var_name": var_name,
+                "dims": variable.dimensions,
+                "shape": variable.shape,
+                "attributes": {
+                    key: _to_python(variable.getncattr(key))
+                    for key in variable.ncattrs()
+                },
+            }
+            for key in ("standard_name", "long_name", "units", "calendar"):
+                variables[var_name][key] = variables[var_name]["attributes"].get(key)
+
+        referenced = set(dataset.dimensions)
+        for variable in variables.values():
+            for key in REFERENCE_ATTRIBUTES:
+                referenced.update(str(variable["attributes"].get(key, "")).split())
+
+        headers = []
+        for var_name, variable in variables.items():
+            if var_name in referenced or variable["long_name"] == "prefixes":
+                continue
+            coord_names = [dim for dim in variable["dims"] if dim in variables]
+            coord_names.extend(
+                str(variable["attributes"].get("coordinates", "")).split()
+            )
+            coords = {}
+            for coord_name in coord_names:
+                coord = variables[coord_name]
+                coords[_name(coord)] = {
+                    "var_name": coord_name,
+                    "units": coord["units"],
+                    "calendar": coord["calendar"],
+                    "dims": list(coord["dims"]),
+                    "points": _to_python(dataset.variables[coord_name][:]),
+                }
+            attributes = dict(global_attributes)
+            attributes.update(
+                (key, value)
+                for key, value in variable["attributes"].items()
+                if key not in CF_ATTRIBUTES
+            )
+            attributes.pop("bald__isPrefixedBy", None)
+            headers.append(
+                CubeHeader(
+                    filepath,
+                    var_name,
+                    standard_name=variable["standard_name"],
+                    long_name=variable["long_name"],
+                    units=variable["units"],
+                    dims=variable["dims"],
+                    shape=variable["shape"],
+                    attributes=attributes,
+                    coords=coords,
+                )
+            )
+    return headers
+
+
+def read_store_header(path: str) -> List[CubeHeader]:
+    """Read the metadata of the cubes in a chunked directory store, as
+    read_netcdf_header does for a netCDF file, without reading any data.
+
+    Dimensions are named by the variable names of their dimension
+    coordinates, where they have them.
+
+    Args:
+        path:
+            Path to the store.
+
+    Returns:
+        Metadata of each cube in the store, in the order of the store.
+    """
+    with open(os.path.join(path, METADATA_FILENAME)) as stream:
+        metadata = json.load(stream)
+    headers = []
+    for cube in metadata:
+        dims = [f"dim{index}" for index in range(len(cube["shape"]))]
+        for coord in cube["coords"]:
+            if coord["dimension"]:
+                dims[coord["dims"][0]] = coord["var_name"] or _name(coord)
+        coords = {}
+        for coord in cube["coords"]:
+            points = coord["points"]["values"]
+            if not coord["dims"] and len(points) == 1:
+                points = points[0]
+            coords[_name(coord)] = {
+                "var_name": coord["var_name"],
+                "units": coord["units"],
+                "calendar": coord["calendar"],
+                "dims": [dims[dim] for dim in coord["dims"]],
+                "points": points,
+            }
+        headers.append(
+            CubeHeader(
+                path,
+                cube["var_name"] or _name(cube),
+                standard_name=cube["standard_name"],
+                long_name=cube["long_name"],
+                units=cube["units"],
+                dims=dims,
+                shape=cube["shape"],
+                attributes={
+                    key: value if isinstance(value, str) else value["values"]
+                    for key, value in cube["attributes"].items()
+                },
+                coords=coords,
+            )
+        )
+    return headers
+
+
+def read_header(filepath: str) -> List[CubeHeader]:
+    """Read the metadata of the cubes in a netCDF file or chunked directory
+    store.
+
+    Args:
+        filepath:
+            Path to the netCDF file or store.
+
+    Returns:
+        Metadata of each cube, in the order of the file or store.
+    """
+    if is_store(filepath):
+        return read_store_header(filepath)
+    return read_netcdf_header(filepath)
+
+
+class MetadataIndex:
+    """Index of the metadata of the netCDF files in a directory.
+
+    The index is saved in the directory, or to another given path, and is
+    brought up to date whenever it is used, reading only the headers of
+    files which are new or have been modified since the index was saved.
+    Selecting files from a large archive using the index therefore reads
+    little more than a single file.
+    """
+
+    def __init__(self, directory: str, index_path: Optional[str] = None) -> None:
+        """
+        Args:
+            directory:
+                Directory holding the netCDF files to index.
+            index_path:
+                Path to the saved index. By default this is a file named
+                .improver_metadata_index.json in the directory.
+        """
+        self.directory = directory
+        self.index_path = index_path or os.path.join(directory, INDEX_FILENAME)
+        self._entries = None
+
+    def __repr__(self) -> str:
+        """Represent the index as a string."""
+        return "<MetadataIndex: directory: {}; index_path: {}>".format(
+            self.directory, self.index_path
+        )
+
+    def _read(self) -> Dict[str, Dict]:
+        """Read the saved index, returning an empty index if there is none."""
+        try:
+            with open(self.index_path) as stream:
+                return json.load(stream)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries: Dict[str, Dict]) -> None:
+        """Save the index, ignoring errors where the location is not
+        writable."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.index_path))
+            )
+            with os.fdopen(fd, "w") as stream:
+                json.dump(entries, stream)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _refresh(self, entries: Dict[str, Dict], filenames: List[str]) -> bool:
+        """Read the headers of the named files into the entries of the index
+        where they are not indexed or have been modified since.
+
+        Args:
+            entries:
+                Entries of the index keyed by file name, which are updated.
+            filenames:
+                Names of the files within the directory to refresh.
+
+        Returns:
+            True if the headers of any files were read.
+        """
+        changed = False
+        for filename in filenames:
+            filepath = os.path.join(self.directory, filename)
+            stat = os.stat(filepath)
+            key = [stat.st_mtime_ns, stat.st_size]
+            entry = entries.get(filename)
+            if entry is None or entry["key"] != key:
+                headers = [header.to_dict() for header in read_netcdf_header(filepath)]
+                entries[filename] = {"key": key, "headers": headers}
+                changed = True
+        return changed
+
+    def _headers(self, filename: str) -> List[CubeHeader]:
+        """Headers of an indexed file."""
+        filepath = os.path.join(self.directory, filename)
+        return [
+            CubeHeader.from_dict({**header, "filepath": filepath})
+            for header in self._entries[filename]["headers"]
+        ]
+
+    def headers(self, filepaths: List[str]) -> Dict[str, List[CubeHeader]]:
+        """Metadata of the cubes in each of the given files, which must be
+        within the directory. Only the given files are read, and only where
+        they are not indexed or have been modified since, so that other
+        files in the directory are not read. The index is saved if any
+        files are read.
+
+        Args:
+            filepaths:
+                Paths to netCDF files within the directory.
+
+        Returns:
+            Metadata of the cubes in each file, keyed by the path to the file
+            within the directory.
+        """
+        if self._entries is None:
+            self._entries = self._read()
+        filenames = [os.path.basename(filepath) for filepath in filepaths]
+        entries = dict(self._entries)
+        if self._refresh(entries, filenames):
+            self._write(entries)
+        self._entries = entries
+        return {
+            os.path.join(self.directory, filename): self._headers(filename)
+            for filename in filenames
+        }
+
+    def update(self) -> Dict[str, List[CubeHeader]]:
+        """Bring the index up to date with all of the netCDF files in the
+        directory.
+
+        Returns:
+            Metadata of the cubes in each netCDF file in the directory, keyed
+            by file path.
+        """
+        if self._entries is None:
+            self._entries = self._read()
+        filenames = [
+            os.path.basename(filepath)
+            for filepath in sorted(glob(os.path.join(self.directory, "*.nc")))
+        ]
+        entries = {
+            filename: self._entries[filename]
+            for filename in filenames
+            if filename in self._entries
+        }
+        changed = self._refresh(entries, filenames)
+        if changed or entries.keys() != self._entries.keys():
+            self._write(entries)
+        self._entries = entries
+        return {
+            os.path.join(self.directory, filename): self._headers(filename)
+            for filename in filenames
+        }
+
+    def select(
+        self,
+        name: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        coords: Optional[Dict[str, Union[Any, Callable]]] = None,
+    ) -> List[str]:
+        """Select the files holding a cube with the given metadata.
+
+        Args:
+            name:
+                Name of the cube.
+            attributes:
+                Attributes of the cube and their values.
+            coords:
+                Coordinate names and either a value which must be among the
+                points of the coordinate, or a function which is given the
+                points of the coordinate and returns whether they match.
+
+        Returns:
+            Paths to the matching files, sorted by file name.
+        """
+        return [
+            filepath
+            for filepath, headers in self.update().items()
+            if any(
+                header_matches(header, name, attributes, coords) for header in headers
+            )
+        ]
+
+
+def header_matches(
+    header: CubeHeader,
+    name: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None,
+    coords: Optional[Dict[str, Union[Any, Callable]]] = None,
+) -> bool:
+    """Whether the metadata of a cube match the given metadata.
+
+    Args:
+        header:
+            Metadata of the cube.
+        name:
+            Name of the cube.
+        attributes:
+            Attributes of the cube and their values.
+        coords:
+            Coordinate names and either a value which must be among the
+            points of the coordinate, or a function which is given the
+            points of the coordinate and returns whether they match.
+
+    Returns:
+        True if the cube matches.
+    """
+    if name is not None and header.name() != name:
+        return False
+    for key, value in (attributes or {}).items():
+        if header.attributes.get(key) != value:
+            return False
+    for coord_name, value in (coords or {}).items():
+        if coord_name not in header.coords:
+            return False
+        points = header.coords[coord_name]["points"]
+        points = points if isinstance(points, list) else [points]
+        if callable(value):
+            if not value(points):
+                return False
+        elif value not in points:
+            return False
+    return True
+
+
+def load_headers(
+    filepaths: List[str], use_index: Optional[bool] = None
+) -> List[CubeHeader]:
+    """Read the metadata of the cubes in each of a list of netCDF files or
+    chunked directory stores.
+
+    Only the given files are read. Where an index is used, the headers are
+    taken from the index of the directory holding each file where the file
+    has not changed since it was indexed, and the index is saved with the
+    headers of any files read (see MetadataIndex). Other files in the
+    directories are not read. Stores are never indexed, as their metadata
+    are already held in a single small file.
+
+    Args:
+        filepaths:
+            Paths to the netCDF files or stores.
+        use_index:
+            Whether to use and save the index of the directory holding each
+            file. If not given, the index is used where the
+            IMPROVER_METADATA_INDEX environment variable is set to a
+            non-empty value.
+
+    Returns:
+        Metadata of the cubes in the files, in the order of the files.
+    """
+    if use_index is None:
+        use_index = bool(os.environ.get("IMPROVER_METADATA_INDEX"))
+    if not use_index:
+        return [header for filepath in filepaths for header in read_header(filepath)]
+
+    directories = {}
+    for filepath in filepaths:
+        if is_store(filepath):
+            continue
+        directory = os.path.dirname(os.path.abspath(filepath))
+        directories.setdefault(directory, []).append(filepath)
+    indexed = {}
+    for directory, paths in directories.items():
+        indexed.update(MetadataIndex(directory).headers(paths))
+
+    headers = []
+    for filepath in filepaths:
+        if is_store(filepath):
+            headers.extend(read_store_header(filepath))
+            continue
+        directory = os.path.dirname(os.path.abspath(filepath))
+        for header in indexed[os.path.join(directory, os.path.basename(filepath))]:
+            header.filepath = filepath
+            headers.append(header)
+    return headers
@@ -30,10 +30,14 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Provides tools for neighbourhood generation"""
 
-from typing import Any, Tuple, Union
+from typing import Any, List, Optional, Tuple, Union
 
 import numpy as np
 from numpy import ndarray
+from scipy.ndimage import correlate
+
+# Number of points processed at once by compensated_cumsum
+CUMSUM_BLOCK_SIZE = 2 ** 16
 
 
 def rolling_window(
@@ -235,3 +239,309 @@ def boxsum(
         - data[..., i : i + m, :n]
     )
     return result
+
+
+def _chord_weights(kernel: ndarray) -> Optional[List[Tuple[int, int, float, float]]]:
+    """Describe each row of a kernel as a chord of weights a + b * dx**2,
+    where dx is the offset from the centre of the row.
+
+    Args:
+        kernel:
+            Two-dimensional kernel with odd dimensions.
+
+    Returns:
+        For each row with any non-zero weights, the offset of the row from
+        the centre of the kernel, the half-width of the chord, and a and b.
+        None if any row is not of this form.
+    """
+    centre_y, centre_x = kernel.shape[0] // 2, kernel.shape[1] // 2
+    chords = []
+    for dy, row in enumerate(kernel, start=-centre_y):
+        (nonzero,) = np.nonzero(row)
+        if not nonzero.size:
+            continue
+        width = centre_x - nonzero[0]
+        if width < 0 or nonzero[-1] != centre_x + width:
+            return None
+        a = row[centre_x]
+        b = row[centre_x + 1] - a if width else 0.0
+        offsets = np.arange(-width, width + 1)
+        chord = row[centre_x - width : centre_x + width + 1]
+        if not np.allclose(chord, a + b * offsets ** 2):
+            return None
+        chords.append((dy, width, a, b))
+    return chords
+
+
+def _two_sum_errors(
+    previous: ndarray, total: ndarray, values: ndarray, out: ndarray
+) -> ndarray:
+    """Exact rounding errors of the additions total = previous + values,
+    found from the operands and results alone (Knuth's TwoSum)."""
+    virtual = np.subtract(total, previous)
+    np.subtract(total, virtual, out=out)
+    np.subtract(previous, out, out=out)
+    np.subtract(values, virtual, out=virtual)
+    return np.add(out, virtual, out=out)
+
+
+def compensated_cumsum(data: ndarray, axis: int = -1) -> Tuple[ndarray, ndarray]:
+    """Cumulative sum along an axis with compensated summation, starting
+    from zero.
+
+    The running totals are the cumulative sum in the type of the data. The
+    rounding error of each addition is found exactly from the totals either
+    side of it, and the errors are accumulated in double precision before
+    being stored in the type of the data, so that the sum of the totals and
+    errors is accurate to within a few units of the precision of the data
+    type, whatever the length of the axis. The difference between two
+    points of the cumulative sum, which is the total of the values between
+    them, is accurate where the differences of the totals and of the errors
+    are added together.
+
+    The data are processed in blocks small enough for the intermediate
+    arrays to stay in cache, so that only the two outputs, each the size of
+    the data, are allocated.
+
+    Args:
+        data:
+            The input data array, of a floating point or complex type.
+        axis:
+            The axis along which to accumulate.
+
+    Returns:
+        The running totals and their rounding errors, each with one more
+        point along the axis than the input, the first of which is zero.
+    """
+    axis = axis % data.ndim
+    length = data.shape[axis]
+    outer = int(np.prod(data.shape[:axis], dtype=int))
+    inner = int(np.prod(data.shape[axis + 1 :], dtype=int))
+    shape = list(data.shape)
+    shape[axis] += 1
+    totals = np.zeros(shape, dtype=data.dtype)
+    errors = np.zeros(shape, dtype=data.dtype)
+    error_type = np.promote_types(data.dtype, np.float64)
+
+    # View each array as (outer, axis, inner) and take blocks of both
+    data_3d = data.reshape(outer, length, inner)
+    totals_3d = totals.reshape(outer, length + 1, inner)
+    errors_3d = errors.reshape(outer, length + 1, inner)
+    inner_step = min(inner, max(1, CUMSUM_BLOCK_SIZE // max(length, 1)))
+    outer_step = min(outer, max(1, CUMSUM_BLOCK_SIZE // max(length * inner_step, 1)))
+    for start in range(0, outer, outer_step):
+        for inner_start in range(0, inner, inner_step):
+            block = (
+                slice(start, start + outer_step),
+                slice(None),
+                slice(inner_start, inner_start + inner_step),
+            )
+            values, total = data_3d[block], totals_3d[block]
+            np.cumsum(values, axis=1, out=total[:, 1:])
+            step_errors = _two_sum_errors(
+                total[:, :-1], total[:, 1:], values, np.empty_like(values)
+            )
+            errors_3d[block][:, 1:] = np.cumsum(step_errors, axis=1, dtype=error_type)
+    return totals, errors
+
+
+def _compensated_window_sums(
+    data: ndarray, half_widths: List[int], pad: int, axis: int
+) -> List[ndarray]:
+    """Totals of windows of 2 * half_width + 1 points centred on each point
+    along an axis of an array padded by pad points at each end, calculated
+    from the compensated cumulative sum."""
+    totals, errors = compensated_cumsum(data, axis)
+    length = data.shape[axis] - 2 * pad
+    results = []
+    for half_width in half_widths:
+        start = [slice(None)] * data.ndim
+        stop = [slice(None)] * data.ndim
+        start[axis] = slice(pad - half_width, pad - half_width + length)
+        stop[axis] = slice(pad + half_width + 1, pad + half_width + 1 + length)
+        start, stop = tuple(start), tuple(stop)
+        results.append((totals[stop] - totals[start]) + (errors[stop] - errors[start]))
+    return results
+
+
+def _compensated_type(data: ndarray) -> ndarray:
+    """Data to be accumulated with compensated summation, as float32 where
+    the data are not of a floating point or complex type."""
+    if issubclass(data.dtype.type, np.inexact):
+        return data
+    return data.astype(np.float32)
+
+
+def boxsums(
+    data: ndarray, boxsizes: List[int], compensated: bool = False, **pad_options: Any
+) -> List[ndarray]:
+    """Neighbourhood totals for several sizes of square neighbourhood, as
+    calculated by `boxsum`, from a single summed-area table.
+
+    The data are padded once for the largest neighbourhood and accumulated.
+    Any part of a summed-area table can be used to calculate the totals
+    within it, so the totals for smaller neighbourhoods are taken from the
+    table with the excess padding cropped from each edge.
+
+    Where compensated summation is used, the data are instead accumulated
+    along x and then y in turn, keeping the type of the data, so that the
+    running totals are no larger than the total of a row or column. This
+    allows 32-bit data to be summed without converting it to 64-bit types,
+    with similar accuracy.
+
+    Args:
+        data:
+            The input data array.
+        boxsizes:
+            The sizes of the neighbourhoods. Each must be an odd integer.
+        compensated:
+            If True, accumulate the data in its own type, or float32 for
+            boolean or integer data, using `compensated_cumsum`.
+        pad_options:
+            Additional keyword arguments passed to `numpy.pad` function.
+
+    Returns:
+        Arrays of the same shape as the input containing the neighbourhood
+        totals for each size, in the order given.
+    """
+    max_half = max(boxsizes) // 2
+    if compensated:
+        padding = [(0, 0)] * (data.ndim - 2) + [(max_half, max_half)] * 2
+        padded = _compensated_type(np.pad(data, padding, **pad_options))
+        row_totals = _compensated_window_sums(
+            padded, [boxsize // 2 for boxsize in boxsizes], max_half, -1
+        )
+        return [
+            _compensated_window_sums(totals, [boxsize // 2], max_half, -2)[0]
+            for totals, boxsize in zip(row_totals, boxsizes)
+        ]
+    table = pad_boxsum(data, 2 * max_half + 1, **pad_options)
+    table = table.cumsum(-2).cumsum(-1)
+    results = []
+    for boxsize in boxsizes:
+        crop = max_half - boxsize // 2
+        cropped = table[
+            ..., crop : table.shape[-2] - crop, crop : table.shape[-1] - crop
+        ]
+        results.append(boxsum(cropped, boxsize, cumsum=False))
+    return results
+
+
+def circular_sums(
+    data: ndarray, kernels: List[ndarray], compensated: bool = False, **pad_options: Any
+) -> List[ndarray]:
+    """Fast calculation of neighbourhood totals weighted by circular
+    kernels, as produced by `improver.nbhood.nbhood.circular_kernel`.
+
+    Each row of a circular kernel is a chord of the circle, along which the
+    weights are either constant or, for a weighted kernel, fall off with the
+    square of the distance from the centre of the row. The total along each
+    chord is found from running sums along the x axis of the data (and of
+    the data multiplied by the column index and its square), so the cost
+    for each point is proportional to the radius of the kernel rather than
+    its area. The running sums are calculated once and shared by all of the
+    kernels. The results match `scipy.ndimage.correlate` to within floating
+    point tolerance. Kernels of any other form fall back to
+    `scipy.ndimage.correlate`.
+
+    Where compensated summation is used and none of the kernels are
+    weighted, the running sums keep the type of the data, allowing 32-bit
+    data to be summed without converting it to 64-bit types. Weighted
+    kernels are always summed in 64-bit types, as the totals along each
+    chord are found from the differences of large moments.
+
+    Args:
+        data:
+            The input data array, whose last two dimensions are y and x.
+        kernels:
+            Two-dimensional kernels with odd dimensions.
+        compensated:
+            If True, accumulate the data in its own type, or float32 for
+            boolean or integer data, using `compensated_cumsum`.
+        pad_options:
+            Additional keyword arguments passed to `numpy.pad` function, eg.
+            mode="edge", which matches mode="nearest" in
+            `scipy.ndimage.correlate`.
+
+    Returns:
+        Arrays of the same shape as the input containing the weighted
+        neighbourhood totals for each kernel, in the order given.
+    """
+    all_chords = [_chord_weights(kernel) for kernel in kernels]
+    chord_kernels = [
+        kernel for kernel, chords in zip(kernels, all_chords) if chords is not None
+    ]
+    results = []
+    if chord_kernels:
+        pad_y = max(kernel.shape[0] // 2 for kernel in chord_kernels)
+        pad_x = max(kernel.shape[1] // 2 for kernel in chord_kernels)
+        pad_extent = [(0, 0)] * (data.ndim - 2) + [(pad_y,) * 2, (pad_x,) * 2]
+        padded = np.pad(data, pad_extent, **pad_options)
+        weighted = any(b for chords in all_chords if chords for _, _, _, b in chords)
+        compensated = compensated and not weighted
+        if compensated:
+            padded = _compensated_type(padded)
+        elif not issubclass(padded.dtype.type, np.complexfloating):
+            padded = padded.astype(np.float64)
+        ny, nx = data.shape[-2:]
+
+        def running_sum(values: ndarray) -> ndarray:
+            """Running sum along the x axis, starting from zero."""
+            summed = np.zeros(values.shape[:-1] + (values.shape[-1] + 1,), values.dtype)
+            np.cumsum(values, axis=-1, out=summed[..., 1:])
+            return summed
+
+        if compensated:
+            # Running totals followed by their rounding errors
+            sums = list(compensated_cumsum(padded, axis=-1))
+        else:
+            sums = [running_sum(padded)]
+        if weighted:
+            columns = np.arange(padded.shape[-1], dtype=np.float64)
+            sums.append(running_sum(padded * columns))
+            sums.append(running_sum(padded * columns ** 2))
+            centres = np.arange(pad_x, pad_x + nx, dtype=np.float64)
+
+    for kernel, chords in zip(kernels, all_chords):
+        if chords is None:
+            mode = {"edge": "nearest"}.get(pad_options.get("mode"), "constant")
+            full_kernel = kernel.reshape((1,) * (data.ndim - 2) + kernel.shape)
+            results.append(correlate(data, full_kernel, mode=mode))
+            continue
+        result = np.zeros(data.shape, dtype=padded.dtype)
+        for dy, width, a, b in chords:
+            rows = slice(pad_y + dy, pad_y + dy + ny)
+            start = slice(pad_x - width, pad_x - width + nx)
+            stop = slice(pad_x + width + 1, pad_x + width + 1 + nx)
+            totals = [
+                summed[..., rows, stop] - summed[..., rows, start] for summed in sums
+            ]
+            if compensated:
+                totals = [totals[0] + totals[1]]
+            result += result.dtype.type(a) * totals[0]
+            if b:
+                # Sum of (column - centre)**2 * data along the chord
+                result += b * (
+                    totals[2] - 2 * centres * totals[1] + centres ** 2 * totals[0]
+                )
+        results.append(result)
+    return results
+
+
+def circular_sum(data: ndarray, kernel: ndarray, **pad_options: Any) -> ndarray:
+    """Fast calculation of neighbourhood totals weighted by a circular
+    kernel. See `circular_sums`.
+
+    Args:
+        data:
+            The input data array, whose last two dimensions are y and x.
+        kernel:
+            Two-dimensional kernel with odd dimensions.
+        pad_options:
+            Additional keyword arguments passed to `numpy.pad` function.
+
+    Returns:
+        Array of the same shape as the input containing the weighted
+        neighbourhood totals.
+    """
+    return circular_sums(data, [kernel], **pad_options)[0]
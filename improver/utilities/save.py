@@ -32,13 +32,35 @@
 
 import os
 import warnings
-from typing import Optional, Union
+from typing import Dict, Optional, Tuple, Union
 
 import cf_units
 import iris
 from iris.cube import Cube, CubeList
 
 from improver.metadata.check_datatypes import check_mandatory_standards
+from improver.utilities.chunked_store import is_store, save_store
+
+# Named combinations of chunking, compression and shuffle for saving files.
+# The "default" profile is used unless another is named in the call to
+# save_netcdf or in the IMPROVER_SAVE_PROFILE environment variable.
+SAVE_PROFILES = {
+    # One chunk per x-y slice, lightly compressed
+    "default": {"chunking": "slice", "compression_level": 1, "shuffle": True},
+    # Uncompressed, for intermediate files which are read once
+    "scratch": {"chunking": "slice", "compression_level": 0, "shuffle": False},
+    # Small x-y tiles, so reading a few sites reads little of the file
+    "spot": {"chunking": "tile", "compression_level": 1, "shuffle": True},
+    # Tiles holding all of the leading dimensions, eg. every realization
+    "column": {"chunking": "column", "compression_level": 1, "shuffle": True},
+    # One chunk per x-y slice, more heavily compressed for long term storage
+    "archive": {"chunking": "slice", "compression_level": 6, "shuffle": True},
+}
+
+CHUNKING_STRATEGIES = ("slice", "tile", "column", "none")
+
+# Length of the x and y sides of the chunks for tile and column chunking
+TILE_SIZE = 64
 
 
 def _order_cell_methods(cube: Cube) -> None:
@@ -76,11 +98,101 @@ def _check_metadata(cube: Cube) -> None:
         raise ValueError("{} has unknown units".format(cube.name()))
 
 
+def _get_save_profile(profile: Optional[str] = None) -> Dict:
+    """
+    Gets the settings of a named save profile.
+
+    Args:
+        profile:
+            Name of the profile. If not given, this is taken from the
+            IMPROVER_SAVE_PROFILE environment variable, or is "default".
+
+    Returns:
+        The chunking, compression level and shuffle of the profile.
+
+    Raises:
+        ValueError: if the profile is not known.
+    """
+    if profile is None:
+        profile = os.environ.get("IMPROVER_SAVE_PROFILE") or "default"
+    try:
+        return SAVE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            "Unknown save profile {}, expected one of {}".format(
+                profile, ", ".join(SAVE_PROFILES)
+            )
+        )
+
+
+def _chunksizes(
+    cubelist: CubeList, chunking: str, tile_size: Optional[int] = None
+) -> Optional[Tuple[int, ...]]:
+    """
+    Calculates the netCDF chunk sizes to save a list of cubes with.
+
+    Args:
+        cubelist:
+            Cubes to be saved.
+        chunking:
+            The chunking strategy. "slice" gives one chunk per x-y slice (eg.
+            1, 1, 970, 1042), "tile" gives chunks of up to tile_size by
+            tile_size points within each x-y slice (eg. 1, 1, 64, 64),
+            "column" gives tiles holding the whole of the leading dimensions
+            (eg. 12, 3, 64, 64), and "none" leaves the chunking to the netCDF
+            library.
+        tile_size:
+            Length of the x and y sides of the tile and column chunks, by
+            default TILE_SIZE.
+
+    Returns:
+        The chunk sizes, or None if these are not set.
+
+    Raises:
+        ValueError: if the chunking strategy is not known.
+        warning if cubelist contains cubes of varying dimensions.
+    """
+    if chunking not in CHUNKING_STRATEGIES:
+        raise ValueError(
+            "Unknown chunking {}, expected one of {}".format(
+                chunking, ", ".join(CHUNKING_STRATEGIES)
+            )
+        )
+    if chunking == "none":
+        return None
+
+    # Column chunks span the leading dimensions, so all cubes must have the
+    # same shape. Other chunk sizes are taken from the x-y slice of the first
+    # cube, with the cubes only compared on their first two dimensions.
+    if chunking == "column":
+        shapes = {cube.shape for cube in cubelist}
+    else:
+        shapes = {cube.shape[:2] for cube in cubelist}
+    if len(shapes) != 1:
+        msg = "Chunksize not set as cubelist " "contains cubes of varying dimensions"
+        warnings.warn(msg)
+        return None
+
+    cube = cubelist[0]
+    if cube.ndim < 2:
+        return None
+    xy_chunksizes = [cube.shape[-2], cube.shape[-1]]
+    if chunking in ("tile", "column"):
+        tile_size = tile_size or TILE_SIZE
+        xy_chunksizes = [min(size, tile_size) for size in xy_chunksizes]
+    if chunking == "column":
+        return tuple(list(cube.shape[:-2]) + xy_chunksizes)
+    return tuple([1] * (cube.ndim - 2) + xy_chunksizes)
+
+
 def save_netcdf(
     cubelist: Union[Cube, CubeList],
     filename: str,
-    compression_level: int = 1,
+    compression_level: Optional[int] = None,
     least_significant_digit: Optional[int] = None,
+    profile: Optional[str] = None,
+    chunking: Optional[str] = None,
+    shuffle: Optional[bool] = None,
 ) -> None:
     """Save the input Cube or CubeList as a NetCDF file and check metadata
     where required for integrity.
@@ -89,14 +201,19 @@ def save_netcdf(
     local_keys to record non-global attributes as data attributes rather than
     global attributes.
 
+    Where the filename has the extension of a chunked directory store (see
+    improver.utilities.chunked_store), the cubes are instead saved to a
+    store, and the chunking and compression options are not used.
+
     Args:
         cubelist:
             Cube or list of cubes to be saved
         filename:
             Filename to save input cube(s)
         compression_level:
-            1-9 to specify compression level, or 0 to not compress (default compress
-            with complevel 1)
+            1-9 to specify compression level, or 0 to not compress (default is
+            given by the save profile, which compresses with complevel 1 unless
+            another profile is used)
         least_significant_digit:
             If specified will truncate the data to a precision given by
             10**(-least_significant_digit), e.g. if least_significant_digit=2, then the data will
@@ -104,10 +221,29 @@ def save_netcdf(
             http://www.esrl.noaa.gov/psd/data/gridded/conventions/cdc_netcdf_standard.shtml
             for details. When used with `compression level`, this will result in lossy
             compression.
+        profile:
+            Name of the save profile in SAVE_PROFILES giving the chunking,
+            compression level and shuffle used where these are not given.
+            By default this is taken from the IMPROVER_SAVE_PROFILE
+            environment variable, or is "default".
+        chunking:
+            Chunking strategy, one of "slice", "tile", "column" or "none".
+            See _chunksizes for details.
+        shuffle:
+            Whether to apply the byte shuffle filter before compressing.
 
     Raises:
+        ValueError: if the save profile or chunking strategy is not known.
         warning if cubelist contains cubes of varying dimensions.
     """
+    settings = _get_save_profile(profile)
+    if compression_level is None:
+        compression_level = settings["compression_level"]
+    if chunking is None:
+        chunking = settings["chunking"]
+    if shuffle is None:
+        shuffle = settings["shuffle"]
+
     if isinstance(cubelist, iris.cube.Cube):
         cubelist = iris.cube.CubeList([cubelist])
     elif not isinstance(cubelist, iris.cube.CubeList):
@@ -122,17 +258,11 @@ def save_netcdf(
         # attribute if present.
         cube.attributes.pop("least_significant_digit", None)
 
-    # If all xy slices are the same shape, use this to determine
-    # the chunksize for the netCDF (eg. 1, 1, 970, 1042)
-    chunksizes = None
-    if len({cube.shape[:2] for cube in cubelist}) == 1:
-        cube = cubelist[0]
-        if cube.ndim >= 2:
-            xy_chunksizes = [cube.shape[-2], cube.shape[-1]]
-            chunksizes = tuple([1] * (cube.ndim - 2) + xy_chunksizes)
-    else:
-        msg = "Chunksize not set as cubelist " "contains cubes of varying dimensions"
-        warnings.warn(msg)
+    if is_store(filename):
+        save_store(cubelist, filename)
+        return
+
+    chunksizes = _chunksizes(cubelist, chunking)
 
     global_keys = [
         "title",
@@ -143,7 +273,9 @@ def save_netcdf(
         "institution",
         "history",
     ]
-    global_keys.extend([key for key in cube.attributes.keys() if "mosg__" in key])
+    global_keys.extend(
+        [key for key in cubelist[0].attributes.keys() if "mosg__" in key]
+    )
 
     local_keys = {
         key
@@ -164,7 +296,7 @@ def save_netcdf(
         ftmp,
         local_keys=local_keys,
         complevel=compression_level,
-        shuffle=True,
+        shuffle=shuffle,
         zlib=compression_level > 0,
         chunksizes=chunksizes,
         least_significant_digit=least_significant_digit,
@@ -48,6 +48,7 @@ from improver import BasePlugin, PostProcessingPlugin
 from improver.metadata.constants.attributes import MANDATORY_ATTRIBUTE_DEFAULTS
 from improver.metadata.utilities import create_new_diagnostic_cube
 from improver.utilities.cube_checker import check_cube_coordinates, spatial_coords_match
+from improver.utilities.streaming import stream_xy_slices, streaming_enabled
 
 
 def check_if_grid_is_equal_area(
@@ -509,10 +510,15 @@ class OccurrenceWithinVicinity(PostProcessingPlugin):
             raise ValueError(
                 "Supplied cube do not have the same spatial coordinates and land mask"
             )
-        max_cubes = CubeList([])
-        for cube_slice in cube.slices([cube.coord(axis="y"), cube.coord(axis="x")]):
-            max_cubes.append(self.maximum_within_vicinity(cube_slice))
-        result_cube = max_cubes.merge_cube()
+        if streaming_enabled():
+            result_cube = stream_xy_slices(
+                cube, lambda cube_slice: self.maximum_within_vicinity(cube_slice).data
+            )
+        else:
+            max_cubes = CubeList([])
+            for cube_slice in cube.slices([cube.coord(axis="y"), cube.coord(axis="x")]):
+                max_cubes.append(self.maximum_within_vicinity(cube_slice))
+            result_cube = max_cubes.merge_cube()
 
         # Put dimensions back if they were there before.
         result_cube = check_cube_coordinates(cube, result_cube)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Module for processing the x-y slices of cubes one at a time, without
+realising the whole of the input cube or holding a list of output slices."""
+
+import os
+from typing import Callable, Optional, Union
+
+import dask.array as da
+import numpy as np
+from iris.cube import Cube
+from numpy import ndarray
+
+
+def streaming_enabled() -> bool:
+    """Whether plugins which process cubes slice by slice should stream the
+    slices, as set by the IMPROVER_STREAM_SLICES environment variable.
+
+    Where streaming is enabled, each x-y slice of a lazily loaded input cube
+    is read from disk only when it is processed, and the result is written
+    into an output array allocated once, rather than merging a list of
+    output cubes. Peak memory is then little more than the size of the
+    output.
+    """
+    return os.environ.get("IMPROVER_STREAM_SLICES", "").lower() in ("1", "true", "yes")
+
+
+def is_masked(cube: Cube) -> bool:
+    """Whether any point of the data of a cube is masked, reading lazy data
+    one chunk at a time rather than realising it."""
+    if cube.has_lazy_data():
+        return bool(da.ma.getmaskarray(cube.lazy_data()).any().compute())
+    return np.ma.is_masked(cube.data)
+
+
+def stream_xy_slices(
+    cube: Cube, function: Callable[[Cube], Union[ndarray, np.ma.MaskedArray]]
+) -> Cube:
+    """Apply a function to each x-y slice of a cube, writing the results
+    into a single output array.
+
+    The slices are taken from the cube in turn, so only one slice of a cube
+    with lazy data is realised at a time. The output array is allocated on
+    the first result, with its type, and is made masked if any result is
+    masked.
+
+    Args:
+        cube:
+            Cube to process. This is not modified.
+        function:
+            Function given each x-y slice of the cube, with dimensions
+            ordered y then x, which returns the data of the processed slice
+            with the same shape.
+
+    Returns:
+        Copy of the input cube, with the same dimensions, holding the
+        processed data.
+    """
+    y_dim = cube.coord_dims(cube.coord(axis="y"))[0]
+    x_dim = cube.coord_dims(cube.coord(axis="x"))[0]
+    leading_shape = [
+        length for dim, length in enumerate(cube.shape) if dim not in (y_dim, x_dim)
+    ]
+
+    output: Optional[ndarray] = None
+    for leading_index in np.ndindex(*leading_shape):
+        index = list(leading_index)
+        for dim in sorted((y_dim, x_dim)):
+            index.insert(dim, slice(None))
+        index = tuple(index)
+        cube_slice = cube[index]
+        if x_dim < y_dim:
+            cube_slice.transpose()
+        result = function(cube_slice)
+        if x_dim < y_dim:
+            result = result.T
+
+        if output is None:
+            output = np.empty(cube.shape, dtype=result.dtype)
+            if np.ma.isMaskedArray(result):
+                output = np.ma.masked_array(output, mask=False)
+        elif np.ma.isMaskedArray(result) and not np.ma.isMaskedArray(output):
+            output = np.ma.masked_array(output, mask=False)
+        output[index] = result
+
+    return cube.copy(data=output)
@@ -709,6 +709,127 @@ class Test_process_normal_distribution(
             result, self.expected_point_by_point_sites_additional_predictor
         )
 
+    @ManageWarnings(
+        ignored_messages=[
+            "Collapsing a non-contiguous coordinate.",
+            "Minimisation did not result in convergence",
+            "divide by zero encountered in",
+        ],
+        warning_types=[UserWarning, UserWarning, RuntimeWarning],
+    )
+    def test_point_by_point_max_workers(self):
+        """
+        Test that the coefficients calculated independently at each site by
+        multiple worker processes match those calculated in this process and
+        are returned in the order of the sites, including a site where the
+        truth is missing, which is not counted as a minimised point.
+        """
+        predictor = "mean"
+        distribution = "norm"
+
+        self.truth_spot_cube.data[:, 0] = np.nan
+        results = []
+        for max_workers in [1, 2]:
+            plugin = Plugin(
+                predictor,
+                tolerance=self.tolerance,
+                point_by_point=True,
+                max_workers=max_workers,
+            )
+            results.append(
+                plugin.process(
+                    self.ig_spot_mean_additional_predictor,
+                    self.fp_additional_predictor_spot,
+                    self.truth_spot_cube,
+                    self.forecast_variance_spot,
+                    distribution,
+                )
+            )
+        self.assertArrayEqual(results[1], results[0])
+        self.assertArrayAlmostEqual(
+            results[1][:, 0], self.ig_spot_mean_additional_predictor[0]
+        )
+        self.assertEqual(
+            plugin.convergence_stats["minimised_points"],
+            len(self.truth_spot_cube.coord("spot_index").points) - 1,
+        )
+
+    @ManageWarnings(
+        ignored_messages=[
+            "Collapsing a non-contiguous coordinate.",
+            "Minimisation did not result in convergence",
+            "The final iteration resulted in",
+        ],
+        warning_types=[UserWarning, UserWarning, UserWarning],
+    )
+    def test_use_gradient(self):
+        """
+        Test that minimising using the gradient finds coefficients giving a
+        CRPS at least as low as those found by the Nelder-Mead algorithm.
+        """
+        plugin = Plugin("mean", tolerance=self.tolerance, use_gradient=True)
+        result = plugin.process(
+            self.initial_guess_for_mean,
+            self.forecast_predictor_mean,
+            self.truth,
+            self.forecast_variance,
+            "norm",
+        )
+        crps, expected_crps = [
+            plugin.calculate_normal_crps(
+                coefficients.astype(np.float64),
+                self.forecast_predictor_data,
+                self.truth_data,
+                self.forecast_variance_data,
+                self.sqrt_pi,
+            )
+            for coefficients in [result, self.expected_mean_coefficients]
+        ]
+        self.assertLessEqual(crps, expected_crps + 1e-6)
+
+    @ManageWarnings(
+        ignored_messages=["Collapsing a non-contiguous coordinate."],
+        warning_types=[UserWarning],
+    )
+    def test_point_by_point_use_gradient(self):
+        """
+        Test that minimising all points at once using the gradient finds
+        coefficients at each point giving a CRPS at least as low as those
+        found by the Nelder-Mead algorithm, and that the initial guess is
+        returned for a point where the truth is missing.
+        """
+        self.truth.data[:, 0, 0] = np.nan
+        plugin = Plugin(
+            "mean", tolerance=self.tolerance, point_by_point=True, use_gradient=True
+        )
+        result = plugin.process(
+            self.initial_guess_spot_mean,
+            self.forecast_predictor_mean,
+            self.truth,
+            self.forecast_variance,
+            "norm",
+        )
+        self.assertEqual(result.dtype, np.float32)
+        self.assertTupleEqual(
+            result.shape, self.expected_mean_coefficients_point_by_point.shape
+        )
+        self.assertArrayAlmostEqual(result[:, 0, 0], self.initial_guess_for_mean)
+        for index in [(0, 1), (1, 1), (2, 0)]:
+            crps, expected_crps = [
+                plugin.calculate_normal_crps(
+                    coefficients[(slice(None),) + index].astype(np.float64),
+                    self.forecast_predictor_mean[0].data[(slice(None),) + index],
+                    self.truth.data[(slice(None),) + index],
+                    self.forecast_variance.data[(slice(None),) + index],
+                    self.sqrt_pi,
+                )
+                for coefficients in [
+                    result,
+                    self.expected_mean_coefficients_point_by_point,
+                ]
+            ]
+            self.assertLessEqual(crps, expected_crps + 1e-6)
+
 
 class SetupTruncatedNormalInputs(SetupInputs, SetupCubes):
 
@@ -852,6 +973,120 @@ class Test_calculate_truncated_normal_crps(SetupTruncatedNormalInputs):
         self.assertAlmostEqual(result, self.mean_plugin.BAD_VALUE, self.precision)
 
 
+class Test__crps_and_gradient(SetupTruncatedNormalInputs):
+
+    """Test calculating the CRPS and its gradient for a normal and a
+    truncated normal distribution."""
+
+    def setUp(self):
+        """Set up coefficients away from the initial guesses, so that every
+        component of the gradient is non-zero."""
+        super().setUp()
+        self.coefficients_for_mean = np.array([0.1, 0.9, 0.2, 0.8])
+        self.coefficients_for_realizations = np.array([0.1, 0.5, 0.6, 0.7, 0.2, 0.8])
+        self.crps_functions = {
+            "norm": "calculate_normal_crps",
+            "truncnorm": "calculate_truncated_normal_crps",
+        }
+
+    def _cases(self):
+        """Plugin, coefficients and predictor for each predictor."""
+        return [
+            (
+                self.mean_plugin,
+                self.coefficients_for_mean,
+                self.forecast_predictor_data,
+            ),
+            (
+                self.realizations_plugin,
+                self.coefficients_for_realizations,
+                self.forecast_predictor_data_realizations,
+            ),
+        ]
+
+    @ManageWarnings(ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_crps(self):
+        """Test the CRPS matches that calculated without the gradient."""
+        for distribution, crps_function in self.crps_functions.items():
+            for plugin, coefficients, forecast_predictor in self._cases():
+                result, _ = plugin._crps_and_gradient(
+                    distribution,
+                    coefficients,
+                    forecast_predictor,
+                    self.truth_data,
+                    self.forecast_variance_data,
+                    self.sqrt_pi,
+                )
+                expected = getattr(plugin, crps_function)(
+                    coefficients,
+                    forecast_predictor,
+                    self.truth_data,
+                    self.forecast_variance_data,
+                    self.sqrt_pi,
+                )
+                self.assertAlmostEqual(result, expected)
+
+    @ManageWarnings(ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_gradient(self):
+        """Test the gradient matches that estimated by central differences."""
+        delta = 1e-6
+        for distribution, crps_function in self.crps_functions.items():
+            for plugin, coefficients, forecast_predictor in self._cases():
+                _, result = plugin._crps_and_gradient(
+                    distribution,
+                    coefficients,
+                    forecast_predictor,
+                    self.truth_data,
+                    self.forecast_variance_data,
+                    self.sqrt_pi,
+                )
+                expected = []
+                for step in np.eye(len(coefficients)) * delta:
+                    crps_above, crps_below = [
+                        getattr(plugin, crps_function)(
+                            coefficients + sign * step,
+                            forecast_predictor,
+                            self.truth_data,
+                            self.forecast_variance_data,
+                            self.sqrt_pi,
+                        )
+                        for sign in [1, -1]
+                    ]
+                    expected.append((crps_above - crps_below) / (2 * delta))
+                self.assertArrayAlmostEqual(result, expected, decimal=6)
+
+    @ManageWarnings(ignored_messages=["Collapsing a non-contiguous coordinate."])
+    def test_batch(self):
+        """Test that leading dimensions are treated as separate
+        minimisations."""
+        coefficients = np.stack(
+            [self.coefficients_for_mean, self.coefficients_for_mean * 1.1]
+        )
+        truth_data = np.stack([self.truth_data, self.truth_data[::-1]])
+        truth_data[1, :3] = np.nan
+        crps, gradient = self.mean_plugin._crps_and_gradient(
+            "truncnorm",
+            coefficients,
+            np.stack([self.forecast_predictor_data] * 2),
+            truth_data,
+            np.stack([self.forecast_variance_data] * 2),
+            self.sqrt_pi,
+        )
+        self.assertTupleEqual(crps.shape, (2,))
+        self.assertTupleEqual(gradient.shape, (2, 4))
+        for index in range(2):
+            expected_crps, expected_gradient = self.mean_plugin._crps_and_gradient(
+                "truncnorm",
+                coefficients[index],
+                self.forecast_predictor_data,
+                truth_data[index],
+                self.forecast_variance_data,
+                self.sqrt_pi,
+            )
+            self.assertAlmostEqual(crps[index], expected_crps)
+            self.assertArrayAlmostEqual(gradient[index], expected_gradient)
+
+
 class Test_process_truncated_normal_distribution(
     SetupTruncatedNormalInputs, EnsembleCalibrationAssertions
 ):
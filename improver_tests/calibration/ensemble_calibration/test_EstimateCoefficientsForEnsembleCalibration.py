@@ -50,7 +50,7 @@ from improver.calibration.ensemble_calibration import (
 )
 from improver.metadata.utilities import generate_mandatory_attributes
 from improver.synthetic_data.set_up_test_cubes import set_up_variable_cube
-from improver.utilities.cube_manipulation import enforce_coordinate_ordering
+from improver.utilities.cube_manipulation import collapsed, enforce_coordinate_ordering
 from improver.utilities.warnings_handler import ManageWarnings
 
 from .helper_functions import EnsembleCalibrationAssertions, SetupCubes
@@ -1391,6 +1391,142 @@ class Test_process(
                 expected_dim_coords[cube.name()],
             )
 
+    @ManageWarnings(ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_previous_coefficients(self):
+        """Test that minimising from previously estimated coefficients
+        returns the expected coefficients, along with attributes describing
+        the convergence of the minimisation."""
+        plugin = self.plugin(self.distribution)
+        previous_coefficients = plugin.process(
+            self.historic_temperature_forecast_cube, self.temperature_truth_cube
+        )
+        self.assertNotIn(
+            "emos_warm_started_points", previous_coefficients[0].attributes
+        )
+
+        result = plugin.process(
+            self.historic_temperature_forecast_cube,
+            self.temperature_truth_cube,
+            previous_coefficients=previous_coefficients,
+        )
+        self.assertEMOSCoefficientsAlmostEqual(
+            np.array([cube.data for cube in result]), self.expected_mean_pred_norm,
+        )
+        for cube in result:
+            self.assertEqual(cube.attributes["emos_warm_started_points"], 1)
+            self.assertEqual(cube.attributes["emos_minimised_points"], 1)
+            self.assertIn("emos_converged_points", cube.attributes)
+            self.assertIn("emos_mean_iterations", cube.attributes)
+
+    @ManageWarnings(ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_point_by_point_sites_previous_coefficients(self):
+        """Test that minimising each site from previously estimated
+        coefficients, which are missing for some of the sites, returns the
+        expected coefficients for every site."""
+        plugin = self.plugin(self.distribution, point_by_point=True)
+        previous_coefficients = CubeList(
+            [
+                cube[..., :2]
+                for cube in plugin.process(
+                    self.historic_forecast_spot_cube, self.truth_spot_cube
+                )
+            ]
+        )
+
+        result = plugin.process(
+            self.historic_forecast_spot_cube,
+            self.truth_spot_cube,
+            previous_coefficients=previous_coefficients,
+        )
+        for cube in result:
+            self.assertEMOSCoefficientsAlmostEqual(
+                cube.data, self.expected_mean_pred_each_site[cube.name()],
+            )
+            self.assertEqual(cube.attributes["emos_warm_started_points"], 2)
+            self.assertEqual(
+                cube.attributes["emos_minimised_points"],
+                len(self.truth_spot_cube.coord("spot_index").points),
+            )
+
+    @ManageWarnings(ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_point_by_point_sites_global_previous_coefficients(self):
+        """Test that coefficients previously estimated for all sites together
+        are used as the initial guess at every site when minimising each
+        site."""
+        previous_coefficients = self.plugin(self.distribution).process(
+            self.historic_forecast_spot_cube, self.truth_spot_cube
+        )
+
+        result = self.plugin(self.distribution, point_by_point=True).process(
+            self.historic_forecast_spot_cube,
+            self.truth_spot_cube,
+            previous_coefficients=previous_coefficients,
+        )
+        n_sites = len(self.truth_spot_cube.coord("spot_index").points)
+        for cube in result:
+            self.assertEMOSCoefficientsAlmostEqual(
+                cube.data, self.expected_mean_pred_each_site[cube.name()],
+            )
+            self.assertEqual(cube.attributes["emos_warm_started_points"], n_sites)
+            self.assertEqual(cube.attributes["emos_minimised_points"], n_sites)
+
+    @ManageWarnings(record=True)
+    def test_previous_coefficients_mismatched_distribution(self, warning_list=None):
+        """Test that previously estimated coefficients for a different
+        distribution are not used, and a warning is raised."""
+        previous_coefficients = self.plugin("truncnorm").process(
+            self.historic_temperature_forecast_cube, self.temperature_truth_cube
+        )
+        result = self.plugin(self.distribution).process(
+            self.historic_temperature_forecast_cube,
+            self.temperature_truth_cube,
+            previous_coefficients=previous_coefficients,
+        )
+        warning_msg = "The previous coefficients have a distribution of truncnorm"
+        self.assertTrue(any(warning_msg in str(item) for item in warning_list))
+        self.assertEMOSCoefficientsAlmostEqual(
+            np.array([cube.data for cube in result]), self.expected_mean_pred_norm,
+        )
+        for cube in result:
+            self.assertEqual(cube.attributes["emos_warm_started_points"], 0)
+
+    @ManageWarnings(ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_forecast_variance(self):
+        """Test that providing the ensemble mean and variance of the historic
+        forecasts, as held in a training store, returns the same coefficients
+        as providing the realizations."""
+        forecast_mean, forecast_variance = [
+            collapsed(self.historic_temperature_forecast_cube, "realization", method)
+            for method in (iris.analysis.MEAN, iris.analysis.VARIANCE)
+        ]
+        plugin = self.plugin(self.distribution)
+        result = plugin.process(
+            forecast_mean,
+            self.temperature_truth_cube,
+            forecast_variance=forecast_variance,
+        )
+        self.assertEMOSCoefficientsAlmostEqual(
+            np.array([cube.data for cube in result]), self.expected_mean_pred_norm,
+        )
+
+    @ManageWarnings(ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
+    def test_forecast_variance_realizations(self):
+        """Test that an exception is raised if the forecast variance is
+        provided when the realizations are the predictor."""
+        forecast_variance = collapsed(
+            self.historic_temperature_forecast_cube,
+            "realization",
+            iris.analysis.VARIANCE,
+        )
+        plugin = self.plugin(self.distribution, predictor="realizations")
+        msg = "The forecast variance can only be provided"
+        with self.assertRaisesRegex(ValueError, msg):
+            plugin.process(
+                self.historic_temperature_forecast_cube,
+                self.temperature_truth_cube,
+                forecast_variance=forecast_variance,
+            )
+
     @ManageWarnings(ignored_messages=IGNORED_MESSAGES, warning_types=WARNING_TYPES)
     def test_sites_additional_static_predictor(self):
         """Ensure that the coefficients and coefficient names are as expected
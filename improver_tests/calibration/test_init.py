@@ -30,19 +30,30 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Unit tests for calibration.__init__"""
 
+import os
 import unittest
 from datetime import datetime
+from tempfile import TemporaryDirectory
 
 import iris
 import numpy as np
 from iris.cube import CubeList
 
-from improver.calibration import split_forecasts_and_coeffs, split_forecasts_and_truth
+from improver.calibration import (
+    _validity_times,
+    split_forecast_and_truth_files,
+    split_forecasts_and_coeffs,
+    split_forecasts_and_truth,
+)
 from improver.synthetic_data.set_up_test_cubes import (
     set_up_percentile_cube,
     set_up_probability_cube,
     set_up_variable_cube,
 )
+from improver.utilities.chunked_store import save_store
+from improver.utilities.load import load_cube
+from improver.utilities.metadata_index import load_headers
+from improver.utilities.save import save_netcdf
 from improver_tests import ImproverTest
 
 
@@ -231,6 +242,96 @@ class Test_split_forecasts_and_truth(unittest.TestCase):
             )
 
 
+class Test_split_forecast_and_truth_files(unittest.TestCase):
+
+    """Test the split_forecast_and_truth_files method."""
+
+    def setUp(self):
+        """Write forecast, truth and land-sea mask files for testing."""
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.truth_attribute = "mosg__model_configuration=uk_det"
+        cubes = {}
+        for day in (10, 11):
+            forecast = set_up_variable_cube(
+                np.ones((4, 4), dtype=np.float32),
+                time=datetime(2017, 11, day, 4, 0),
+                frt=datetime(2017, 11, day, 0, 0),
+            )
+            truth = forecast.copy(data=np.zeros((4, 4), dtype=np.float32))
+            truth.attributes["mosg__model_configuration"] = "uk_det"
+            cubes[f"forecast_{day}.nc"] = forecast
+            cubes[f"truth_{day}.nc"] = truth
+        landsea_mask = forecast.copy()
+        landsea_mask.rename("land_binary_mask")
+        cubes["landsea_mask.nc"] = landsea_mask
+        self.filepaths = {}
+        for filename, cube in cubes.items():
+            self.filepaths[filename] = os.path.join(self.directory.name, filename)
+            save_netcdf(cube, self.filepaths[filename])
+
+    def test_basic(self):
+        """Test that the files are split into forecasts, truths and a
+        land-sea mask, in the order given."""
+        forecasts, truths, landsea_mask = split_forecast_and_truth_files(
+            list(self.filepaths.values()), self.truth_attribute
+        )
+        self.assertEqual(
+            forecasts,
+            [self.filepaths["forecast_10.nc"], self.filepaths["forecast_11.nc"]],
+        )
+        self.assertEqual(
+            truths, [self.filepaths["truth_10.nc"], self.filepaths["truth_11.nc"]]
+        )
+        self.assertEqual(landsea_mask, self.filepaths["landsea_mask.nc"])
+
+    def test_exception_for_missing_truth_inputs(self):
+        """Test that an exception is raised if no truth files are given."""
+        filepaths = [self.filepaths["forecast_10.nc"], self.filepaths["forecast_11.nc"]]
+        with self.assertRaisesRegex(IOError, "Missing truth input."):
+            split_forecast_and_truth_files(filepaths, self.truth_attribute)
+
+    def test_match_validity_times(self):
+        """Test that forecast and truth files with no validity time in common
+        with the other kind are dropped."""
+        filepaths = [
+            self.filepaths["forecast_10.nc"],
+            self.filepaths["forecast_11.nc"],
+            self.filepaths["truth_11.nc"],
+        ]
+        forecasts, truths, _ = split_forecast_and_truth_files(
+            filepaths, self.truth_attribute, match_validity_times=True
+        )
+        self.assertEqual(forecasts, [self.filepaths["forecast_11.nc"]])
+        self.assertEqual(truths, [self.filepaths["truth_11.nc"]])
+
+    def test_match_validity_times_units(self):
+        """Test that validity times saved with different units are matched."""
+        headers = load_headers(
+            [self.filepaths["forecast_11.nc"], self.filepaths["truth_11.nc"]]
+        )
+        time = headers[1].coords["time"]
+        time["points"] = time["points"] / 3600
+        time["units"] = "hours since 1970-01-01 00:00:00"
+        self.assertEqual(_validity_times(headers[0]), _validity_times(headers[1]))
+
+    def test_store(self):
+        """Test that the metadata of chunked directory stores are read to
+        split them without loading their data."""
+        store_path = os.path.join(self.directory.name, "truth_11.npystore")
+        save_store(load_cube(self.filepaths["truth_11.nc"]), store_path)
+        filepaths = [
+            self.filepaths["forecast_10.nc"],
+            self.filepaths["forecast_11.nc"],
+            store_path,
+        ]
+        forecasts, truths, _ = split_forecast_and_truth_files(
+            filepaths, self.truth_attribute, match_validity_times=True
+        )
+        self.assertEqual(forecasts, [self.filepaths["forecast_11.nc"]])
+        self.assertEqual(truths, [store_path])
+
+
 class Test_split_forecasts_and_coeffs(ImproverTest):
 
     """Test the split_forecasts_and_coeffs function."""
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the EMOS training store."""
+
+from datetime import datetime, timedelta
+
+import iris
+import numpy as np
+import pytest
+from iris.cube import CubeList
+
+from improver.calibration.training_store import (
+    _day_stores,
+    append_to_training_store,
+    load_training_store,
+)
+from improver.synthetic_data.set_up_test_cubes import set_up_variable_cube
+from improver.utilities.cube_manipulation import collapsed
+
+VALIDITY_TIMES = [datetime(2017, 11, day, 4, 0) for day in (10, 11, 12)]
+
+
+def _day_cubes(time, offset):
+    """Set up historic forecasts and a truth for one validity time"""
+    data = np.arange(27, dtype=np.float32).reshape((3, 3, 3)) + 273.15 + offset
+    forecast = set_up_variable_cube(
+        data, time=time, frt=time - timedelta(hours=4), realizations=[0, 1, 2]
+    )
+    truth = set_up_variable_cube(data[1] + 0.5, time=time)
+    truth.remove_coord("forecast_period")
+    truth.remove_coord("forecast_reference_time")
+    return forecast, truth
+
+
+def _merge(cubes):
+    """Merge the cubes for several validity times"""
+    return CubeList(cubes).merge_cube()
+
+
+@pytest.fixture(name="cubes")
+def cubes_fixture():
+    """Set up historic forecasts and truths for three validity times"""
+    forecasts, truths = zip(
+        *[_day_cubes(time, offset) for offset, time in enumerate(VALIDITY_TIMES)]
+    )
+    return list(forecasts), list(truths)
+
+
+def test_round_trip(cubes, tmp_path):
+    """Test the days loaded from a store hold the ensemble mean and variance
+    of the historic forecasts and the truths, with their data loaded
+    lazily"""
+    forecasts, truths = [_merge(item) for item in cubes]
+    path = str(tmp_path / "training")
+    added = append_to_training_store(path, forecasts, truths)
+    assert added == ["20171110T0400Z", "20171111T0400Z", "20171112T0400Z"]
+
+    forecast_mean, forecast_variance, truth = load_training_store(path)
+    assert forecast_mean.has_lazy_data()
+    np.testing.assert_allclose(
+        forecast_mean.data,
+        collapsed(forecasts, "realization", iris.analysis.MEAN).data,
+    )
+    np.testing.assert_allclose(
+        forecast_variance.data,
+        collapsed(forecasts, "realization", iris.analysis.VARIANCE).data,
+    )
+    np.testing.assert_array_equal(truth.data, truths.data)
+    assert truth.coord("time") == truths.coord("time")
+
+
+@pytest.mark.parametrize("masked", ("forecast", "truth"))
+def test_masked_round_trip(cubes, tmp_path, masked):
+    """Test masked points in the historic forecasts or the truths are
+    preserved in the days loaded from a store"""
+    forecasts, truths = [_merge(item) for item in cubes]
+    if masked == "forecast":
+        forecasts.data = np.ma.masked_array(forecasts.data, mask=False)
+        forecasts.data[..., 0, 0] = np.ma.masked
+    else:
+        truths.data = np.ma.masked_array(truths.data, mask=False)
+        truths.data[:, 1, 1] = np.ma.masked
+    path = str(tmp_path / "training")
+    append_to_training_store(path, forecasts, truths)
+
+    result = load_training_store(path)
+    expected = (
+        collapsed(forecasts, "realization", iris.analysis.MEAN).data,
+        collapsed(forecasts, "realization", iris.analysis.VARIANCE).data,
+        truths.data,
+    )
+    for result_cube, expected_data in zip(result, expected):
+        np.testing.assert_array_equal(
+            np.ma.getmaskarray(result_cube.data), np.ma.getmaskarray(expected_data)
+        )
+        np.testing.assert_allclose(
+            np.ma.filled(result_cube.data, 0), np.ma.filled(expected_data, 0)
+        )
+    assert np.ma.is_masked(result[2 if masked == "truth" else 0].data)
+
+
+def test_append(cubes, tmp_path):
+    """Test a new day can be appended to a store, and that appending a day
+    already held replaces it"""
+    forecasts, truths = cubes
+    path = str(tmp_path / "training")
+    append_to_training_store(path, _merge(forecasts[:2]), _merge(truths[:2]))
+    replacement = truths[1].copy(data=truths[1].data + 1)
+    append_to_training_store(
+        path, _merge(forecasts[1:]), _merge([replacement, truths[2]])
+    )
+    assert len(_day_stores(path)) == 3
+
+    _, _, truth = load_training_store(path)
+    np.testing.assert_array_equal(truth.data[0], truths[0].data)
+    np.testing.assert_array_equal(truth.data[1], replacement.data)
+    np.testing.assert_array_equal(truth.data[2], truths[2].data)
+
+
+@pytest.mark.parametrize("difference", ("diagnostic", "forecast period", "grid"))
+def test_mismatched_forecasts(cubes, tmp_path, difference):
+    """Test forecasts of another diagnostic, forecast period or grid are not
+    appended to a store, nor loaded from it, and that the store is left
+    unchanged"""
+    forecasts, truths = cubes
+    path = str(tmp_path / "training")
+    append_to_training_store(path, _merge(forecasts[:2]), _merge(truths[:2]))
+    other_forecast, other_truth = forecasts[2].copy(), truths[2].copy()
+    if difference == "diagnostic":
+        for cube in (other_forecast, other_truth):
+            cube.rename("wet_bulb_temperature")
+    elif difference == "forecast period":
+        other_forecast.coord("forecast_period").points = (
+            other_forecast.coord("forecast_period").points + 3600
+        )
+    else:
+        for cube in (other_forecast, other_truth):
+            cube.coord(axis="x").points = cube.coord(axis="x").points + 1
+
+    msg = f"holds forecasts with a different {difference}"
+    with pytest.raises(ValueError, match=msg):
+        append_to_training_store(path, other_forecast, other_truth, max_length=1)
+    assert _day_stores(path) == ["20171110T0400Z.npystore", "20171111T0400Z.npystore"]
+    with pytest.raises(ValueError, match=msg):
+        load_training_store(path, historic_forecasts=other_forecast)
+    load_training_store(path, historic_forecasts=forecasts[0])
+
+
+def test_unmatched_times(cubes, tmp_path):
+    """Test only the validity times with both a forecast and a truth are
+    added"""
+    forecasts, truths = cubes
+    path = str(tmp_path / "training")
+    added = append_to_training_store(path, _merge(forecasts), _merge(truths[1:]))
+    assert added == ["20171111T0400Z", "20171112T0400Z"]
+
+
+def test_max_length(cubes, tmp_path):
+    """Test the oldest days are removed to limit the length of the store"""
+    forecasts, truths = [_merge(item) for item in cubes]
+    path = str(tmp_path / "training")
+    append_to_training_store(path, forecasts, truths, max_length=2)
+    assert _day_stores(path) == ["20171111T0400Z.npystore", "20171112T0400Z.npystore"]
+
+
+@pytest.mark.parametrize(
+    "training_length, end_time, expected",
+    ((2, None, [1, 2]), (None, "20171111T0400Z", [0, 1]), (1, "20171111T0400Z", [1])),
+)
+def test_window(cubes, tmp_path, training_length, end_time, expected):
+    """Test the days loaded are limited to the training window"""
+    forecasts, truths = [_merge(item) for item in cubes]
+    path = str(tmp_path / "training")
+    append_to_training_store(path, forecasts, truths)
+    result = load_training_store(
+        path, training_length=training_length, end_time=end_time
+    )
+    for cube in result:
+        np.testing.assert_array_equal(
+            cube.coord("time").points, truths.coord("time").points[expected]
+        )
+
+
+def test_empty_window(cubes, tmp_path):
+    """Test an exception is raised if there are no days within the training
+    window"""
+    forecasts, truths = [_merge(item) for item in cubes]
+    path = str(tmp_path / "training")
+    append_to_training_store(path, forecasts, truths)
+    with pytest.raises(ValueError, match="no days within the training window"):
+        load_training_store(path, end_time="20171101T0000Z")
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -52,11 +52,13 @@ from improver.calibration.utilities import (
     create_unified_frt_coord,
     filter_non_matching_cubes,
     flatten_ignoring_masked_data,
+    flatten_spatial_dimensions,
     forecast_coords_match,
     get_frt_hours,
     merge_land_and_sea,
 )
 from improver.metadata.constants.time_types import TIME_COORDS
+from improver.spotdata.build_spotdata_cube import build_spotdata_cube
 from improver.synthetic_data.set_up_test_cubes import (
     add_coordinate,
     set_up_percentile_cube,
@@ -746,5 +748,53 @@ class Test_broadcast_data_to_time_coord(IrisTest):
         self.assertTupleEqual(results[1].shape, self.altitude.shape)
 
 
+class Test_flatten_spatial_dimensions(Test_broadcast_data_to_time_coord):
+
+    """Test the flatten_spatial_dimensions function."""
+
+    def test_one_forecast_predictor(self):
+        """Test the spatial dimensions are flattened into a trailing dimension
+        of points ordered by y and then by x."""
+        self.forecast.data = np.arange(54, dtype=np.float32).reshape(2, 3, 3, 3)
+        (result,) = flatten_spatial_dimensions(CubeList([self.forecast]))
+        self.assertTupleEqual(result.shape, (2, 3, 9))
+        self.assertArrayEqual(result[1, 2, 5], self.forecast.data[1, 2, 1, 2])
+
+    def test_spatial_dimensions_not_last(self):
+        """Test the points are in the same order when the spatial dimensions
+        are not the trailing dimensions of the cube."""
+        self.forecast.data = np.arange(54, dtype=np.float32).reshape(2, 3, 3, 3)
+        expected = flatten_spatial_dimensions(CubeList([self.forecast]))
+        self.forecast.transpose([2, 0, 3, 1])
+        result = flatten_spatial_dimensions(CubeList([self.forecast]))
+        self.assertArrayEqual(result[0], expected[0])
+
+    def test_two_forecast_predictors(self):
+        """Test a static predictor is broadcast along the time dimension."""
+        results = flatten_spatial_dimensions(CubeList([self.forecast, self.altitude]))
+        self.assertEqual(len(results), 2)
+        self.assertTupleEqual(results[0].shape, (2, 3, 9))
+        self.assertTupleEqual(results[1].shape, (3, 9))
+
+    def test_sites(self):
+        """Test sites, where the y and x coordinates share a dimension, are
+        kept in their original order."""
+        sites = np.arange(4, dtype=np.float32)
+        wmo_ids = [f"{site:05d}" for site in range(4)]
+        spot_cube = build_spotdata_cube(
+            sites + 273, "air_temperature", "K", sites, sites, sites[::-1], wmo_ids
+        )
+        (result,) = flatten_spatial_dimensions(CubeList([spot_cube]))
+        self.assertArrayEqual(result, spot_cube.data)
+
+    def test_mismatching_points(self):
+        """Test an exception is raised if the spatial coordinates of the cubes
+        do not match."""
+        self.altitude.coord(axis="x").points = self.altitude.coord(axis="x").points + 1
+        msg = "The x coordinate of the surface_altitude cube does not match"
+        with self.assertRaisesRegex(ValueError, msg):
+            flatten_spatial_dimensions(CubeList([self.forecast, self.altitude]))
+
+
 if __name__ == "__main__":
     unittest.main()
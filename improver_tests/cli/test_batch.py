@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the batch CLI functions"""
+
+import json
+
+import numpy as np
+import pytest
+
+from improver.cli import batch
+from improver.cli.batch import (
+    _memory_failures,
+    _run_job,
+    _watch_memory,
+    job_arguments,
+    load_manifest,
+    process,
+    run_batch,
+    shared_paths,
+)
+from improver.synthetic_data.set_up_test_cubes import set_up_variable_cube
+from improver.utilities.load import load_cube
+from improver.utilities.save import save_netcdf
+
+
+def test_load_manifest(tmp_path):
+    """Test the input and output paths of each job are read"""
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# comment\na.nc b.nc out1.nc\n\n'c d.nc' out2.nc\n")
+    result = load_manifest(manifest)
+    assert result == [(["a.nc", "b.nc"], "out1.nc"), (["c d.nc"], "out2.nc")]
+
+
+def test_load_manifest_no_output(tmp_path):
+    """Test an error is raised if a job has no output path"""
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("a.nc out1.nc\nb.nc\n")
+    with pytest.raises(ValueError, match="Line 2 of the manifest"):
+        load_manifest(manifest)
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    (
+        (["--radii", "5"], ["a.nc", "b.nc", "--radii", "5", "--output", "o.nc"]),
+        (
+            ["mask.nc", "{1}", "{0}", "--output={output}"],
+            ["mask.nc", "b.nc", "a.nc", "--output=o.nc"],
+        ),
+        (["{output}", "--x", "{a}"], ["a.nc", "b.nc", "o.nc", "--x", "{a}"]),
+    ),
+)
+def test_job_arguments(args, expected):
+    """Test placeholders are replaced and defaults applied without them"""
+    result = job_arguments("cmd", args, ["a.nc", "b.nc"], "o.nc")
+    assert result == ["cmd", *expected]
+
+
+def test_shared_paths(tmp_path):
+    """Test existing files are identified, other than placeholders"""
+    mask = tmp_path / "mask.nc"
+    mask.write_text("")
+    args = [str(mask), f"--land-sea-mask={mask}", "{0}", "--radii", "5"]
+    assert shared_paths(args) == [str(mask), str(mask)]
+
+
+@pytest.fixture(name="inputs")
+def inputs_fixture(tmp_path):
+    """Write two input files and a manifest of jobs"""
+    paths = []
+    for value in (270, 280):
+        cube = set_up_variable_cube(
+            np.full((3, 3), value, dtype=np.float32), spatial_grid="equalarea"
+        )
+        paths.append(tmp_path / f"input_{value}.nc")
+        save_netcdf(cube, paths[-1])
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text(
+        "\n".join(f"{path} {tmp_path}/output_{i}.nc" for i, path in enumerate(paths))
+    )
+    return manifest
+
+
+def test_run_batch(tmp_path, inputs):
+    """Test each job is run and its output saved"""
+    jobs = load_manifest(inputs)
+    results = run_batch(jobs, "threshold", ["--threshold-values", "275"], workers=2)
+    assert [result["exit_status"] for result in results] == [0, 0]
+    assert [result["output"] for result in results] == [job[1] for job in jobs]
+    for i, expected in enumerate((0, 1)):
+        cube = load_cube(str(tmp_path / f"output_{i}.nc"))
+        np.testing.assert_array_equal(cube.data, np.full((3, 3), expected))
+
+
+def test_run_batch_memory_limit(tmp_path, inputs):
+    """Test jobs exceeding the resident memory limit fail with a
+    MemoryError, with the remaining jobs run in new workers"""
+    jobs = load_manifest(inputs)
+    results = run_batch(
+        jobs, "threshold", ["--threshold-values", "275"], workers=1, memory_limit=1
+    )
+    assert [result["exit_status"] for result in results] == [1, 1]
+    assert all("MemoryError" in result["stderr"] for result in results)
+
+
+def test_watch_memory(tmp_path, monkeypatch):
+    """Test a worker exceeding the memory limit while running a job records
+    the job as failed and exits"""
+
+    def exit(status):
+        raise SystemExit(status)
+
+    monkeypatch.setattr(batch, "MEMORY_POLL_INTERVAL", 0)
+    monkeypatch.setattr(batch, "_resident_memory", lambda: 2)
+    monkeypatch.setattr(batch, "_RUNNING_JOB", (3, 0.0))
+    monkeypatch.setattr(batch.os, "_exit", exit)
+    with pytest.raises(SystemExit):
+        _watch_memory(1, str(tmp_path))
+    failures = _memory_failures(str(tmp_path), 1)
+    assert list(failures) == [3]
+    assert failures[3]["exit_status"] == 1
+    assert "MemoryError" in failures[3]["stderr"]
+
+
+def test_run_job_clears_running_job(monkeypatch):
+    """Test the running job is recorded only while the job runs"""
+
+    def run_job(argv):
+        assert batch._RUNNING_JOB[0] == 5
+        return {"exit_status": 0}
+
+    monkeypatch.setattr("improver.cli.serve.run_job", run_job)
+    assert _run_job(5, ["threshold"]) == {"exit_status": 0}
+    assert batch._RUNNING_JOB is None
+
+
+def test_process_failure(inputs, capsys):
+    """Test an error is raised after reporting all jobs if any fail"""
+    with pytest.raises(RuntimeError, match="2 of 2 jobs failed"):
+        process(inputs, "threshold", "--no-such-option")
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["exit_status"] for record in records] == [2, 2]
+
+
+if __name__ == "__main__":
+    pytest.main()
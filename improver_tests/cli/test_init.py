@@ -30,8 +30,10 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Unit tests for cli.__init__"""
 
+import os
 import unittest
-from unittest.mock import patch
+from tempfile import TemporaryDirectory
+from unittest.mock import Mock, patch
 
 import dask.array as da
 import numpy as np
@@ -40,20 +42,29 @@ from iris.exceptions import ConstraintMismatchError
 
 import improver
 from improver.cli import (
+    LazyCommand,
     clizefy,
     create_constrained_inputcubelist_converter,
     docutilize,
+    inputancillary,
+    inputancillarylist,
     inputcube,
+    inputcube_deferred,
     inputcube_nolazy,
     inputcubelist,
     inputdatetime,
     inputjson,
+    load_inputcubes,
+    load_registry,
     maybe_coerce_with,
     run_main,
+    share_inputs,
     unbracket,
     with_output,
 )
 from improver.synthetic_data.set_up_test_cubes import set_up_variable_cube
+from improver.utilities.ancillary_cache import load_ancillary
+from improver.utilities.save import save_netcdf
 
 
 def dummy_function(first, second=0, third=2):
@@ -127,6 +138,21 @@ class Test_maybe_coerce_with(unittest.TestCase):
         # Dummy function will be 2 + 2 therefore 4.
         self.assertEqual(result, 4)
 
+    @patch.dict("improver.cli.SHARED_INPUTS", clear=True)
+    def test_shared_input(self):
+        """Tests that a shared input is converted once and realised, with a
+        copy returned for each use."""
+        cube = set_up_variable_cube(np.zeros((2, 2), dtype=np.float32))
+        cube.data = da.from_array(cube.data)
+        share_inputs(["cube.nc"])
+        mocked = Mock(return_value=cube)
+        first = maybe_coerce_with(mocked, "cube.nc")
+        first.data += 1
+        second = maybe_coerce_with(mocked, "cube.nc")
+        mocked.assert_called_once_with("cube.nc")
+        self.assertFalse(second.has_lazy_data())
+        np.testing.assert_array_equal(second.data, 0)
+
 
 class Test_inputcube(unittest.TestCase):
     """Tests the input cube function"""
@@ -139,6 +165,28 @@ class Test_inputcube(unittest.TestCase):
         self.assertEqual(result, "return")
 
 
+class Test_inputcube_deferred(unittest.TestCase):
+    """Tests the deferred input cube function"""
+
+    def test_basic(self):
+        """Tests that the file name is returned without loading"""
+        self.assertEqual(inputcube_deferred("foo"), "foo")
+
+
+class Test_load_inputcubes(unittest.TestCase):
+    """Tests the load_inputcubes function"""
+
+    @patch.dict("os.environ", {"IMPROVER_LOAD_WORKERS": "3"})
+    @patch("improver.utilities.load.load_cubes", return_value=["a", "b"])
+    def test_basic(self, m):
+        """Tests that file names are loaded together in order, with cubes
+        passed through"""
+        cube = Cube(0, long_name="dummy")
+        result = load_inputcubes(["foo", cube, "bar"])
+        m.assert_called_once_with(["foo", "bar"], max_workers=3)
+        self.assertEqual(result, ["a", cube, "b"])
+
+
 class Test_inputcube_nolazy(unittest.TestCase):
     """Tests the input cube no lazy function"""
 
@@ -181,6 +229,31 @@ class Test_inputcubelist(unittest.TestCase):
         self.assertEqual(result, "return")
 
 
+class Test_inputancillary(unittest.TestCase):
+    """Tests the input ancillary function"""
+
+    @patch("improver.cli.maybe_coerce_with", return_value="return")
+    def test_basic(self, m):
+        """Tests that input ancillary calls load_ancillary with the string"""
+        result = inputancillary("foo")
+        m.assert_called_with(load_ancillary, "foo")
+        self.assertEqual(result, "return")
+
+
+class Test_inputancillarylist(unittest.TestCase):
+    """Tests the input ancillary list function"""
+
+    @patch("improver.cli.maybe_coerce_with", return_value="return")
+    def test_basic(self, m):
+        """Tests that input ancillary list calls load_ancillary with the
+        string, loading a cubelist"""
+        result = inputancillarylist("foo")
+        m.assert_called_with(
+            load_ancillary, "foo", loader=improver.utilities.load.load_cubelist
+        )
+        self.assertEqual(result, "return")
+
+
 class Test_inputjson(unittest.TestCase):
     """Tests the input cube function"""
 
@@ -216,10 +289,11 @@ class Test_with_output(unittest.TestCase):
     @patch("improver.utilities.save.save_netcdf")
     def test_with_output(self, m):
         """Tests that save_netcdf is called with object and string, default
-        compression_level=1 and default least_significant_digit=None"""
+        compression_level=None, least_significant_digit=None and save
+        profile=None"""
         # pylint disable is needed as it can't see the wrappers output kwarg.
         result = wrapped_with_output.cli("argv[0]", "2", "--output=foo")
-        m.assert_called_with(4, "foo", 1, None)
+        m.assert_called_with(4, "foo", None, None, profile=None)
         self.assertEqual(result, None)
 
     @patch("improver.utilities.save.save_netcdf")
@@ -229,7 +303,7 @@ class Test_with_output(unittest.TestCase):
         result = wrapped_with_output.cli(
             "argv[0]", "2", "--output=foo", "--compression-level=9"
         )
-        m.assert_called_with(4, "foo", 9, None)
+        m.assert_called_with(4, "foo", 9, None, profile=None)
         self.assertEqual(result, None)
 
     @patch("improver.utilities.save.save_netcdf")
@@ -239,7 +313,7 @@ class Test_with_output(unittest.TestCase):
         result = wrapped_with_output.cli(
             "argv[0]", "2", "--output=foo", "--compression-level=0"
         )
-        m.assert_called_with(4, "foo", 0, None)
+        m.assert_called_with(4, "foo", 0, None, profile=None)
         self.assertEqual(result, None)
 
     @patch("improver.utilities.save.save_netcdf")
@@ -253,7 +327,17 @@ class Test_with_output(unittest.TestCase):
             "--compression-level=0",
             "--least-significant-digit=2",
         )
-        m.assert_called_with(4, "foo", 0, 2)
+        m.assert_called_with(4, "foo", 0, 2, profile=None)
+        self.assertEqual(result, None)
+
+    @patch("improver.utilities.save.save_netcdf")
+    def test_with_output_save_profile(self, m):
+        """Tests save_netcdf, save-profile=scratch"""
+        # pylint disable is needed as it can't see the wrappers output kwarg.
+        result = wrapped_with_output.cli(
+            "argv[0]", "2", "--output=foo", "--save-profile=scratch"
+        )
+        m.assert_called_with(4, "foo", None, None, profile="scratch")
         self.assertEqual(result, None)
 
 
@@ -360,6 +444,33 @@ class Test_create_constrained_inputcubelist_converter(unittest.TestCase):
         with self.assertRaisesRegex(ConstraintMismatchError, "^Got 2 cubes"):
             func(self.wind_cubes)
 
+    def test_file(self):
+        """Tests cubes are extracted from a file."""
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "wind.nc")
+            save_netcdf(self.wind_cubes, path)
+            func = create_constrained_inputcubelist_converter(
+                "wind_from_direction", "wind_speed"
+            )
+            result = func(path)
+        self.assertEqual(
+            [cube.name() for cube in result], ["wind_from_direction", "wind_speed"]
+        )
+
+    @patch("improver.utilities.load.load_cubelist")
+    def test_file_no_match(self, mocked_load_cubelist):
+        """Tests a missing cube name is reported from the file header, before
+        loading the cubes."""
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "wind.nc")
+            save_netcdf(self.wind_cubes, path)
+            func = create_constrained_inputcubelist_converter(
+                "wind_speed", "airspeed_velocity_of_unladen_swallow"
+            )
+            with self.assertRaisesRegex(ConstraintMismatchError, "^Got 0 cubes"):
+                func(path)
+        mocked_load_cubelist.assert_not_called()
+
 
 class Test_clizefy(unittest.TestCase):
     """Test the clizefy decorator function"""
@@ -404,6 +515,99 @@ class Test_unbracket(unittest.TestCase):
             unbracket(["foo", "]", "bar"])
 
 
+class Test_LazyCommand(unittest.TestCase):
+    """Test the LazyCommand CLI object"""
+
+    def test_help_listing(self):
+        """Tests the description and usages are given without loading"""
+        command = LazyCommand("threshold", "Describe.", ["cube", "--help"])
+        self.assertIs(command.cli, command)
+        self.assertEqual(command.helper.description, "Describe.")
+        self.assertEqual(list(command.helper.usages()), ["cube", "--help"])
+        self.assertIsNone(command._cli)
+
+    def test_call(self):
+        """Tests calling the command loads and runs the command CLI"""
+        command = LazyCommand("threshold")
+        result = command("improver threshold", "--help")
+        self.assertTrue(result.startswith("Usage: improver threshold"))
+        self.assertIs(command.load(), improver.cli.threshold.process.cli)
+
+
+class Test_load_registry(unittest.TestCase):
+    """Test the load_registry function"""
+
+    def setUp(self):
+        """Point the registry at a temporary file"""
+        import os
+        import tempfile
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "registry", "cli_registry.json")
+        env_patch = patch.dict(os.environ, {"IMPROVER_CLI_REGISTRY": self.path})
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+
+    def test_build_and_reuse(self):
+        """Tests the registry is built and saved when missing and then
+        reused"""
+        import json
+
+        result = load_registry()
+        self.assertIn("threshold", result)
+        self.assertEqual(
+            result["threshold"]["description"],
+            "Module to apply thresholding to a parameter dataset.",
+        )
+        with open(self.path) as fin:
+            saved = json.load(fin)
+        self.assertEqual(saved["commands"], result)
+        self.assertIn("__init__.py", saved["key"])
+        with patch("improver.cli.build_registry") as mock_build:
+            self.assertEqual(load_registry(), result)
+            mock_build.assert_not_called()
+
+    def test_out_of_date(self):
+        """Tests the registry is rebuilt if the CLI modules have changed"""
+        import json
+
+        load_registry()
+        with open(self.path) as fin:
+            saved = json.load(fin)
+        saved["key"]["threshold.py"] = 0
+        saved["commands"] = {}
+        with open(self.path, "w") as fout:
+            json.dump(saved, fout)
+        self.assertIn("threshold", load_registry())
+
+
+def test_help_imports_from_registry(tmp_path):
+    """Test that, once the registry is built, listing the commands and showing
+    help for one command do not import sphinx or other command modules."""
+    import os
+    import subprocess  # nosec
+    import sys
+
+    env = dict(os.environ, IMPROVER_CLI_REGISTRY=str(tmp_path / "registry.json"))
+    subprocess.run(
+        [sys.executable, "-m", "improver.cli", "help"],
+        check=True,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )  # nosec
+    script = (
+        "import sys\n"
+        "from improver.cli import main\n"
+        "main.cli('improver', 'help')\n"
+        "main.cli('improver', 'help', 'threshold')\n"
+        'assert "sphinx" not in sys.modules, "sphinx imported"\n'
+        "modules = [m for m in sys.modules if m.startswith('improver.cli.')]\n"
+        'assert modules == ["improver.cli.threshold"], modules\n'
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)  # nosec
+
+
 def test_import_cli():
     """Test if `import improver.cli` pulls in heavy stuff like numpy.
 
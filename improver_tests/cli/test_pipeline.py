@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the pipeline CLI functions"""
+
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from improver.cli import ObjectAsStr
+from improver.cli.pipeline import check_pipeline, load_pipeline, run_pipeline
+from improver.synthetic_data.set_up_test_cubes import set_up_variable_cube
+from improver.utilities.load import load_cube
+from improver.utilities.save import save_netcdf
+
+STEPS = {
+    "a": {"command": "cmd-a", "args": ["in.nc"]},
+    "b": {"command": "cmd-b", "args": [{"step": "a"}, "--option", 2]},
+    "c": {"command": "cmd-c", "args": [{"step": "a"}, {"step": "b"}], "output": "c.nc"},
+}
+
+
+def fake_execute_command(dispatcher, prog_name, command, *args, verbose=False):
+    """Return a list recording the command and arguments it was called with"""
+    return [command, *args]
+
+
+def test_load_pipeline(tmp_path):
+    """Test the steps are loaded from a JSON file"""
+    path = tmp_path / "pipeline.json"
+    path.write_text(json.dumps({"steps": STEPS}))
+    assert load_pipeline(path) == STEPS
+
+
+def test_check_pipeline():
+    """Test the dependencies of each step are returned"""
+    result = check_pipeline(STEPS)
+    assert result == {"a": set(), "b": {"a"}, "c": {"a", "b"}}
+
+
+@pytest.mark.parametrize(
+    "steps, msg",
+    (
+        ({"a": {"args": []}}, "Step a does not specify a command"),
+        (
+            {"a": {"command": "cmd", "args": [{"step": "z"}]}},
+            r"Step a refers to unknown steps \['z'\]",
+        ),
+        (
+            {"a": {"command": "cmd", "args": [{"name": "z"}]}},
+            "must be a reference of the form",
+        ),
+        (
+            {
+                "a": {"command": "cmd", "args": [{"step": "b"}]},
+                "b": {"command": "cmd", "args": [{"step": "a"}]},
+                "c": {"command": "cmd"},
+            },
+            r"Cyclic dependencies between steps \['a', 'b'\]",
+        ),
+    ),
+)
+def test_check_pipeline_invalid(steps, msg):
+    """Test invalid pipelines raise an error"""
+    with pytest.raises(ValueError, match=msg):
+        check_pipeline(steps)
+
+
+@pytest.mark.parametrize("max_workers", (1, 3))
+@patch("improver.cli.execute_command", side_effect=fake_execute_command)
+def test_run_pipeline(mock_execute, max_workers):
+    """Test results are passed between steps in order, that outputs are
+    requested and that a result used twice is copied for the first use"""
+    run_pipeline(STEPS, max_workers=max_workers)
+    calls = [call.args[2:] for call in mock_execute.call_args_list]
+    result_a = ["cmd-a", "in.nc"]
+    result_b = ["cmd-b", result_a, "--option", "2"]
+    assert calls == [
+        tuple(result_a),
+        tuple(result_b),
+        ("cmd-c", result_a, result_b, "--output", "c.nc", "--pass-through-output"),
+    ]
+    args_b = mock_execute.call_args_list[1].args
+    args_c = mock_execute.call_args_list[2].args
+    assert args_b[3] is not args_c[3]
+
+
+@patch("improver.cli.execute_command")
+def test_run_pipeline_unwraps_output(mock_execute):
+    """Test that a result passed through from a saved output is unwrapped"""
+    cube = set_up_variable_cube(np.ones((3, 3), dtype=np.float32))
+    mock_execute.side_effect = [ObjectAsStr(cube, "a.nc"), None]
+    steps = {
+        "a": {"command": "cmd-a", "output": "a.nc"},
+        "b": {"command": "cmd-b", "args": [{"step": "a"}]},
+    }
+    run_pipeline(steps)
+    assert mock_execute.call_args_list[1].args[3] is cube
+
+
+def test_run_pipeline_saves_output(tmp_path):
+    """Test a real command is run and its declared output saved"""
+    cube = set_up_variable_cube(
+        np.full((3, 3), 280, dtype=np.float32), spatial_grid="equalarea"
+    )
+    input_path = tmp_path / "input.nc"
+    output_path = tmp_path / "output.nc"
+    save_netcdf(cube, input_path)
+    steps = {
+        "threshold": {
+            "command": "threshold",
+            "args": [str(input_path), "--threshold-values", "275"],
+            "output": str(output_path),
+        }
+    }
+    run_pipeline(steps)
+    result = load_cube(str(output_path))
+    np.testing.assert_array_equal(result.data, np.ones((3, 3)))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the serve CLI worker functions"""
+
+import json
+
+import pytest
+
+from improver.cli.serve import parse_job, process, run_job
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    (
+        ('{"id": "a", "args": ["threshold", "in.nc"]}', ("a", ["threshold", "in.nc"])),
+        ('{"args": ["threshold", "in.nc"]}', (3, ["threshold", "in.nc"])),
+        ('["threshold", "in.nc", 1]', (3, ["threshold", "in.nc", "1"])),
+        (
+            "threshold 'in file.nc' -o out.nc",
+            (3, ["threshold", "in file.nc", "-o", "out.nc"]),
+        ),
+    ),
+)
+def test_parse_job(line, expected):
+    """Test job specifications in each of the supported forms"""
+    assert parse_job(line, 3) == expected
+
+
+@pytest.mark.parametrize(
+    "line, msg",
+    (
+        ('{"id": "a"}', "does not specify a list of arguments"),
+        ("[]", "does not specify a list of arguments"),
+        ("serve jobs.txt", "cannot start a nested worker"),
+        ('{"args": [', "Expecting value"),
+    ),
+)
+def test_parse_job_invalid(line, msg):
+    """Test invalid job specifications raise an error"""
+    with pytest.raises(ValueError, match=msg):
+        parse_job(line, 1)
+
+
+def test_run_job():
+    """Test a successful command has its output captured"""
+    result = run_job(["help", "threshold"])
+    assert result["exit_status"] == 0
+    assert result["stdout"].startswith("Usage: improver threshold")
+    assert result["stderr"] == ""
+    assert result["elapsed"] >= 0
+
+
+def test_run_job_unknown_command():
+    """Test an unknown command reports an argument error"""
+    result = run_job(["no-such-command"])
+    assert result["exit_status"] == 2
+    assert 'Unknown command "no-such-command"' in result["stderr"]
+
+
+def test_run_job_exception():
+    """Test an exception within a command is reported without being raised"""
+    result = run_job(["threshold", "no_such_file.nc", "--threshold-values", "1"])
+    assert result["exit_status"] == 1
+    assert "Traceback" in result["stderr"]
+
+
+def test_process(tmp_path, capsys):
+    """Test that each job writes one line of JSON in order"""
+    jobs = tmp_path / "jobs.txt"
+    jobs.write_text(
+        "# comment\n"
+        '{"id": "first", "args": ["help", "threshold"]}\n'
+        "\n"
+        "no-such-command\n"
+        "serve\n"
+    )
+    process(jobs)
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["id"] for record in records] == ["first", 4, 5]
+    assert [record["exit_status"] for record in records] == [0, 2, 2]
+
+
+if __name__ == "__main__":
+    pytest.main()
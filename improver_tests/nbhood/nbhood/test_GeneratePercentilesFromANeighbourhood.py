@@ -31,7 +31,10 @@
 """Unit tests for the nbhood.nbhood.GeneratePercentilesFromANeighbourhood plugin."""
 
 
+import importlib
 import unittest
+from unittest import skipIf
+from unittest.mock import patch
 
 import iris
 import numpy as np
@@ -39,12 +42,24 @@ from iris.cube import Cube
 from iris.tests import IrisTest
 
 from improver.constants import DEFAULT_PERCENTILES
-from improver.nbhood.nbhood import GeneratePercentilesFromANeighbourhood
+from improver.nbhood.nbhood import (
+    GeneratePercentilesFromANeighbourhood,
+    circular_kernel,
+)
 from improver.synthetic_data.set_up_test_cubes import (
     add_coordinate,
     set_up_variable_cube,
 )
 
+numba_installed = True
+try:
+    importlib.util.find_spec("numba")
+    from improver.nbhood.numba_utilities import (  # noqa: F401
+        fast_neighbourhood_percentiles,
+    )
+except ImportError:
+    numba_installed = False
+
 
 class Test_make_percentile_cube(IrisTest):
 
@@ -180,6 +195,20 @@ class Test_pad_and_unpad_cube(IrisTest):
         self.assertIsInstance(result, Cube)
         self.assertArrayAlmostEqual(result.data, expected)
 
+    @skipIf(not (numba_installed), "numba not installed")
+    def test_fast_percentiles_match_slow(self):
+        """Test that the percentiles calculated with numba for a circular
+        kernel match those calculated with numpy."""
+        data = np.random.default_rng(0).random((20, 24), dtype=np.float32)
+        cube = set_up_variable_cube(data, spatial_grid="equalarea")
+        kernel = circular_kernel(3, weighted_mode=False)
+        plugin = GeneratePercentilesFromANeighbourhood(2000)
+        plugin.percentiles = np.array([0, 10, 33.3, 50, 90, 100])
+        result = plugin.pad_and_unpad_cube(cube, kernel)
+        with patch.dict("sys.modules", numba=None):
+            expected = plugin.pad_and_unpad_cube(cube, kernel)
+        self.assertArrayAlmostEqual(result.data, expected.data, decimal=6)
+
     def test_single_point_almost_edge(self):
         """Test behaviour for a non-zero grid cell quite near the edge."""
 
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the nbhood.MultiRadiusNeighbourhoodProcessing plugin."""
+
+import unittest
+
+import numpy as np
+from iris.tests import IrisTest
+
+from improver.nbhood.nbhood import (
+    MultiRadiusNeighbourhoodProcessing,
+    NeighbourhoodProcessing,
+)
+from improver.synthetic_data.set_up_test_cubes import set_up_probability_cube
+
+
+class Test_process(IrisTest):
+
+    """Test the process method."""
+
+    def setUp(self):
+        """Set up a cube."""
+        data = np.ones((2, 9, 9), dtype=np.float32)
+        data[0, 4, 4] = 0
+        data[1, 2:5, 3] = 0
+        self.cube = set_up_probability_cube(
+            data,
+            thresholds=np.array([278, 281], dtype=np.float32),
+            spatial_grid="equalarea",
+        )
+        self.radii = [2000, 4000, 6000]
+
+    def test_matches_single_radius(self):
+        """Test that the result for each radius matches the result of
+        NeighbourhoodProcessing with that radius."""
+        for method in ["square", "circular"]:
+            result = MultiRadiusNeighbourhoodProcessing(method, self.radii)(
+                self.cube.copy()
+            )
+            self.assertEqual(result.shape, (3, 2, 9, 9))
+            self.assertEqual(result.coord_dims("radius_of_neighbourhood"), (0,))
+            self.assertArrayEqual(
+                result.coord("radius_of_neighbourhood").points, self.radii
+            )
+            for index, radius in enumerate(self.radii):
+                expected = NeighbourhoodProcessing(method, radius)(self.cube.copy())
+                self.assertArrayAlmostEqual(result.data[index], expected.data)
+
+    def test_mask_cube(self):
+        """Test that a mask cube is applied for every radius."""
+        mask_cube = self.cube[0].copy(data=np.ones((9, 9), dtype=np.int32))
+        mask_cube.data[:, 0] = 0
+        result = MultiRadiusNeighbourhoodProcessing("square", self.radii)(
+            self.cube.copy(), mask_cube=mask_cube
+        )
+        for index, radius in enumerate(self.radii):
+            expected = NeighbourhoodProcessing("square", radius)(
+                self.cube.copy(), mask_cube=mask_cube
+            )
+            self.assertArrayAlmostEqual(result.data[index], expected.data)
+            self.assertArrayEqual(result.data.mask[index], expected.data.mask)
+
+    def test_single_radius(self):
+        """Test that a single radius is returned as a dimension."""
+        result = MultiRadiusNeighbourhoodProcessing("square", [2000])(self.cube)
+        self.assertEqual(result.shape, (1, 2, 9, 9))
+        self.assertEqual(result.coord_dims("radius_of_neighbourhood"), (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,7 +31,9 @@
 """Unit tests for the nbhood.NeighbourhoodProcessing plugin."""
 
 
+import os
 import unittest
+from unittest.mock import patch
 
 import numpy as np
 from iris.coords import CellMethod
@@ -341,6 +343,25 @@ class Test__calculate_neighbourhood(IrisTest):
         self.assertArrayAlmostEqual(result.data, self.expected_array)
         self.assertArrayAlmostEqual(result.mask, self.expected_mask)
 
+    def test_single_precision(self):
+        """Test the _calculate_neighbourhood method gives the same result
+        when accumulating in 32-bit types, for masked data with square and
+        circular neighbourhoods."""
+        data = np.ma.masked_where(self.mask == 0, self.data_for_masked_tests)
+        for method, size in [("square", 3), ("circular", self.circular_kernel)]:
+            plugin = NeighbourhoodProcessing(method, self.RADIUS)
+            single_plugin = NeighbourhoodProcessing(
+                method, self.RADIUS, single_precision=True
+            )
+            for nbhood_plugin in [plugin, single_plugin]:
+                nbhood_plugin.nb_size = size
+                nbhood_plugin.kernel = size
+            expected = plugin._calculate_neighbourhood(data)
+            result = single_plugin._calculate_neighbourhood(data)
+            self.assertEqual(result.dtype, np.float32)
+            self.assertArrayAlmostEqual(result.data, expected.data)
+            self.assertArrayEqual(result.mask, expected.mask)
+
 
 class Test_process(IrisTest):
 
@@ -377,6 +398,38 @@ class Test_process(IrisTest):
         self.assertTupleEqual(result.cell_methods, self.cube.cell_methods)
         self.assertDictEqual(result.attributes, self.cube.attributes)
 
+    def test_batched_slices(self):
+        """Test that processing all slices at once gives the same result as
+        processing each slice, where the slices have different masks."""
+        data = np.ma.masked_array(self.cube.data, mask=False)
+        data.mask[0, 0, 0] = True
+        self.cube.data = data
+        plugin = NeighbourhoodProcessing("circular", 2000)
+        result = plugin(self.cube.copy())
+        xy_coords = ["projection_y_coordinate", "projection_x_coordinate"]
+        for index, cube_slice in enumerate(self.cube.slices(xy_coords)):
+            expected = plugin._calculate_neighbourhood(cube_slice.data)
+            self.assertArrayAlmostEqual(result.data[index], expected)
+            self.assertArrayEqual(result.data.mask[index], expected.mask)
+
+    def test_length_one_dimension(self):
+        """Test that a leading dimension of length one is returned as a
+        scalar coordinate, as when merging slices."""
+        cube = self.cube[:1]
+        result = NeighbourhoodProcessing("square", 2000)(cube)
+        self.assertEqual(result.shape, (5, 5))
+        self.assertEqual(result.coord_dims("air_temperature"), ())
+
+    def test_streaming(self):
+        """Test that streaming the slices of lazy data gives the same result,
+        without realising the input cube."""
+        expected = NeighbourhoodProcessing("square", 2000)(self.cube.copy())
+        cube = self.cube.copy(data=self.cube.lazy_data())
+        with patch.dict(os.environ, {"IMPROVER_STREAM_SLICES": "1"}):
+            result = NeighbourhoodProcessing("square", 2000)(cube)
+        self.assertTrue(cube.has_lazy_data())
+        self.assertEqual(result, expected)
+
     def test_cube_metadata(self):
         """Test the result has the correct attributes and cell methods"""
         neighbourhood_method = "square"
@@ -389,5 +442,46 @@ class Test_process(IrisTest):
         self.assertDictEqual(result.attributes, self.cube.attributes)
 
 
+class Test_process_with_masks(IrisTest):
+
+    """Test the process_with_masks method."""
+
+    def setUp(self):
+        """Set up a cube and two masks."""
+        data = np.ones((3, 5, 5), dtype=np.float32)
+        data[:, 2, 2] = 0
+        data[1, 0, 0] = 0
+        self.cube = set_up_probability_cube(
+            data,
+            thresholds=np.array([278, 281, 284], dtype=np.float32),
+            spatial_grid="equalarea",
+        )
+        self.masks = np.zeros((2, 5, 5), dtype=np.float32)
+        self.masks[0, :3] = 1
+        self.masks[1, 2:] = 1
+
+    def test_basic(self):
+        """Test each slice is processed with each mask, as by process."""
+        plugin = NeighbourhoodProcessing("square", 2000, re_mask=False)
+        result = plugin.process_with_masks(self.cube, self.masks)
+        self.assertEqual(result.shape, (3, 2, 5, 5))
+        self.assertEqual(result.dtype, np.float32)
+        for index, mask in enumerate(self.masks):
+            mask_cube = self.cube[0].copy(data=mask)
+            expected = plugin(self.cube.copy(), mask_cube=mask_cube)
+            self.assertArrayAlmostEqual(result[:, index], expected.data)
+
+    def test_weights(self):
+        """Test the weighted mean over the masks is returned where weights
+        are given, with NaNs excluded and the weights renormalised."""
+        weights = np.full((2, 5, 5), 0.5, dtype=np.float32)
+        plugin = NeighbourhoodProcessing("square", 2000, re_mask=False)
+        all_masks = plugin.process_with_masks(self.cube, self.masks)
+        result = plugin.process_with_masks(self.cube, self.masks, weights=weights)
+        self.assertEqual(result.shape, (3, 5, 5))
+        expected = np.nanmean(all_masks, axis=1)
+        self.assertArrayAlmostEqual(result, expected)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -30,8 +30,11 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Unit tests for the nbhood.RecursiveFilter plugin."""
 
+import importlib
 import unittest
 from datetime import timedelta
+from unittest import skipIf
+from unittest.mock import patch
 
 import iris
 import numpy as np
@@ -47,6 +50,13 @@ from improver.utilities.cube_manipulation import enforce_coordinate_ordering
 from improver.utilities.pad_spatial import pad_cube_with_halo
 from improver.utilities.warnings_handler import ManageWarnings
 
+numba_installed = True
+try:
+    importlib.util.find_spec("numba")
+    from improver.nbhood.numba_utilities import fast_recursive_filter  # noqa: F401
+except ImportError:
+    numba_installed = False
+
 
 def _mean_points(points):
     """Create an array of the mean of adjacent points in original array"""
@@ -460,6 +470,31 @@ class Test__run_recursion(Test_RecursiveFilter):
         )
         self.assertArrayAlmostEqual(unpadded_result, expected_result)
 
+    @skipIf(not (numba_installed), "numba not installed")
+    def test_fast_matches_slow(self):
+        """Test that the _run_recursion method gives the same result with and
+        without numba, including where y is not the first dimension."""
+        edge_width = 1
+        plugin = RecursiveFilter(edge_width=edge_width)
+        cube = iris.util.squeeze(self.cube)
+        cube.data = np.random.default_rng(0).random(cube.shape, dtype=np.float32)
+        for order in [["y", "x"], ["x", "y"]]:
+            cubes = [cube.copy()] + [
+                coeffs.copy() for coeffs in self.smoothing_coefficients_alternative
+            ]
+            for item in cubes:
+                enforce_coordinate_ordering(
+                    item, [item.coord(axis=axis).name() for axis in order]
+                )
+            coeffs_x, coeffs_y = plugin._pad_coefficients(*cubes[1:])
+            padded_cube = pad_cube_with_halo(cubes[0], 2 * edge_width, 2 * edge_width)
+            result = plugin._run_recursion(padded_cube.copy(), coeffs_x, coeffs_y, 2)
+            with patch.dict("sys.modules", numba=None):
+                expected = plugin._run_recursion(
+                    padded_cube.copy(), coeffs_x, coeffs_y, 2
+                )
+            self.assertArrayAlmostEqual(result.data, expected.data)
+
 
 class Test_process(Test_RecursiveFilter):
 
@@ -524,6 +559,30 @@ class Test_process(Test_RecursiveFilter):
         )
         self.assertArrayAlmostEqual(result.data[0], expected_result)
 
+    def test_multiple_slices(self):
+        """Test that filtering all x-y slices of a cube at once gives the
+        same result as filtering each slice in turn, as is done where x and y
+        are not the last dimensions."""
+        data = np.random.default_rng(0).random((3, 5, 5), dtype=np.float32)
+        cube = set_up_variable_cube(
+            data, name="precipitation_amount", units="kg m^-2 s^-1"
+        )
+        mask = np.zeros(cube.shape, dtype=bool)
+        mask[:, 3, 2] = True
+        cube.data = np.ma.MaskedArray(cube.data, mask=mask)
+        plugin = RecursiveFilter(iterations=2)
+        result = plugin(
+            cube.copy(), smoothing_coefficients=self.smoothing_coefficients_alternative
+        )
+        enforce_coordinate_ordering(cube, ["latitude", "realization"])
+        expected = plugin(
+            cube, smoothing_coefficients=self.smoothing_coefficients_alternative
+        )
+        enforce_coordinate_ordering(expected, ["realization", "latitude"])
+        self.assertEqual(result.coord_dims("realization"), (0,))
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertArrayEqual(result.data.mask, mask)
+
     def test_error_multiple_times_masked(self):
         """Test that the plugin raises an error when given a masked cube with
         multiple time points"""
@@ -368,6 +368,24 @@ class Test_process(unittest.TestCase):
         self.assertEqual(result.coords(), self.multi_threshold_cube.coords())
         self.assertEqual(result.metadata, self.multi_threshold_cube.metadata)
 
+    def test_collapse_multithreshold_different_data(self):
+        """Test process for a cube with 2 thresholds holding different data,
+        for which all thresholds and topographic zones are processed at once,
+        gives the same result as processing each threshold separately."""
+        self.multi_threshold_cube.data[0] = np.array(
+            [[1, 0, 1], [0, 1, 0], [1, 1, 1]], dtype=np.float32
+        )
+        plugin = ApplyNeighbourhoodProcessingWithAMask(
+            "topographic_zone", "circular", 2000, collapse_weights=self.weights_cube
+        )
+        result = plugin(self.multi_threshold_cube, self.mask_cube)
+        for index, threshold_slice in enumerate(
+            self.multi_threshold_cube.slices_over("air_temperature")
+        ):
+            expected = plugin(threshold_slice, self.mask_cube)
+            assert_allclose(result.data.data[index], expected.data.data, equal_nan=True)
+            assert_array_equal(result.data.mask[index], expected.data.mask)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the improver.BasePlugin plugin hooks"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from improver import BasePlugin, register_plugin_hook, unregister_plugin_hook
+
+
+class DummyPlugin(BasePlugin):
+    """Dummy class inheriting from the abstract base class"""
+
+    def process(self, value, scale=1):
+        """Local process method returns a scaled value"""
+        return value * scale
+
+
+def test_no_hooks():
+    """Test a plugin is called as normal with no hooks registered"""
+    assert DummyPlugin()(2, scale=3) == 6
+
+
+def test_hooks_entered_around_process():
+    """Test registered hooks are entered in order around the process call and
+    receive the plugin and its arguments"""
+    events = []
+
+    def hook_factory(label):
+        @contextmanager
+        def hook(plugin, args, kwargs):
+            events.append((label, "enter", type(plugin).__name__, args, kwargs))
+            yield
+            events.append((label, "exit"))
+
+        return hook
+
+    first, second = hook_factory("first"), hook_factory("second")
+    register_plugin_hook(first)
+    register_plugin_hook(second)
+    try:
+        result = DummyPlugin()(2, scale=3)
+    finally:
+        unregister_plugin_hook(first)
+        unregister_plugin_hook(second)
+    assert result == 6
+    assert events == [
+        ("first", "enter", "DummyPlugin", (2,), {"scale": 3}),
+        ("second", "enter", "DummyPlugin", (2,), {"scale": 3}),
+        ("second", "exit"),
+        ("first", "exit"),
+    ]
+
+
+def test_unregister_unknown_hook():
+    """Test removing a hook that is not registered raises an error"""
+    with pytest.raises(ValueError):
+        unregister_plugin_hook(lambda plugin, args, kwargs: None)
+
+
+if __name__ == "__main__":
+    pytest.main()
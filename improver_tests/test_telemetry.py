@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the improver.telemetry module"""
+
+import json
+import os
+import subprocess  # nosec
+import sys
+
+import dask.array as da
+import numpy as np
+import pytest
+from iris.cube import Cube, CubeList
+
+from improver import BasePlugin
+from improver.cli import main
+from improver.telemetry import (
+    PluginInstrumentation,
+    Telemetry,
+    describe_inputs,
+    instrumentation_stop,
+    telemetry_decorator,
+)
+
+
+class InnerPlugin(BasePlugin):
+    """Dummy plugin called by another plugin"""
+
+    def process(self, value):
+        """Return the value unchanged"""
+        return value
+
+
+class OuterPlugin(BasePlugin):
+    """Dummy plugin calling another plugin twice"""
+
+    def process(self, value):
+        """Return the value after passing it through the inner plugin twice"""
+        return InnerPlugin()(InnerPlugin()(value))
+
+
+def test_telemetry_plugin_calls():
+    """Test plugin calls are counted while the telemetry is active only"""
+    with Telemetry() as telemetry:
+        OuterPlugin()(1)
+    OuterPlugin()(1)
+    assert set(telemetry.plugins) == {"OuterPlugin", "InnerPlugin"}
+    assert telemetry.plugins["OuterPlugin"]["calls"] == 1
+    assert telemetry.plugins["InnerPlugin"]["calls"] == 2
+    assert (
+        telemetry.plugins["OuterPlugin"]["time"]
+        >= telemetry.plugins["InnerPlugin"]["time"]
+    )
+
+
+def command(dispatcher, prog_name, name, *args, **kwargs):
+    """Dummy command execution writing the input file to any output file"""
+    args = list(args)
+    if "--output" in args:
+        with open(args[args.index("--output") + 1], "w") as fout:
+            fout.write(open(args[0]).read() * 2)
+    if name == "fail":
+        raise ValueError("failed")
+    return OuterPlugin()(name)
+
+
+def test_telemetry_decorator(tmp_path):
+    """Test a record is written with the expected statistics"""
+    input_path = tmp_path / "input.txt"
+    input_path.write_text("1234")
+    output_path = tmp_path / "output.txt"
+    record_path = tmp_path / "telemetry.jsonl"
+    wrapped = telemetry_decorator(command, str(record_path))
+    args = [str(input_path), "--output", str(output_path)]
+    result = wrapped(None, "improver", "cmd", *args)
+    wrapped(None, "improver", "cmd", [str(input_path)])
+    assert result == "cmd"
+    first, second = [json.loads(line) for line in record_path.read_text().splitlines()]
+    assert first["command"] == "cmd"
+    assert first["status"] == "ok"
+    assert first["input_bytes"] == 4
+    assert first["output_bytes"] == 8
+    assert first["plugins"]["InnerPlugin"]["calls"] == 2
+    assert first["wall_time"] >= 0
+    assert first["cpu_time"] >= 0
+    assert first["peak_rss_mib"] > 0
+    assert second["input_bytes"] == 4
+    assert second["output_bytes"] == 0
+    assert first["args_digest"] != second["args_digest"]
+
+
+def test_telemetry_decorator_failure(tmp_path):
+    """Test a record is written with the exception name when a command fails"""
+    record_path = tmp_path / "telemetry.jsonl"
+    wrapped = telemetry_decorator(command, str(record_path))
+    with pytest.raises(ValueError, match="failed"):
+        wrapped(None, "improver", "fail")
+    record = json.loads(record_path.read_text())
+    assert record["status"] == "ValueError"
+
+
+def test_main_telemetry(tmp_path):
+    """Test the telemetry option of the improver main command"""
+    record_path = tmp_path / "telemetry.jsonl"
+    main.cli("improver", "--telemetry", str(record_path), "help", "threshold")
+    record = json.loads(record_path.read_text())
+    assert record["command"] == "help"
+    assert record["status"] == "ok"
+
+
+def test_describe_inputs():
+    """Test cubes and arrays are described without realising lazy data"""
+    lazy_cube = Cube(da.zeros((2, 3), chunks=(1, 3)), long_name="lazy")
+    real_cube = Cube(np.zeros((4,), dtype=np.float32), long_name="real")
+    array = np.ones((5, 5), dtype=np.int8)
+    result = describe_inputs(
+        (CubeList([lazy_cube, real_cube]), 3), {"mask": array, "name": "x"}
+    )
+    assert result == [
+        {
+            "argument": "0",
+            "shape": [2, 3],
+            "dtype": "float64",
+            "lazy": True,
+            "name": "lazy",
+        },
+        {
+            "argument": "0",
+            "shape": [4],
+            "dtype": "float32",
+            "lazy": False,
+            "name": "real",
+        },
+        {"argument": "mask", "shape": [5, 5], "dtype": "int8", "lazy": False},
+    ]
+    assert lazy_cube.has_lazy_data()
+
+
+def test_instrumentation_nested_calls():
+    """Test nested calls are recorded with their stacks and self times"""
+    with PluginInstrumentation() as instrumentation:
+        OuterPlugin()(np.zeros(3))
+    assert [call["stack"] for call in instrumentation.calls] == [
+        ["OuterPlugin", "InnerPlugin"],
+        ["OuterPlugin", "InnerPlugin"],
+        ["OuterPlugin"],
+    ]
+    inner, _, outer = instrumentation.calls
+    assert inner["inputs"] == [
+        {"argument": "0", "shape": [3], "dtype": "float64", "lazy": False}
+    ]
+    assert outer["self_time"] <= outer["time"]
+    assert set(instrumentation.collapsed_stacks()) == {
+        "OuterPlugin",
+        "OuterPlugin;InnerPlugin",
+    }
+
+
+def test_instrumentation_stop(tmp_path):
+    """Test the collapsed stacks and calls are written to file"""
+    prefix = str(tmp_path / "instrument")
+    instrumentation = PluginInstrumentation().__enter__()
+    OuterPlugin()(1)
+    instrumentation_stop(instrumentation, prefix)
+    OuterPlugin()(1)
+    stacks = open(f"{prefix}_STACKS").read().splitlines()
+    assert [line.split()[0] for line in stacks] == [
+        "OuterPlugin",
+        "OuterPlugin;InnerPlugin",
+    ]
+    assert all(line.split()[1].isdigit() for line in stacks)
+    calls = open(f"{prefix}_CALLS").read().splitlines()
+    assert len(calls) == 3
+
+
+def test_instrumentation_environment(tmp_path):
+    """Test instrumentation is enabled by the environment variable"""
+    prefix = str(tmp_path / "instrument")
+    env = dict(os.environ, IMPROVER_PLUGIN_INSTRUMENTATION=prefix)
+    script = (
+        "import improver\n"
+        "class Plugin(improver.BasePlugin):\n"
+        "    def process(self):\n"
+        "        return 1\n"
+        "Plugin()()\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)  # nosec
+    assert open(f"{prefix}_STACKS").read().startswith("Plugin ")
+
+
+if __name__ == "__main__":
+    pytest.main()
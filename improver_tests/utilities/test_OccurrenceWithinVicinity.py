@@ -31,7 +31,9 @@
 """Unit tests for the utilities.OccurrenceWithinVicinity plugin."""
 
 import datetime
+import os
 from typing import Tuple
+from unittest.mock import patch
 
 import numpy as np
 import pytest
@@ -444,6 +446,30 @@ def test_no_realization_or_time(request, cube_with_realizations, land_fixture):
     assert np.allclose(result.data, expected)
 
 
+@pytest.mark.parametrize("land_fixture", [None, "all_land_cube"])
+@pytest.mark.parametrize("ndim", [2, 3, 4])
+def test_streaming(request, cube_with_realizations, land_fixture, ndim):
+    """Test that streaming the x-y slices gives the same cube as merging
+    them."""
+    cube = cube_with_realizations
+    land = request.getfixturevalue(land_fixture) if land_fixture else None
+    cube.data[0, 2, 1] = 1.0
+    cube.data[1, 1, 3] = 1.0
+    if ndim == 2:
+        cube = cube[0]
+    elif ndim == 4:
+        cube = add_coordinate(
+            cube, TIMESTEPS, "time", order=[1, 0, 2, 3], is_datetime=True,
+        )
+    plugin = OccurrenceWithinVicinity(radius=RADIUS, land_mask_cube=land)
+    with patch.dict(os.environ, {"IMPROVER_STREAM_SLICES": ""}):
+        expected = plugin(cube)
+    with patch.dict(os.environ, {"IMPROVER_STREAM_SLICES": "1"}):
+        result = plugin(cube)
+    assert result == expected
+    assert result.dtype == expected.dtype
+
+
 @pytest.mark.parametrize("radius", [0, 2000])
 def test_two_radii_provided_exception(cube, radius):
     """Test an exception is raised if both radius and grid_point_radius are
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the ancillary cache."""
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from iris.cube import CubeList
+
+from improver.synthetic_data.set_up_test_cubes import set_up_variable_cube
+from improver.utilities import ancillary_cache
+from improver.utilities.ancillary_cache import AncillaryCache, load_ancillary
+from improver.utilities.load import load_cube, load_cubelist
+from improver.utilities.save import save_netcdf
+
+
+@pytest.fixture(name="mask_path")
+def mask_path_fixture(tmp_path):
+    """Write a land-sea mask to file"""
+    data = np.array([[0, 1, 1], [0, 0, 1], [1, 1, 1]], dtype=np.int32)
+    cube = set_up_variable_cube(
+        data, name="land_binary_mask", units="1", spatial_grid="equalarea"
+    )
+    path = tmp_path / "mask.nc"
+    save_netcdf(cube, str(path))
+    return str(path)
+
+
+def counting_loader():
+    """Loader recording the number of loads"""
+    calls = []
+
+    def loader(filepath, constraints=None):
+        calls.append(filepath)
+        return load_cube(filepath, constraints=constraints)
+
+    return loader, calls
+
+
+def test_load_once(mask_path):
+    """Test a file is loaded once and each load gets a realised copy"""
+    loader, calls = counting_loader()
+    cache = AncillaryCache()
+    first = cache.load(mask_path, loader=loader)
+    first.data[:] = 5
+    second = cache.load(mask_path, loader=loader)
+    assert len(calls) == 1
+    assert not second.has_lazy_data()
+    assert second == load_cube(mask_path)
+    assert len(cache) == 1
+    assert cache.nbytes == second.data.nbytes
+
+
+def test_constraints(mask_path):
+    """Test loads with different constraints are cached separately"""
+    loader, calls = counting_loader()
+    cache = AncillaryCache()
+    cache.load(mask_path, loader=loader)
+    cache.load(mask_path, constraints="land_binary_mask", loader=loader)
+    assert len(calls) == 2
+    assert len(cache) == 2
+
+
+def test_modified_file(mask_path):
+    """Test a replaced file is loaded again, discarding the old entry"""
+    loader, calls = counting_loader()
+    cache = AncillaryCache()
+    cache.load(mask_path, loader=loader)
+    cube = load_cube(mask_path)
+    cube.data = 1 - cube.data
+    save_netcdf(cube, mask_path)
+    stat = os.stat(mask_path)
+    os.utime(mask_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    result = cache.load(mask_path, loader=loader)
+    assert len(calls) == 2
+    assert len(cache) == 1
+    np.testing.assert_array_equal(result.data, cube.data)
+
+
+def test_eviction(mask_path, tmp_path):
+    """Test the least recently used entries are discarded to keep within the
+    size limit, and entries larger than the limit are not kept"""
+    nbytes = load_cube(mask_path).data.nbytes
+    other_path = str(tmp_path / "other.nc")
+    save_netcdf(load_cube(mask_path), other_path)
+    loader, calls = counting_loader()
+    cache = AncillaryCache(max_size=1.5 * nbytes / 1024 / 1024)
+    cache.load(mask_path, loader=loader)
+    cache.load(other_path, loader=loader)
+    cache.load(mask_path, loader=loader)
+    assert len(calls) == 3
+    assert len(cache) == 1
+    assert cache.nbytes == nbytes
+    cache = AncillaryCache(max_size=0.5 * nbytes / 1024 / 1024)
+    cache.load(mask_path)
+    assert len(cache) == 0
+
+
+def test_cubelist(mask_path):
+    """Test a cubelist can be cached"""
+    cache = AncillaryCache()
+    cache.load(mask_path, loader=load_cubelist)
+    result = cache.load(mask_path, loader=load_cubelist)
+    assert isinstance(result, CubeList)
+    assert result == load_cubelist(mask_path)
+
+
+@pytest.mark.parametrize("masked", (False, True))
+def test_directory(mask_path, tmp_path, masked):
+    """Test data saved to the cache directory is memory-mapped by another
+    cache without loading the file, and does not count towards the size of
+    the data held in memory"""
+    if masked:
+        cube = load_cube(mask_path)
+        cube.data = np.ma.masked_equal(cube.data, 0)
+        save_netcdf(cube, mask_path)
+    expected = load_cube(mask_path)
+    directory = str(tmp_path / "cache")
+    loader, calls = counting_loader()
+    AncillaryCache(directory=directory).load(mask_path, loader=loader)
+    calls.clear()
+    cache = AncillaryCache(directory=directory)
+    result = cache.load(mask_path, loader=loader)
+    assert not calls
+    assert result == expected
+    assert np.ma.is_masked(result.data) == masked
+    assert len(cache) == 1
+    assert cache.nbytes == 0
+    (entry,) = os.listdir(directory)
+    assert os.path.exists(os.path.join(directory, entry, "metadata.json"))
+    result.data[0, 0] = 7
+    assert cache.load(mask_path, loader=loader) == expected
+
+
+def test_directory_other_constraints(mask_path, tmp_path):
+    """Test loads with constraints other than names are not saved to disk"""
+    directory = tmp_path / "cache"
+    cache = AncillaryCache(directory=str(directory))
+    constraint = ancillary_cache.Constraint("land_binary_mask")
+    cache.load(mask_path, constraints=constraint)
+    assert not directory.exists()
+    cache.load(mask_path, constraints="land_binary_mask")
+    assert len(list(directory.iterdir())) == 1
+
+
+def test_load_ancillary(mask_path, tmp_path):
+    """Test the shared cache is configured from the environment"""
+    environ = {
+        "IMPROVER_ANCILLARY_CACHE_SIZE": "2",
+        "IMPROVER_ANCILLARY_CACHE_DIR": str(tmp_path / "cache"),
+    }
+    with patch.object(ancillary_cache, "_ANCILLARY_CACHE", None), patch.dict(
+        os.environ, environ
+    ):
+        load_ancillary(mask_path)
+        cache = ancillary_cache.ancillary_cache()
+        assert cache.max_bytes == 2 * 1024 * 1024
+        assert len(cache) == 1
+        assert (tmp_path / "cache").is_dir()
+
+
+if __name__ == "__main__":
+    pytest.main()
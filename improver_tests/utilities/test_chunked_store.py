@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the chunked directory store."""
+
+import json
+import os
+
+import numpy as np
+import pytest
+from iris.coords import CellMethod, DimCoord
+from iris.cube import CubeList
+
+from improver.synthetic_data.set_up_test_cubes import (
+    set_up_probability_cube,
+    set_up_variable_cube,
+)
+from improver.utilities.chunked_store import (
+    METADATA_FILENAME,
+    initialise_store,
+    is_store,
+    load_store,
+    write_chunk,
+)
+from improver.utilities.load import load_cube, load_cubelist
+from improver.utilities.save import save_netcdf
+
+
+@pytest.fixture(name="cube")
+def cube_fixture():
+    """Set up a realization cube"""
+    data = np.arange(18, dtype=np.float32).reshape((2, 3, 3)) + 273.15
+    return set_up_variable_cube(data, spatial_grid="equalarea")
+
+
+def test_is_store():
+    """Test stores are identified by their extension"""
+    assert is_store("output.npystore")
+    assert is_store("output.npystore/")
+    assert not is_store("output.nc")
+
+
+@pytest.mark.parametrize("masked", (False, True))
+def test_round_trip(cube, tmp_path, masked):
+    """Test a cube loaded from a store matches the cube saved, and that its
+    data are loaded lazily"""
+    if masked:
+        cube.data = np.ma.masked_greater(cube.data, 285)
+    save_netcdf(cube.copy(), str(tmp_path / "cube.npystore"))
+    result = load_cube(str(tmp_path / "cube.npystore"))
+    assert result.has_lazy_data()
+    assert result == cube
+    assert np.ma.is_masked(result.data) == masked
+    mask_path = tmp_path / "cube.npystore" / "0" / "1.mask.npy"
+    assert mask_path.exists() == masked
+
+
+def test_metadata(cube, tmp_path):
+    """Test the metadata are saved as JSON, including the coordinate system
+    and the types of attributes and cell methods"""
+    cube.attributes["number_of_members"] = np.int32(3)
+    cube.add_cell_method(CellMethod("maximum", coords="time", intervals="1 hour"))
+    path = tmp_path / "cube.npystore"
+    save_netcdf(cube.copy(), str(path))
+    with open(str(path / METADATA_FILENAME)) as stream:
+        (metadata,) = json.load(stream)
+    assert metadata["shape"] == [2, 3, 3]
+    result = load_cube(str(path))
+    assert result == cube
+    assert result.coord(axis="x").coord_system == cube.coord(axis="x").coord_system
+    assert result.attributes["number_of_members"].dtype == np.int32
+
+
+def test_scalar_dim_coord(cube, tmp_path):
+    """Test scalar coordinates which are DimCoords, such as the time
+    coordinates of a slice, are restored as scalar DimCoords"""
+    cube = cube[0]
+    assert isinstance(cube.coord("time"), DimCoord)
+    assert isinstance(cube.coord("realization"), DimCoord)
+    path = str(tmp_path / "cube.npystore")
+    save_netcdf(cube.copy(), path)
+    (result,) = load_store(path)
+    assert result == cube
+    assert result.coord_dims("realization") == ()
+    assert isinstance(result.coord("realization"), DimCoord)
+    assert result.dim_coords == cube.dim_coords
+
+
+def test_probability_cube(tmp_path):
+    """Test the threshold coordinate of a probability cube is preserved"""
+    cube = set_up_probability_cube(
+        np.ones((2, 3, 3), dtype=np.float32), np.array([280, 290], dtype=np.float32)
+    )
+    save_netcdf(cube.copy(), str(tmp_path / "cube.npystore"))
+    result = load_cube(str(tmp_path / "cube.npystore"))
+    assert result == cube
+    assert result.coord("air_temperature").var_name == "threshold"
+
+
+def test_replace(cube, tmp_path):
+    """Test saving over an existing store replaces it"""
+    path = str(tmp_path / "cube.npystore")
+    save_netcdf(cube.copy(), path)
+    cube.data = cube.data + 1
+    save_netcdf(cube.copy(), path)
+    np.testing.assert_array_equal(load_cube(path).data, cube.data)
+    assert os.listdir(str(tmp_path)) == ["cube.npystore"]
+
+
+def test_constraints(cube, tmp_path):
+    """Test constraints are applied to the cubes in a store"""
+    other = cube.copy()
+    other.rename("wind_speed")
+    other.units = "m s-1"
+    path = str(tmp_path / "cubes.npystore")
+    save_netcdf(CubeList([cube, other]), path)
+    assert len(load_store(path)) == 2
+    result = load_cubelist(path, constraints="wind_speed")
+    assert [item.name() for item in result] == ["wind_speed"]
+
+
+def test_write_chunk(cube, tmp_path):
+    """Test chunks can be written separately into an initialised store"""
+    path = str(tmp_path / "cube.npystore")
+    initialise_store(cube, path)
+    for index in (1, 0):
+        write_chunk(path, cube[index].data, chunk_index=index)
+    (result,) = load_store(path)
+    np.testing.assert_array_equal(result.data, cube.data)
+    np.testing.assert_array_equal(result[1].data, cube[1].data)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -46,7 +46,7 @@ from improver.synthetic_data.set_up_test_cubes import (
     set_up_probability_cube,
     set_up_variable_cube,
 )
-from improver.utilities.load import load_cube, load_cubelist
+from improver.utilities.load import load_cube, load_cubelist, load_cubes
 from improver.utilities.save import save_netcdf
 
 
@@ -438,6 +438,58 @@ class Test_load_cubelist(IrisTest):
         result = load_cubelist([self.filepath, self.filepath])
         self.assertArrayEqual([True, True], [_.has_lazy_data() for _ in result])
 
+    def test_max_workers(self):
+        """Test that loading files in worker processes returns the same
+        cubes in the same order as loading them one at a time."""
+        low_cloud_cube = self.cube.copy()
+        low_cloud_cube.rename("low_type_cloud_area_fraction")
+        low_cloud_cube.units = 1
+        save_netcdf(low_cloud_cube, self.low_cloud_filepath)
+        filepaths = [self.low_cloud_filepath, self.filepath, self.low_cloud_filepath]
+        expected = load_cubelist(filepaths)
+        result = load_cubelist(filepaths, max_workers=2)
+        self.assertEqual(result, expected)
+        self.assertEqual(
+            [cube.name() for cube in result],
+            [
+                "low_type_cloud_area_fraction",
+                "air_temperature",
+                "low_type_cloud_area_fraction",
+            ],
+        )
+
+
+class Test_load_cubes(IrisTest):
+
+    """Test the load_cubes function."""
+
+    def setUp(self):
+        """Set up variables for use in testing."""
+        self.directory = mkdtemp()
+        self.filepaths = []
+        for value in range(3):
+            cube = set_up_variable_cube(np.full((3, 3), value, dtype=np.float32))
+            self.filepaths.append(os.path.join(self.directory, f"temp{value}.nc"))
+            save_netcdf(cube, self.filepaths[-1])
+
+    def tearDown(self):
+        """Remove temporary directories created for testing."""
+        for filepath in self.filepaths:
+            os.remove(filepath)
+        os.rmdir(self.directory)
+
+    def test_basic(self):
+        """Test that each file is loaded into a cube, in order."""
+        result = load_cubes(self.filepaths)
+        self.assertEqual(result, [load_cube(path) for path in self.filepaths])
+
+    def test_max_workers(self):
+        """Test that loading files in worker processes returns the cubes in
+        order."""
+        result = load_cubes(self.filepaths, no_lazy_load=True, max_workers=2)
+        self.assertEqual([cube.data[0, 0] for cube in result], [0, 1, 2])
+        self.assertFalse(any(cube.has_lazy_data() for cube in result))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the metadata index."""
+
+import json
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from improver.synthetic_data.set_up_test_cubes import (
+    set_up_probability_cube,
+    set_up_variable_cube,
+)
+from improver.utilities import metadata_index
+from improver.utilities.chunked_store import save_store
+from improver.utilities.load import load_cube
+from improver.utilities.metadata_index import (
+    INDEX_FILENAME,
+    CubeHeader,
+    MetadataIndex,
+    header_matches,
+    load_headers,
+    read_netcdf_header,
+    read_store_header,
+)
+from improver.utilities.save import save_netcdf
+
+
+@pytest.fixture(name="directory")
+def directory_fixture(tmp_path):
+    """Write forecasts for two days and a probability cube to a directory"""
+    for day in (10, 11):
+        cube = set_up_variable_cube(
+            np.full((3, 3), day, dtype=np.float32),
+            time=datetime(2017, 11, day, 4, 0),
+            frt=datetime(2017, 11, day, 0, 0),
+            attributes={"mosg__model_configuration": "uk_det"},
+        )
+        save_netcdf(cube, str(tmp_path / f"forecast_{day}.nc"))
+    cube = set_up_probability_cube(
+        np.ones((2, 3, 3), dtype=np.float32), np.array([280, 290], dtype=np.float32),
+    )
+    save_netcdf(cube, str(tmp_path / "probability.nc"))
+    return str(tmp_path)
+
+
+def test_read_netcdf_header(directory):
+    """Test the header matches the metadata of the loaded cube"""
+    path = os.path.join(directory, "forecast_10.nc")
+    (header,) = read_netcdf_header(path)
+    cube = load_cube(path)
+    assert header.filepath == path
+    assert header.name() == cube.name()
+    assert header.units == str(cube.units)
+    assert header.shape == cube.shape
+    assert header.attributes == cube.attributes
+    assert set(header.coords) == {coord.name() for coord in cube.coords()}
+    assert header.coord("time")["points"] == cube.coord("time").points.item()
+    assert header.coord("latitude")["points"] == cube.coord("latitude").points.tolist()
+
+
+def test_read_store_header(directory):
+    """Test the header of a store matches the metadata of the cube saved
+    there"""
+    cube = load_cube(os.path.join(directory, "forecast_10.nc"))
+    path = os.path.join(directory, "forecast_10.npystore")
+    save_store(cube, path)
+    (header,) = read_store_header(path)
+    assert header.filepath == path
+    assert header.name() == cube.name()
+    assert header.units == str(cube.units)
+    assert header.shape == cube.shape
+    assert header.dims == ("latitude", "longitude")
+    assert header.attributes == cube.attributes
+    assert set(header.coords) == {coord.name() for coord in cube.coords()}
+    assert header.coord("time")["points"] == cube.coord("time").points.item()
+    assert header.coord("latitude")["points"] == cube.coord("latitude").points.tolist()
+
+
+def test_read_netcdf_header_probability(directory):
+    """Test the threshold coordinate of a probability cube is read"""
+    (header,) = read_netcdf_header(os.path.join(directory, "probability.nc"))
+    assert header.name() == "probability_of_air_temperature_above_threshold"
+    assert header.coord("air_temperature")["points"] == [280, 290]
+
+
+def test_header_dict(directory):
+    """Test a header is recreated from its dictionary"""
+    (header,) = read_netcdf_header(os.path.join(directory, "forecast_10.nc"))
+    result = CubeHeader.from_dict(header.to_dict())
+    assert result.to_dict() == header.to_dict()
+
+
+def test_header_matches(directory):
+    """Test headers are matched on name, attributes and coordinates"""
+    (header,) = read_netcdf_header(os.path.join(directory, "forecast_10.nc"))
+    point = header.coord("time")["points"]
+    assert header_matches(header)
+    assert header_matches(header, name="air_temperature")
+    assert not header_matches(header, name="wind_speed")
+    assert header_matches(header, attributes={"mosg__model_configuration": "uk_det"})
+    assert not header_matches(header, attributes={"mosg__model_configuration": "x"})
+    assert header_matches(header, coords={"time": point})
+    assert not header_matches(header, coords={"time": point + 1})
+    assert header_matches(header, coords={"time": lambda points: points[0] > 0})
+    assert not header_matches(header, coords={"realization": 0})
+
+
+def test_index_select(directory):
+    """Test files are selected from the index, which is saved"""
+    index = MetadataIndex(directory)
+    result = index.select(name="air_temperature")
+    assert result == [
+        os.path.join(directory, "forecast_10.nc"),
+        os.path.join(directory, "forecast_11.nc"),
+    ]
+    assert os.path.exists(os.path.join(directory, INDEX_FILENAME))
+    (header,) = read_netcdf_header(os.path.join(directory, "forecast_11.nc"))
+    time = header.coord("time")["points"]
+    result = index.select(coords={"time": time})
+    assert result == [os.path.join(directory, "forecast_11.nc")]
+
+
+def test_index_reads_new_files_only(directory):
+    """Test a saved index only reads the headers of new or modified files"""
+    MetadataIndex(directory).update()
+    path = os.path.join(directory, "forecast_10.nc")
+    cube = load_cube(path)
+    cube.rename("wind_speed")
+    save_netcdf(cube, path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    with patch.object(
+        metadata_index, "read_netcdf_header", wraps=read_netcdf_header
+    ) as reader:
+        result = MetadataIndex(directory).select(name="wind_speed")
+    assert result == [path]
+    reader.assert_called_once_with(path)
+
+
+def test_index_path(directory, tmp_path):
+    """Test the index can be saved outside the indexed directory"""
+    index_path = str(tmp_path / "index.json")
+    MetadataIndex(directory, index_path=index_path).update()
+    assert os.path.exists(index_path)
+
+
+def test_load_headers(directory):
+    """Test headers are returned in the order of the files"""
+    paths = [
+        os.path.join(directory, "probability.nc"),
+        os.path.join(directory, "forecast_10.nc"),
+    ]
+    result = load_headers(paths)
+    assert [header.filepath for header in result] == paths
+    assert [header.name() for header in result] == [
+        "probability_of_air_temperature_above_threshold",
+        "air_temperature",
+    ]
+
+
+def test_load_headers_no_index(directory):
+    """Test only the given files are read and no index is saved by default"""
+    path = os.path.join(directory, "forecast_10.nc")
+    with patch.object(
+        metadata_index, "read_netcdf_header", wraps=read_netcdf_header
+    ) as reader:
+        load_headers([path])
+    reader.assert_called_once_with(path)
+    assert not os.path.exists(os.path.join(directory, INDEX_FILENAME))
+
+
+@pytest.mark.parametrize("use_index", (True, None))
+def test_load_headers_index(directory, monkeypatch, use_index):
+    """Test the index is used and saved when asked for, holding only the
+    given files"""
+    monkeypatch.setenv("IMPROVER_METADATA_INDEX", "1")
+    paths = [os.path.join(directory, "forecast_10.nc")]
+    with patch.object(
+        metadata_index, "read_netcdf_header", wraps=read_netcdf_header
+    ) as reader:
+        load_headers(paths, use_index=use_index)
+        result = load_headers(paths, use_index=use_index)
+    reader.assert_called_once_with(paths[0])
+    assert [header.filepath for header in result] == paths
+    with open(os.path.join(directory, INDEX_FILENAME)) as index_file:
+        assert list(json.load(index_file)) == ["forecast_10.nc"]
+
+
+@pytest.mark.parametrize("use_index", (True, False))
+def test_load_headers_store(directory, use_index):
+    """Test the headers of stores are read from their metadata and are not
+    indexed"""
+    store_path = os.path.join(directory, "forecast_11.npystore")
+    save_store(load_cube(os.path.join(directory, "forecast_11.nc")), store_path)
+    paths = [os.path.join(directory, "forecast_10.nc"), store_path]
+    result = load_headers(paths, use_index=use_index)
+    assert [header.filepath for header in result] == paths
+    assert [header.name() for header in result] == ["air_temperature"] * 2
+    if use_index:
+        with open(os.path.join(directory, INDEX_FILENAME)) as index_file:
+            assert list(json.load(index_file)) == ["forecast_10.nc"]
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -32,9 +32,14 @@
 
 import numpy as np
 import pytest
+from scipy.ndimage import correlate
 
+from improver.nbhood.nbhood import circular_kernel
 from improver.utilities.neighbourhood_tools import (
     boxsum,
+    boxsums,
+    circular_sum,
+    compensated_cumsum,
     pad_and_roll,
     pad_boxsum,
     rolling_window,
@@ -211,3 +216,68 @@ def test_boxsum_exception_not_odd(array_size_5):
     with pytest.raises(ValueError) as exc_info:
         boxsum(array_size_5, (1, 2))
     assert msg in str(exc_info.value)
+
+
+@pytest.mark.parametrize("weighted_mode", (False, True))
+@pytest.mark.parametrize("ranges", (1, 2, 5))
+def test_circular_sum(ranges, weighted_mode):
+    """Test circular neighbourhood totals match scipy correlate."""
+    data = np.random.default_rng(0).random((2, 20, 25))
+    data[data < 0.3] = 0
+    kernel = circular_kernel(ranges, weighted_mode)
+    result = circular_sum(data, kernel, mode="edge")
+    expected = correlate(data, kernel[np.newaxis], mode="nearest")
+    np.testing.assert_allclose(result, expected, atol=1e-10)
+
+
+def test_circular_sum_other_kernel(array_size_5):
+    """Test a kernel which is not circular falls back to scipy correlate."""
+    kernel = np.ones((3, 3))
+    kernel[0, 0] = 2
+    result = circular_sum(array_size_5.astype(np.float64), kernel, mode="edge")
+    expected = correlate(array_size_5.astype(np.float64), kernel, mode="nearest")
+    np.testing.assert_allclose(result, expected)
+
+
+def test_compensated_cumsum():
+    """Test the compensated cumulative sum of many small float32 values is
+    accurate, where a plain float32 cumulative sum is not."""
+    data = np.full((3, 100000), 0.1, dtype=np.float32)
+    totals, errors = compensated_cumsum(data, axis=-1)
+    assert totals.shape == (3, 100001)
+    assert totals.dtype == np.float32
+    expected = np.arange(100001) * np.float64(np.float32(0.1))
+    result = totals.astype(np.float64) + errors
+    np.testing.assert_allclose(result[0], expected, rtol=1e-7)
+    assert not np.allclose(np.cumsum(data[0])[-1], expected[-1], rtol=1e-5)
+
+
+@pytest.mark.parametrize("data_type", (np.float32, np.complex64, bool))
+def test_boxsums_compensated(data_type):
+    """Test square neighbourhood totals calculated with compensated
+    summation in the type of the data match those calculated in 64-bit
+    types."""
+    data = np.random.default_rng(0).random((2, 40, 50)) * 100
+    if data_type == np.complex64:
+        data = data + 1j * data[..., ::-1]
+    elif data_type == bool:
+        data = data > 30
+    data = data.astype(data_type)
+    expected = boxsums(data.astype(np.complex128), [3, 21], mode="constant")
+    result = boxsums(data, [3, 21], compensated=True, mode="constant")
+    for result_array, expected_array in zip(result, expected):
+        assert result_array.dtype == np.result_type(data_type, np.float32)
+        np.testing.assert_allclose(result_array, expected_array, rtol=1e-6)
+
+
+@pytest.mark.parametrize("weighted_mode", (False, True))
+def test_circular_sum_compensated(weighted_mode):
+    """Test circular neighbourhood totals calculated with compensated
+    summation match scipy correlate, with weighted kernels summed in 64-bit
+    types."""
+    data = np.random.default_rng(0).random((2, 40, 50)).astype(np.float32)
+    kernel = circular_kernel(8, weighted_mode)
+    result = circular_sum(data, kernel, compensated=True, mode="edge")
+    expected = correlate(data.astype(np.float64), kernel[np.newaxis], mode="nearest")
+    assert result.dtype == (np.float64 if weighted_mode else np.float32)
+    np.testing.assert_allclose(result, expected, rtol=1e-6)
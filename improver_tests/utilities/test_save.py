@@ -33,6 +33,7 @@
 import os
 import unittest
 from tempfile import mkdtemp
+from unittest.mock import patch
 
 import iris
 import numpy as np
@@ -146,6 +147,44 @@ class Test_save_netcdf(IrisTest):
         with self.assertRaises(ValueError):
             save_netcdf(self.cube, self.filepath, compression_level=10)
 
+    def test_shuffle(self):
+        """ Test the shuffle filter is applied by default and can be disabled """
+        save_netcdf(self.cube, self.filepath)
+        with Dataset(self.filepath, mode="r") as data:
+            self.assertTrue(data.variables["air_temperature"].filters()["shuffle"])
+        save_netcdf(self.cube, self.filepath, shuffle=False)
+        with Dataset(self.filepath, mode="r") as data:
+            self.assertFalse(data.variables["air_temperature"].filters()["shuffle"])
+
+    def test_scratch_profile(self):
+        """ Test data is not compressed when saved with the scratch profile,
+        unless a compression level is given """
+        save_netcdf(self.cube, self.filepath, profile="scratch")
+        with Dataset(self.filepath, mode="r") as data:
+            self.assertFalse(data.variables["air_temperature"].filters()["zlib"])
+        save_netcdf(self.cube, self.filepath, compression_level=2, profile="scratch")
+        with Dataset(self.filepath, mode="r") as data:
+            self.assertEqual(
+                data.variables["air_temperature"].filters()["complevel"], 2
+            )
+
+    def test_profile_from_environment(self):
+        """ Test the save profile is taken from the environment """
+        with patch.dict(os.environ, {"IMPROVER_SAVE_PROFILE": "scratch"}):
+            save_netcdf(self.cube, self.filepath)
+        with Dataset(self.filepath, mode="r") as data:
+            self.assertFalse(data.variables["air_temperature"].filters()["zlib"])
+
+    def test_profile_invalid(self):
+        """ Test ValueError raised for an unknown save profile """
+        with self.assertRaisesRegex(ValueError, "Unknown save profile"):
+            save_netcdf(self.cube, self.filepath, profile="fast")
+
+    def test_chunking_invalid(self):
+        """ Test ValueError raised for an unknown chunking strategy """
+        with self.assertRaisesRegex(ValueError, "Unknown chunking"):
+            save_netcdf(self.cube, self.filepath, chunking="rows")
+
     def test_basic_cube_list(self):
         """
         Test functionality for saving iris.cube.CubeList
@@ -292,6 +331,26 @@ def test_least_significant_digit(bitshaving_cube, tmp_path, lsd, compress):
     assert np.max(abs_diff) < 10 ** (-1.0 * lsd)
 
 
+@pytest.mark.parametrize(
+    "chunking, tile_size, expected",
+    (
+        ("slice", 64, [1, 1, 3, 3]),
+        ("tile", 2, [1, 1, 2, 2]),
+        ("column", 2, [2, 1, 2, 2]),
+    ),
+)
+def test_chunking(tmp_path, chunking, tile_size, expected):
+    """ Test the chunk sizes of each chunking strategy """
+    cube = set_up_variable_cube(np.ones((2, 3, 3), dtype=np.float32))
+    cube = iris.util.new_axis(cube, "time")
+    cube.transpose([1, 0, 2, 3])
+    filepath = str(tmp_path / "temp.nc")
+    with patch("improver.utilities.save.TILE_SIZE", tile_size):
+        save_netcdf(cube, filepath, chunking=chunking)
+    with Dataset(filepath, mode="r") as data:
+        assert data.variables["air_temperature"].chunking() == expected
+
+
 class Test__order_cell_methods(IrisTest):
     """ Test function that sorts cube cell_methods before saving. """
 
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown copyright. The Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for streaming the x-y slices of cubes."""
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from improver.synthetic_data.set_up_test_cubes import set_up_variable_cube
+from improver.utilities.streaming import is_masked, stream_xy_slices, streaming_enabled
+
+
+@pytest.fixture(name="cube")
+def cube_fixture():
+    """Set up a lazily loaded realization cube"""
+    data = np.arange(36, dtype=np.float32).reshape((2, 3, 6))
+    cube = set_up_variable_cube(data, spatial_grid="equalarea")
+    return cube.copy(data=cube.lazy_data())
+
+
+@pytest.mark.parametrize(
+    "value, expected", (("", False), ("0", False), ("1", True), ("true", True))
+)
+def test_streaming_enabled(value, expected):
+    """Test streaming is enabled from the environment"""
+    with patch.dict(os.environ, {"IMPROVER_STREAM_SLICES": value}):
+        assert streaming_enabled() == expected
+
+
+def test_stream_xy_slices(cube):
+    """Test each slice is processed without realising the input, giving a cube
+    with the same dimensions"""
+    shapes = []
+
+    def function(cube_slice):
+        shapes.append(cube_slice.shape)
+        return cube_slice.data.astype(np.float64) * 2
+
+    result = stream_xy_slices(cube, function)
+    assert cube.has_lazy_data()
+    assert shapes == [(3, 6), (3, 6)]
+    assert result.dtype == np.float64
+    assert result.metadata == cube.metadata
+    assert result.coords() == cube.coords()
+    np.testing.assert_array_equal(result.data, cube.data * 2)
+
+
+def test_stream_xy_slices_transposed(cube):
+    """Test slices are given to the function ordered y then x where the cube
+    has x before y"""
+    cube.transpose([2, 0, 1])
+    result = stream_xy_slices(cube, lambda cube_slice: cube_slice.data[::-1])
+    assert result.shape == (6, 2, 3)
+    np.testing.assert_array_equal(result.data, cube.data[:, :, ::-1])
+
+
+def test_stream_xy_slices_masked(cube):
+    """Test the output is masked where only a later slice is masked"""
+
+    def function(cube_slice):
+        if cube_slice.coord("realization").points[0] == 1:
+            return np.ma.masked_less(cube_slice.data, 20)
+        return cube_slice.data
+
+    result = stream_xy_slices(cube, function)
+    assert not result.data.mask[0].any()
+    np.testing.assert_array_equal(result.data.mask[1], cube.data[1] < 20)
+
+
+def test_is_masked(cube):
+    """Test masks are found in lazy and realised data"""
+    assert not is_masked(cube)
+    cube.data = np.ma.masked_less(cube.data, 1)
+    assert is_masked(cube)
+    assert is_masked(cube.copy(data=cube.lazy_data()))
+
+
+if __name__ == "__main__":
+    pytest.main()